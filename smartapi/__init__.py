@@ -5,6 +5,7 @@ from .login import login
 from .websocket_stream import WebSocketStreamer
 from .live_trader import LiveTradingBot
 from .strategy import ModularIntradayStrategy
+from .strategy_params import StrategyParams
 from .indicators import *
 from .indicator_manager import IndicatorManager
 
@@ -13,6 +14,7 @@ __all__ = [
     "WebSocketStreamer", 
     "LiveTradingBot", 
     "ModularIntradayStrategy",
+    "StrategyParams",
     "IndicatorManager",
     "API_KEY", 
     "CLIENT_ID", 
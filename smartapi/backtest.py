@@ -7,15 +7,32 @@ import os
 warnings.filterwarnings('ignore')
 from tabulate import tabulate
 from .strategy import ModularIntradayStrategy
+from .strategy_params import StrategyParams
+from .bar_builders import build_bars
+from .prices import PAISE_PER_RUPEE
+from .records import Tick
+from .result_cache import ResultCache
+from .results_store import ResultStore
+from .indicator_cache import shared_indicator_cache
 
 class BacktestEngine:
     """
     Backtesting engine that can process both CSV files and price_ticks.log files.
     Uses the same ModularIntradayStrategy as live trading for consistency.
     """
-    def __init__(self, params=None):
-        self.params = params or {}
+    def __init__(self, params=None, indicator_cache=True):
+        """
+        Args:
+            params: StrategyParams, or a dictionary of parameter overrides
+            indicator_cache: IndicatorCache the bar indicators of time-bar backtests are taken from;
+                             True for the cache shared by all backtests of the process, None to
+                             calculate them bar by bar
+        """
+        self.params = StrategyParams.from_mapping(params)
         self.strategy = ModularIntradayStrategy(params=self.params)
+        if indicator_cache is True:
+            indicator_cache = shared_indicator_cache()
+        self.indicator_cache = indicator_cache if indicator_cache is not False else None
         self.ist_tz = pytz.timezone('Asia/Kolkata')
         
     def load_csv_data(self, csv_path):
@@ -31,8 +48,8 @@ class BacktestEngine:
         except Exception as e:
             raise Exception(f"Error loading CSV data: {e}")
     
-    def load_ticks_log(self, log_path):
-        """Load data from price_ticks.log file and convert to OHLCV format."""
+    def load_ticks(self, log_path):
+        """Load the raw ticks (price, volume) of a price_ticks.log file, indexed by timestamp."""
         if not os.path.exists(log_path):
             raise FileNotFoundError(f"Price ticks log file not found: {log_path}")
         
@@ -80,6 +97,11 @@ class BacktestEngine:
         df_ticks.set_index('timestamp', inplace=True)
         
         print(f"Loaded {len(df_ticks)} ticks from {df_ticks.index.min()} to {df_ticks.index.max()}")
+        return df_ticks
+
+    def load_ticks_log(self, log_path):
+        """Load data from price_ticks.log file and convert to OHLCV format."""
+        df_ticks = self.load_ticks(log_path)
         
         # Resample to 1-minute OHLCV bars
         df_ohlcv = df_ticks['price'].resample('1T').ohlc()
@@ -102,18 +124,45 @@ class BacktestEngine:
         
         print(f"Converted to {len(df)} 1-minute OHLCV bars")
         return df
+
+    def load_activity_bars(self, log_path):
+        """Load a price_ticks.log file as the strategy's tick, volume or range bars."""
+        df_ticks = self.load_ticks(log_path)
+        df = build_bars(df_ticks, self.strategy.params.bar_type, self.strategy.params.bar_size)
+        print(f"Converted to {len(df)} {self.strategy.params.bar_type} bars of size {self.strategy.params.bar_size}")
+        return df
     
-    def run_backtest(self, data_source, data_type='csv'):
+    def run_backtest(self, data_source, data_type='csv', cache=None):
         """
         Run backtest on the provided data source.
         
         Args:
             data_source: Path to CSV file or price_ticks.log file
             data_type: 'csv' or 'ticks'
+            cache: Optional ResultCache. The results of a run with the same data, parameters
+                   and engine code are returned from it without running the strategy.
         """
+        if cache is not None:
+            key = cache.key(data_source, self.params, data_type)
+            results = cache.get(key)
+            if results is not None:
+                print(f"Loaded cached backtest results for {data_source}")
+                return results
+            results = self.run_backtest(data_source, data_type)
+            cache.put(key, results)
+            return results
+
         print(f"Starting backtest with {data_type} data source: {data_source}")
+
+        if self.strategy.params.bar_type != 'time':
+            return self._run_activity_bar_backtest(data_source, data_type)
         
-        # Load data based on type
+        df = self.load_bars(data_source, data_type)
+        print(f"Data loaded: {len(df)} bars from {df.index.min()} to {df.index.max()}")
+        return self.run_bars(df)
+
+    def load_bars(self, data_source, data_type='csv'):
+        """1-minute bars of a CSV or price_ticks.log file, indexed by timezone-aware timestamp."""
         if data_type == 'csv':
             df = self.load_csv_data(data_source)
         elif data_type == 'ticks':
@@ -124,8 +173,37 @@ class BacktestEngine:
         # Ensure timezone is set
         if isinstance(df.index, pd.DatetimeIndex) and df.index.tz is None:
             df.index = df.index.tz_localize(self.ist_tz)
-        
-        print(f"Data loaded: {len(df)} bars from {df.index.min()} to {df.index.max()}")
+        return df
+
+    def run_bars(self, df, warmup=None):
+        """
+        Run the strategy over 1-minute bars already in memory (see load_bars), e.g. a slice
+        of a larger file. Time bars only. Returns generate_results().
+
+        Args:
+            df (pd.DataFrame): Bars to trade on.
+            warmup (pd.DataFrame): Optional bars just before df that seed the indicators
+                                   (strategy.warm_up) without being traded.
+        """
+        if self.strategy.params.bar_type != 'time':
+            raise ValueError(f"{self.strategy.params.bar_type} bars need tick data; use run_backtest()")
+        if warmup is not None and len(warmup):
+            self.strategy.warm_up(warmup.rename_axis('timestamp').reset_index().to_dict('records'))
+            frame = pd.concat([warmup, df])
+        else:
+            frame = df.copy()
+
+        if self.strategy.params.integer_prices:
+            # Price files are in rupees; an integer-price strategy trades in paise
+            price_columns = ['open', 'high', 'low', 'close']
+            frame[price_columns] = (frame[price_columns] * PAISE_PER_RUPEE).round().astype(np.int64)
+
+        if self.indicator_cache is not None and self._bars_close_in_order(frame):
+            # The series run over the warmup too, so they carry on from the seeded state
+            precomputed = self.strategy.indicator_manager.precompute_indicators(frame, self.indicator_cache)
+            if precomputed:
+                print(f"Indicator series from cache: {', '.join(precomputed)}")
+        df = frame.iloc[len(frame) - len(df):]
         
         # Process each bar through the strategy
         print("Processing bars through strategy...")
@@ -135,16 +213,58 @@ class BacktestEngine:
             # We'll simulate ticks within the bar for more accurate processing
             bar_ticks = self._simulate_bar_ticks(row, timestamp)
             
-            for tick_timestamp, tick_price, tick_volume in bar_ticks:
-                self.strategy.on_tick(tick_timestamp, tick_price, tick_volume)
+            for tick in bar_ticks:
+                self.strategy.on_tick(tick.timestamp, tick.price, tick.volume)
         
         print("Backtest completed!")
         return self.strategy.generate_results()
+
+    def _bars_close_in_order(self, df):
+        """
+        True if every row of df becomes exactly one closed bar, in order, so precomputed
+        indicator series line up with the bars: whole, strictly increasing minutes without
+        missing prices, and no flat bars inserted for gaps.
+        """
+        if self.strategy.params.empty_bar_policy != 'skip' or not isinstance(df.index, pd.DatetimeIndex):
+            return False
+        if not df.index.is_monotonic_increasing or not df.index.is_unique:
+            return False
+        if (df.index != df.index.floor('min')).any():
+            return False
+        return not df[['open', 'high', 'low', 'close', 'volume']].isna().any().any()
+
+    def _run_activity_bar_backtest(self, data_source, data_type):
+        """
+        Tick, volume and range bars depend on every individual tick, so the raw ticks are
+        replayed as they were received and the strategy builds its bars exactly as it does live.
+        """
+        if data_type != 'ticks':
+            raise ValueError(f"{self.strategy.params.bar_type} bars need tick data (data_type='ticks')")
+
+        df_ticks = self.load_ticks(data_source)
+        if df_ticks.index.tz is None:
+            df_ticks.index = df_ticks.index.tz_localize(self.ist_tz)
+        bars = build_bars(df_ticks, self.strategy.params.bar_type, self.strategy.params.bar_size, include_partial=False)
+        print(f"Data loaded: {len(df_ticks)} ticks forming {len(bars)} {self.strategy.params.bar_type} bars")
+
+        print("Processing ticks through strategy...")
+        timestamps = df_ticks.index.to_pydatetime()
+        prices = df_ticks['price']
+        if self.strategy.params.integer_prices:
+            prices = (prices * PAISE_PER_RUPEE).round().astype(np.int64)
+        prices = prices.tolist()
+        volumes = df_ticks['volume'].tolist()
+        for tick_timestamp, tick_price, tick_volume in zip(timestamps, prices, volumes):
+            self.strategy.on_tick(tick_timestamp, tick_price, tick_volume)
+
+        print("Backtest completed!")
+        return self.strategy.generate_results()
     
     def _simulate_bar_ticks(self, bar_data, bar_timestamp):
         """
         Simulate tick data within a bar for more accurate strategy processing.
         This helps with proper bar aggregation and indicator calculation.
+        Returns a list of Tick records.
         """
         ticks = []
         
@@ -172,54 +292,41 @@ class BacktestEngine:
         tick_volumes[-1] += total_volume % 5
         
         for i in range(5):
-            ticks.append((tick_times[i], tick_prices[i], tick_volumes[i]))
+            ticks.append(Tick(tick_times[i], tick_prices[i], tick_volumes[i]))
         
         return ticks
     
-    def save_results(self, results, output_dir="smartapi/results"):
-        """Save backtest results to files."""
+    def save_results(self, results, store=None, data_source=None, data_type=None, label=None, reuse_existing=False):
+        """
+        Save backtest results as a run in the results database.
+
+        Args:
+            results: generate_results() output
+            store: ResultStore to write to; defaults to the database in smartapi/results
+            data_source, data_type: Data file and type the backtest ran on (stored with the run)
+            label: Optional tag of the run, e.g. the name of a sweep
+            reuse_existing: Return the id of an identical stored run instead of saving again
+                            (for results loaded from the result cache)
+        Returns the run id, or None for a failed backtest.
+        """
         if "error" in results:
             print(f"Error in results: {results['error']}")
-            return
-        
-        # Create output directory
-        os.makedirs(output_dir, exist_ok=True)
+            return None
         
-        timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # Save trades
-        if 'trades_df' in results and not results['trades_df'].empty:
-            trades_filename = os.path.join(output_dir, f"backtest_trades_{timestamp_str}.csv")
-            results['trades_df'].to_csv(trades_filename, index=False)
-            print(f"Trades saved to: {trades_filename}")
-        
-        # Save equity curve
-        if 'equity_df' in results and not results['equity_df'].empty:
-            equity_filename = os.path.join(output_dir, f"backtest_equity_{timestamp_str}.csv")
-            results['equity_df'].to_csv(equity_filename, index=False)
-            print(f"Equity curve saved to: {equity_filename}")
-        
-        # Save summary
-        summary_data = [
-            ["Total Trades", results['total_trades']],
-            ["Win Rate (%)", f"{results['win_rate']:.2f}"],
-            ["Total P&L", f"{results['total_pnl']:.2f}"],
-            ["Total Return (%)", f"{results['total_return']:.2f}"],
-            ["Max Drawdown (%)", f"{results['max_drawdown']:.2f}"],
-            ["Profit Factor", f"{results['profit_factor']:.2f}"],
-            ["Final Equity", f"{results['final_equity']:.2f}"]
-        ]
-        
-        summary_filename = os.path.join(output_dir, f"backtest_summary_{timestamp_str}.csv")
-        summary_df = pd.DataFrame(summary_data, columns=pd.Index(["Metric", "Value"]))
-        summary_df.to_csv(summary_filename, index=False)
-        print(f"Summary saved to: {summary_filename}")
-        
-        return {
-            'trades_file': trades_filename if 'trades_df' in results else None,
-            'equity_file': equity_filename if 'equity_df' in results else None,
-            'summary_file': summary_filename
-        }
+        owns_store = store is None
+        if owns_store:
+            store = ResultStore()
+        try:
+            run_id = store.find_run(self.params, data_source, data_type) if reuse_existing else None
+            if run_id is not None:
+                print(f"Results already saved as run {run_id} in: {store.path}")
+                return run_id
+            run_id = store.save(results, self.params, data_source=data_source, data_type=data_type, label=label)
+        finally:
+            if owns_store:
+                store.close()
+        print(f"Results saved as run {run_id} in: {store.path}")
+        return run_id
     
     def print_results(self, results):
         """Print backtest results in a formatted table."""
@@ -238,7 +345,12 @@ class BacktestEngine:
             ["Total P&L", f"₹{results['total_pnl']:,.2f}"],
             ["Total Return", f"{results['total_return']:.2f}%"],
             ["Max Drawdown", f"{results['max_drawdown']:.2f}%"],
+            ["Closed-trade Drawdown", f"{results['closed_trade_drawdown']:.2f}%"],
             ["Profit Factor", f"{results['profit_factor']:.2f}"],
+            ["Sharpe (per trade)", f"{results['sharpe']:.2f}"],
+            ["Sortino (per trade)", f"{results['sortino']:.2f}"],
+            ["Exposure", f"{results['exposure']:.1f}%"],
+            ["Avg MAE / MFE", f"{results['avg_mae']:.2f} / {results['avg_mfe']:.2f}"],
             ["Final Equity", f"₹{results['final_equity']:,.2f}"]
         ]
         
@@ -258,14 +370,17 @@ class BacktestEngine:
             print(tabulate(recent_logs, headers=headers, tablefmt="grid"))
 
 
-def run_backtest_from_file(data_file, params=None, data_type='auto'):
+def run_backtest_from_file(data_file, params=None, data_type='auto', cache=True, store=None):
     """
     Convenience function to run backtest from a file.
     
     Args:
         data_file: Path to the data file
-        params: Strategy parameters dictionary
+        params: StrategyParams, or a dictionary of parameter overrides
         data_type: 'csv', 'ticks', or 'auto' (auto-detect based on file extension)
+        cache: ResultCache for identical runs; True for the default on-disk cache, None or False to always run
+        store: ResultStore the run is saved in; defaults to the database in smartapi/results
+    Returns the results and the run id in the results database.
     """
     # Auto-detect data type
     if data_type == 'auto':
@@ -280,13 +395,19 @@ def run_backtest_from_file(data_file, params=None, data_type='auto'):
     engine = BacktestEngine(params=params)
     
     # Run backtest
-    results = engine.run_backtest(data_file, data_type)
+    if cache is True:
+        cache = ResultCache()
+    if cache is False:
+        cache = None
+    hits = cache.hits if cache is not None else 0
+    results = engine.run_backtest(data_file, data_type, cache=cache)
     
-    # Print and save results
+    # Print and save results; a cached run was saved when it first ran
     engine.print_results(results)
-    saved_files = engine.save_results(results)
+    cached = cache is not None and cache.hits > hits
+    run_id = engine.save_results(results, store, data_source=data_file, data_type=data_type, reuse_existing=cached)
     
-    return results, saved_files
+    return results, run_id
 
 
 if __name__ == "__main__":
@@ -316,7 +437,7 @@ if __name__ == "__main__":
         if csv_files:
             csv_file = os.path.join(data_dir, csv_files[0])
             print(f"Using CSV file: {csv_file}")
-            results, files = run_backtest_from_file(csv_file, csv_params, 'csv')
+            results, run_id = run_backtest_from_file(csv_file, csv_params, 'csv')
         else:
             print("No CSV files found in data directory")
             
@@ -341,7 +462,7 @@ if __name__ == "__main__":
         ticks_file = "smartapi/price_ticks.log"
         if os.path.exists(ticks_file):
             print(f"Using ticks file: {ticks_file}")
-            results, files = run_backtest_from_file(ticks_file, ticks_params, 'ticks')
+            results, run_id = run_backtest_from_file(ticks_file, ticks_params, 'ticks')
         else:
             print("price_ticks.log not found")
             
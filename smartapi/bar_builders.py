@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+# 'time' bars close on the clock; the others close on activity (ticks, traded volume or price range)
+BAR_TYPES = ('time', 'tick', 'volume', 'range')
+
+# Float tolerance for range bars, so a 0.30 range on 0.05 ticks is not missed by rounding
+RANGE_EPSILON = 1e-9
+
+
+def validate_bar_type(bar_type, bar_size):
+    """Raises ValueError for an unknown bar type or a missing/invalid size of an activity bar."""
+    if bar_type not in BAR_TYPES:
+        raise ValueError(f"bar_type must be one of {BAR_TYPES}, got {bar_type!r}")
+    if bar_type != 'time' and (bar_size is None or bar_size <= 0):
+        raise ValueError(f"{bar_type} bars need a positive bar_size, got {bar_size!r}")
+
+
+def tick_bar_ids(n_ticks, bar_size):
+    """Bar number of each tick for bars of bar_size ticks."""
+    return np.arange(n_ticks) // int(bar_size)
+
+
+def volume_bar_ids(volumes, bar_size):
+    """
+    Bar number of each tick for bars closing each time the cumulative volume crosses a
+    multiple of bar_size. The tick that crosses belongs to the bar it completes.
+    """
+    cumulative = np.cumsum(volumes)
+    return (cumulative - volumes) // bar_size
+
+
+def range_bar_ids(prices, bar_size):
+    """
+    Bar number of each tick for bars closing as soon as their high-low range reaches bar_size.
+    Each bar depends on where the previous one closed, so this runs as one tight loop.
+    """
+    ids = np.empty(len(prices), dtype=np.int64)
+    bar_id = 0
+    high = low = None
+    threshold = bar_size - RANGE_EPSILON
+    for i, price in enumerate(prices.tolist()):
+        if high is None:
+            high = low = price
+        elif price > high:
+            high = price
+        elif price < low:
+            low = price
+        ids[i] = bar_id
+        if high - low >= threshold:
+            bar_id += 1
+            high = low = None
+    return ids
+
+
+def build_bars(ticks, bar_type, bar_size, include_partial=True):
+    """
+    Builds tick, volume or range bars from raw ticks in one pass.
+
+    Args:
+        ticks (pd.DataFrame): Ticks with a DatetimeIndex (or 'timestamp' column) and 'price' and
+                              'volume' columns, oldest first.
+        bar_type (str): 'tick', 'volume' or 'range'.
+        bar_size (float): Ticks, volume or price range per bar.
+        include_partial (bool): Keep the last bar even if it has not reached bar_size.
+
+    Returns:
+        pd.DataFrame: open, high, low, close, volume and ticks per bar, indexed by the
+                      timestamp of the bar's first tick.
+    """
+    validate_bar_type(bar_type, bar_size)
+    if bar_type == 'time':
+        raise ValueError("build_bars builds activity bars; resample time bars instead")
+
+    timestamps = ticks['timestamp'] if 'timestamp' in ticks.columns else ticks.index
+    prices = ticks['price'].to_numpy(dtype=float)
+    volumes = ticks['volume'].to_numpy(dtype=np.int64)
+    columns = ['open', 'high', 'low', 'close', 'volume', 'ticks']
+    if len(prices) == 0:
+        return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name='timestamp'))
+
+    if bar_type == 'tick':
+        ids = tick_bar_ids(len(prices), bar_size)
+    elif bar_type == 'volume':
+        ids = volume_bar_ids(volumes, bar_size)
+    else:
+        ids = range_bar_ids(prices, bar_size)
+
+    starts = np.flatnonzero(np.concatenate(([True], ids[1:] != ids[:-1])))
+    ends = np.append(starts[1:], len(prices))
+    bars = pd.DataFrame({
+        'open': prices[starts],
+        'high': np.maximum.reduceat(prices, starts),
+        'low': np.minimum.reduceat(prices, starts),
+        'close': prices[ends - 1],
+        'volume': np.add.reduceat(volumes, starts),
+        'ticks': ends - starts,
+    }, index=pd.DatetimeIndex(np.asarray(timestamps)[starts], name='timestamp'))
+    if getattr(timestamps, 'tz', None) is not None and bars.index.tz is None:
+        bars.index = bars.index.tz_localize('UTC').tz_convert(timestamps.tz)
+
+    if not include_partial and not _last_bar_complete(bars, volumes, bar_type, bar_size):
+        bars = bars.iloc[:-1]
+    return bars
+
+
+def _last_bar_complete(bars, volumes, bar_type, bar_size):
+    last = bars.iloc[-1]
+    if bar_type == 'tick':
+        return last['ticks'] >= bar_size
+    if bar_type == 'volume':
+        total = int(np.sum(volumes))
+        return total // bar_size > (total - last['volume']) // bar_size
+    return last['high'] - last['low'] >= bar_size - RANGE_EPSILON
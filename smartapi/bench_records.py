@@ -0,0 +1,93 @@
+"""
+Memory and throughput of the Tick and Bar records against the plain dicts they replace.
+
+Usage:
+    python -m smartapi.bench_records [--number 200000]
+"""
+import argparse
+import timeit
+import tracemalloc
+from datetime import datetime
+import pytz
+from tabulate import tabulate
+from .records import Bar, Tick, bars_to_frame
+
+IST = pytz.timezone('Asia/Kolkata')
+TIMESTAMP = IST.localize(datetime(2025, 6, 2, 10, 30))
+INDICATOR_VALUES = {'supertrend': 1, 'ema_fast': 101.2, 'ema_slow': 100.8, 'rsi': 55.1, 'htf_trend': 100.1, 'atr': 1.9}
+
+
+def make_dict_bar():
+    bar = {'open': 100.0, 'high': 101.5, 'low': 99.5, 'close': 101.0, 'volume': 1200, 'timestamp': TIMESTAMP}
+    bar.update(INDICATOR_VALUES)
+    return bar
+
+
+def make_record_bar():
+    bar = Bar(100.0, 101.5, 99.5, 101.0, 1200, TIMESTAMP)
+    for name, value in INDICATOR_VALUES.items():
+        bar[name] = value
+    return bar
+
+
+def bytes_per_object(factory, count=10000):
+    """Average bytes allocated per object, measured over `count` live objects."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [factory() for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return (after - before) / count
+
+
+def ns_per_call(statement, number):
+    return timeit.timeit(statement, number=number) / number * 1e9
+
+
+def run(number=200000):
+    dict_tick = {'timestamp': TIMESTAMP, 'price': 100.5, 'volume': 10}
+    record_tick = Tick(TIMESTAMP, 100.5, 10)
+    dict_bar, record_bar = make_dict_bar(), make_record_bar()
+    dict_history = [make_dict_bar() for _ in range(100)]
+    record_history = [make_record_bar() for _ in range(100)]
+
+    memory_rows = [
+        ["Tick", bytes_per_object(lambda: {'timestamp': TIMESTAMP, 'price': 100.5, 'volume': 10}),
+         bytes_per_object(lambda: Tick(TIMESTAMP, 100.5, 10))],
+        ["Bar (6 indicator values)", bytes_per_object(make_dict_bar), bytes_per_object(make_record_bar)],
+    ]
+    for row in memory_rows:
+        row.append(f"{(1 - row[2] / row[1]) * 100:.0f}%")
+
+    timing_rows = [
+        ["create tick",
+         ns_per_call(lambda: {'timestamp': TIMESTAMP, 'price': 100.5, 'volume': 10}, number),
+         ns_per_call(lambda: Tick(TIMESTAMP, 100.5, 10), number)],
+        ["read tick price", ns_per_call(lambda: dict_tick['price'], number), ns_per_call(lambda: record_tick.price, number)],
+        ["read bar close", ns_per_call(lambda: dict_bar['close'], number), ns_per_call(lambda: record_bar.close, number)],
+        ["update forming bar",
+         ns_per_call(lambda: dict_bar.__setitem__('high', max(dict_bar['high'], 101.0)), number),
+         ns_per_call(lambda: setattr(record_bar, 'high', max(record_bar.high, 101.0)), number)],
+        ["get indicator value", ns_per_call(lambda: dict_bar.get('rsi', 50), number), ns_per_call(lambda: record_bar.get('rsi', 50), number)],
+        ["copy bar", ns_per_call(dict_bar.copy, number), ns_per_call(record_bar.copy, number)],
+        ["frame of 100 bars",
+         ns_per_call(lambda: bars_to_frame(dict_history), max(1, number // 1000)),
+         ns_per_call(lambda: bars_to_frame(record_history), max(1, number // 1000))],
+    ]
+    for row in timing_rows:
+        row.append(f"{row[1] / row[2]:.2f}x")
+
+    print("Memory per object (bytes)")
+    print(tabulate(memory_rows, headers=["Object", "dict", "record", "saved"], floatfmt=".0f"))
+    print()
+    print("Time per call (ns)")
+    print(tabulate(timing_rows, headers=["Operation", "dict", "record", "speedup"], floatfmt=".0f"))
+    return memory_rows, timing_rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Tick/Bar records against dicts.")
+    parser.add_argument("--number", type=int, default=200000, help="Calls per timing measurement.")
+    args = parser.parse_args()
+    run(args.number)
@@ -0,0 +1,326 @@
+"""
+Reproducible performance benchmarks of the indicator, strategy and backtest paths.
+
+All data is synthetic and generated from a fixed seed, so two runs on the same
+commit and machine measure the same work. Results are written as JSON; pass an
+earlier result with --compare to see the change per benchmark.
+
+Usage:
+    python -m smartapi.bench_suite [--size day|week|month|year] [--repeat 3] [--out FILE]
+                                   [--compare BASELINE.json] [--threshold 10]
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+import contextlib
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import pytz
+from tabulate import tabulate
+from .records import Bar, Tick
+from .strategy_params import StrategyParams
+from .strategy import ModularIntradayStrategy
+from .indicator_manager import IndicatorManager
+from .indicator_cache import IndicatorCache
+from .session_calendar import NSE_HOLIDAYS
+from .backtest import BacktestEngine
+
+IST = pytz.timezone('Asia/Kolkata')
+BENCH_DIR = os.path.join(os.path.dirname(__file__), "data", "benchmarks")
+
+# Trading days of each data size
+SIZES = {'day': 1, 'week': 5, 'month': 21, 'year': 250}
+BARS_PER_DAY = 375     # 09:15 to 15:29
+TICKS_PER_BAR = 5      # as BacktestEngine._simulate_bar_ticks replays a bar
+HISTORY_BARS = 100     # IndicatorManager.max_bar_history_length
+
+
+def trading_days(n_days, start="2025-01-01"):
+    """The first n_days weekdays from start that are not NSE holidays."""
+    days = []
+    for day in pd.bdate_range(start, periods=n_days * 2 + 30):
+        if day.date() not in NSE_HOLIDAYS:
+            days.append(day)
+            if len(days) == n_days:
+                break
+    return days
+
+
+def synthetic_bars(n_days, seed=7, start_price=100.0):
+    """
+    Deterministic 1-minute OHLCV bars for n_days trading days: a random walk with
+    intraday noise and a slowly changing drift, so the strategy enters and exits.
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.DatetimeIndex([
+        day + pd.Timedelta(hours=9, minutes=15 + minute)
+        for day in trading_days(n_days) for minute in range(BARS_PER_DAY)
+    ]).tz_localize(IST)
+    n = len(index)
+    drift = np.repeat(rng.normal(0, 0.02, n // 60 + 1), 60)[:n]
+    close = start_price + np.cumsum(drift + rng.normal(0, 0.15, n))
+    close = np.maximum(close, 1.0)
+    open_ = np.concatenate(([start_price], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.1, (2, n)))
+    df = pd.DataFrame({
+        'open': open_.round(2),
+        'high': (np.maximum(open_, close) + spread[0]).round(2),
+        'low': (np.minimum(open_, close) - spread[1]).round(2),
+        'close': close.round(2),
+        'volume': rng.integers(100, 5000, n),
+    }, index=index)
+    df.index.name = 'timestamp'
+    return df
+
+
+def bar_ticks(bars):
+    """The ticks of every bar as BacktestEngine replays them: (timestamps, prices, volumes)."""
+    offsets = pd.to_timedelta(np.arange(TICKS_PER_BAR) * 60 // TICKS_PER_BAR, unit='s')
+    timestamps = (bars.index.repeat(TICKS_PER_BAR) + np.tile(offsets, len(bars))).to_pydatetime()
+    prices = np.column_stack([bars['open'], bars['high'], bars['low'], bars['close'], bars['close']]).ravel()
+    volumes = np.repeat(bars['volume'].to_numpy() // TICKS_PER_BAR, TICKS_PER_BAR)
+    return timestamps, prices.tolist(), volumes.tolist()
+
+
+def write_csv(bars, path):
+    """Bars in the CSV format BacktestEngine.load_csv_data reads."""
+    out = bars.copy()
+    out.index = out.index.strftime('%Y%m%d %H:%M')
+    out.to_csv(path, index_label='timestamp')
+
+
+def write_ticks_log(bars, path):
+    """Ticks of the bars in the price_ticks.log format (timestamp,price,volume)."""
+    timestamps, prices, volumes = bar_ticks(bars)
+    with open(path, 'w') as f:
+        for timestamp, price, volume in zip(timestamps, prices, volumes):
+            f.write(f"{timestamp.isoformat()},{price},{volume}\n")
+
+
+def bench_params(bars):
+    """Default strategy parameters with the date range covering the bars."""
+    return StrategyParams(start_date=str(bars.index[0].date()), end_date=str(bars.index[-1].date()))
+
+
+def measure(func, repeat, ops=1):
+    """Runs func repeat times; returns the timing entry of a benchmark of ops operations."""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    return timing_entry(times, ops)
+
+
+def timing_entry(times, ops):
+    """Median and best of the timed runs, per operation and per second."""
+    median = float(np.median(times))
+    return {'seconds': median, 'min_seconds': float(min(times)), 'ops': ops,
+            'ns_per_op': median / ops * 1e9, 'ops_per_second': ops / median if median else float('inf')}
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silences the strategy's and loaders' prints while timing."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def bench_indicators(bars, repeat, number=2000):
+    """Cost of one update of every indicator on a full bar history (VWAP: one tick)."""
+    manager = IndicatorManager(bench_params(bars).to_dict())
+    history = [Bar(row.open, row.high, row.low, row.close, row.volume, timestamp)
+               for timestamp, row in zip(bars.index[:HISTORY_BARS], bars.iloc[:HISTORY_BARS].itertuples())]
+    results = {}
+    for name, indicator in manager.indicators.items():
+        if hasattr(indicator, 'can_calculate'):
+            def run(indicator=indicator):
+                for _ in range(number):
+                    indicator.calculate(history)
+        else:
+            ticks = [Tick(bar.timestamp, bar.close, bar.volume) for bar in history]
+            def run(indicator=indicator, ticks=ticks):
+                for i in range(number):
+                    indicator.calculate(ticks[i % len(ticks)])
+        results[f"indicator.{name}"] = measure(run, repeat, number)
+    return results
+
+
+def bench_close_bar(bars, repeat):
+    """IndicatorManager.close_current_bar per bar, with every indicator calculated bar by bar."""
+    params = bench_params(bars).to_dict()
+    rows = list(zip(bars.index, bars['open'], bars['high'], bars['low'], bars['close'], bars['volume']))
+
+    def run():
+        manager = IndicatorManager(params)
+        elapsed = 0
+        for timestamp, open_, high, low, close, volume in rows:
+            for price in (open_, high, low, close):
+                manager.update_current_bar(timestamp, price, volume // 4)
+            started = time.perf_counter_ns()
+            manager.close_current_bar(timestamp)
+            elapsed += time.perf_counter_ns() - started
+        return elapsed
+
+    # Only the close_current_bar calls are timed, not the ticks forming the bars
+    return {'indicator_manager.close_current_bar': timing_entry([run() / 1e9 for _ in range(repeat)], len(rows))}
+
+
+def bench_on_tick(bars, repeat):
+    """ModularIntradayStrategy.on_tick throughput on the bars' ticks, indicators bar by bar."""
+    params = bench_params(bars)
+    timestamps, prices, volumes = bar_ticks(bars)
+
+    # Strategies are created up front, so their setup is not counted as tick time
+    strategies = iter([ModularIntradayStrategy(params) for _ in range(repeat)])
+
+    def run():
+        on_tick = next(strategies).on_tick
+        with quiet():
+            for timestamp, price, volume in zip(timestamps, prices, volumes):
+                on_tick(timestamp, price, volume)
+
+    return {'strategy.on_tick': measure(run, repeat, len(prices))}
+
+
+def bench_loaders(csv_path, ticks_path, n_bars, repeat):
+    """Parse speed of load_csv_data and load_ticks_log, per input line."""
+    engine = BacktestEngine(indicator_cache=None)
+    with quiet():
+        return {
+            'backtest.load_csv_data': measure(lambda: engine.load_csv_data(csv_path), repeat, n_bars),
+            'backtest.load_ticks_log': measure(lambda: engine.load_ticks_log(ticks_path), repeat, n_bars * TICKS_PER_BAR),
+        }
+
+
+def bench_backtest(bars, csv_path, repeat):
+    """End-to-end BacktestEngine.run_backtest on the CSV, bar by bar and with warm cached indicator series."""
+    params = bench_params(bars)
+    cache = IndicatorCache()
+
+    def run(indicator_cache):
+        with quiet():
+            BacktestEngine(params, indicator_cache=indicator_cache).run_backtest(csv_path, 'csv')
+
+    # One untimed run fills the cache, so the cached timing is the warm path
+    run(cache)
+    return {
+        'backtest.run_backtest': measure(lambda: run(None), repeat, len(bars)),
+        'backtest.run_backtest_cached': measure(lambda: run(cache), repeat, len(bars)),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(__file__),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(size='day', repeat=3, seed=7, only=None):
+    """
+    Runs the suite on size worth of synthetic data. Returns {'meta': ..., 'results': ...},
+    results keyed by benchmark name with seconds (median), min_seconds, ops, ns_per_op
+    and ops_per_second.
+
+    Args:
+        size (str): Key of SIZES.
+        repeat (int): Timed runs per benchmark; the median is reported.
+        seed (int): Seed of the synthetic data.
+        only (list): Benchmark groups to run ('indicators', 'close_bar', 'on_tick', 'loaders',
+                     'backtest'); all by default.
+    """
+    bars = synthetic_bars(SIZES[size], seed)
+    groups = only or ['indicators', 'close_bar', 'on_tick', 'loaders', 'backtest']
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "bench_bars.csv")
+        ticks_path = os.path.join(tmp, "bench_ticks.log")
+        write_csv(bars, csv_path)
+        write_ticks_log(bars, ticks_path)
+        for group in groups:
+            started = time.perf_counter()
+            if group == 'indicators':
+                results.update(bench_indicators(bars, repeat))
+            elif group == 'close_bar':
+                results.update(bench_close_bar(bars, repeat))
+            elif group == 'on_tick':
+                results.update(bench_on_tick(bars, repeat))
+            elif group == 'loaders':
+                results.update(bench_loaders(csv_path, ticks_path, len(bars), repeat))
+            elif group == 'backtest':
+                results.update(bench_backtest(bars, csv_path, repeat))
+            else:
+                raise ValueError(f"Unknown benchmark group: {group}")
+            print(f"{group}: {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    meta = {
+        'commit': git_commit(), 'created_at': datetime.now().isoformat(timespec='seconds'),
+        'size': size, 'days': SIZES[size], 'bars': len(bars), 'seed': seed, 'repeat': repeat,
+        'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+        'machine': platform.machine(), 'platform': platform.platform(), 'cpus': os.cpu_count(),
+    }
+    return {'meta': meta, 'results': results}
+
+
+def compare(current, baseline, threshold=10.0):
+    """
+    Rows of (benchmark, baseline ns/op, current ns/op, change %, flag) for the benchmarks
+    in both runs; flag is 'REGRESSION' when the current run is more than threshold % slower.
+    """
+    rows = []
+    for name, entry in current['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            continue
+        change = (entry['ns_per_op'] / before['ns_per_op'] - 1) * 100
+        flag = 'REGRESSION' if change > threshold else ('faster' if change < -threshold else '')
+        rows.append([name, before['ns_per_op'], entry['ns_per_op'], change, flag])
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark indicators, the strategy tick path and backtests.")
+    parser.add_argument("--size", default='day', choices=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--only", nargs='+', choices=['indicators', 'close_bar', 'on_tick', 'loaders', 'backtest'])
+    parser.add_argument("--out", help="Result JSON; defaults to data/benchmarks/<commit>_<size>.json.")
+    parser.add_argument("--compare", help="Earlier result JSON to compare against.")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Slowdown (%%) reported as a regression.")
+    args = parser.parse_args()
+
+    report = run(args.size, args.repeat, args.seed, args.only)
+    out = args.out or os.path.join(BENCH_DIR, f"{report['meta']['commit'] or 'nocommit'}_{args.size}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    table = [[name, entry['ns_per_op'], entry['ops_per_second'], entry['seconds']]
+             for name, entry in report['results'].items()]
+    print(tabulate(table, headers=["Benchmark", "ns/op", "ops/s", "median s"], floatfmt=".1f", tablefmt="grid"))
+    print(f"Results saved to: {out}")
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        if baseline['meta'].get('size') != args.size:
+            print(f"Warning: baseline was run on size {baseline['meta'].get('size')!r}, not {args.size!r}")
+        rows = compare(report, baseline, args.threshold)
+        print(f"\nAgainst {baseline['meta'].get('commit')} ({args.compare})")
+        print(tabulate(rows, headers=["Benchmark", "before ns/op", "now ns/op", "change %", ""],
+                       floatfmt=".1f", tablefmt="grid"))
+        if any(row[4] == 'REGRESSION' for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import os
+import time
+import pickle
+import threading
+from datetime import datetime
+from .log_utils import logger
+
+CHECKPOINT_VERSION = 1
+CHECKPOINT_DIR = os.path.join(os.path.dirname(__file__), "data", "checkpoints")
+
+
+def checkpoint_path_for(name):
+    """Default checkpoint file of a strategy instance."""
+    return os.path.join(CHECKPOINT_DIR, f"{name}.ckpt")
+
+
+class StrategyCheckpointer:
+    """
+    Periodic snapshots of a strategy's full runtime state.
+    The snapshot is pickled to bytes on the calling thread, while it holds the
+    strategy, because get_state() shares bars, trades and indicator state with the
+    running strategy. Only the bytes go to a background thread for the atomic file
+    write. Snapshots that pile up while a write is in progress are coalesced, so
+    only the latest one is written.
+    """
+    def __init__(self, path, interval=5.0):
+        """
+        Args:
+            path (str): Checkpoint file path.
+            interval (float): Minimum seconds between periodic snapshots.
+        """
+        self.path = path
+        self.interval = interval
+        self._last_snapshot = 0.0
+        self._pending = None
+        self._writing = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self._writer_thread = None
+
+    def maybe_checkpoint(self, strategy):
+        """Snapshots the strategy if the interval has elapsed. Cheap enough to call on every tick."""
+        if time.monotonic() - self._last_snapshot >= self.interval:
+            self.checkpoint(strategy)
+
+    def checkpoint(self, strategy):
+        """Snapshots the strategy now and hands the pickled snapshot to the writer thread."""
+        self._last_snapshot = time.monotonic()
+        payload = pickle.dumps({
+            'version': CHECKPOINT_VERSION,
+            'saved_at': datetime.now(strategy.ist_tz),
+            'params_key': strategy.params.cache_key(),
+            'state': strategy.get_state(),
+        }, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._condition:
+            if self._writer_thread is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+                self._writer_thread.start()
+            self._pending = payload
+            self._condition.notify()
+
+    def _writer_loop(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+                if self._pending is None:
+                    return
+                payload, self._pending = self._pending, None
+                self._writing = True
+            try:
+                self._write(payload)
+            except Exception as e:
+                logger.error(f"Failed to write checkpoint {self.path}: {e}")
+            finally:
+                with self._condition:
+                    self._writing = False
+                    self._condition.notify_all()
+
+    def _write(self, payload):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def flush(self, timeout=10):
+        """Blocks until the latest snapshot has been written."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._pending is None and not self._writing, timeout)
+
+    def close(self):
+        """Writes any pending snapshot and stops the writer thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._writer_thread is not None:
+            self._writer_thread.join(timeout=10)
+            self._writer_thread = None
+
+
+def load_checkpoint(path):
+    """Returns the checkpoint payload ({'version', 'saved_at', 'params_key', 'state'}) or None if unusable."""
+    try:
+        with open(path, 'rb') as f:
+            payload = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.error(f"Could not read checkpoint {path}: {e}")
+        return None
+
+    if not isinstance(payload, dict) or payload.get('version') != CHECKPOINT_VERSION:
+        logger.warning(f"Ignoring checkpoint {path} with unsupported format.")
+        return None
+    return payload
+
+
+def restore_strategy(strategy, path, same_day_only=True):
+    """
+    Restores a strategy from its checkpoint file. With same_day_only, a checkpoint
+    written on an earlier day is ignored. A checkpoint of different strategy parameters
+    is ignored too: its indicator state and bar history belong to another configuration.
+    Returns the checkpoint time or None.
+    """
+    payload = load_checkpoint(path)
+    if payload is None:
+        return None
+
+    saved_at = payload['saved_at']
+    if same_day_only and saved_at.date() != datetime.now(strategy.ist_tz).date():
+        logger.info(f"Checkpoint {path} is from {saved_at.date()}; starting fresh.")
+        return None
+    if payload.get('params_key') != strategy.params.cache_key():
+        logger.info(f"Checkpoint {path} was written with different strategy parameters; starting fresh.")
+        return None
+
+    strategy.set_state(payload['state'])
+    return saved_at
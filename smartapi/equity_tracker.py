@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+
+# Columns of the stored series: bucket start (epoch seconds) and the equity's open/high/low/close in it
+SERIES_COLUMNS = ('time', 'open', 'high', 'low', 'close')
+
+
+class EquityTracker:
+    """
+    Mark-to-market equity, updated on every tick.
+    The peak, the low-water mark and the maximum drawdown are exact: every tick's equity
+    is compared against them. For reporting, the equity is kept as an OHLC series of
+    bucket_seconds buckets in a preallocated array of max_points rows. When the array is
+    full, the bucket width doubles and the stored buckets are merged into the wider buckets
+    their times fall in, so the series never loses a high or a low and memory stays bounded
+    on tick-level runs of any length. The forming bucket lives in plain floats; the array
+    is only written when a bucket closes.
+    """
+    def __init__(self, initial_capital, bucket_seconds=60, max_points=20_000):
+        """
+        Args:
+            initial_capital (float): Starting equity (rupees).
+            bucket_seconds (float): Initial width of a stored bucket.
+            max_points (int): Rows of the stored series; an even number of at least 2.
+        """
+        if max_points < 2 or max_points % 2:
+            raise ValueError(f"max_points must be an even number of at least 2, got {max_points}")
+        self.initial_capital = initial_capital
+        self.bucket_seconds = bucket_seconds
+        self.max_points = max_points
+        self.series = np.empty((max_points, len(SERIES_COLUMNS)), dtype=np.float64)
+        self.count = 0
+        self.equity = initial_capital
+        self.peak = initial_capital
+        self.max_drawdown = 0.0
+        self.low_water = initial_capital
+        self.low_water_time = None
+        self.max_drawdown_time = None
+        # Forming bucket
+        self._bucket = None
+        self._open = self._high = self._low = self._close = initial_capital
+
+    def on_tick(self, now, equity):
+        """Account the mark-to-market equity at epoch seconds now."""
+        self.equity = equity
+        if equity > self.peak:
+            self.peak = equity
+        elif self.peak > 0:
+            drawdown = (self.peak - equity) / self.peak * 100
+            if drawdown > self.max_drawdown:
+                self.max_drawdown = drawdown
+                self.max_drawdown_time = now
+        if equity < self.low_water:
+            self.low_water = equity
+            self.low_water_time = now
+
+        bucket = now // self.bucket_seconds
+        if bucket != self._bucket and self._bucket is not None:
+            while self.count == self.max_points:
+                self._compact()
+            # Compaction widens the buckets, so the tick may now fall in the forming one
+            bucket = now // self.bucket_seconds
+            if bucket != self._bucket:
+                self._store()
+        if bucket != self._bucket:
+            self._bucket = bucket
+            self._open = self._high = self._low = equity
+        elif equity > self._high:
+            self._high = equity
+        elif equity < self._low:
+            self._low = equity
+        self._close = equity
+
+    def _store(self):
+        self.series[self.count] = (self._bucket * self.bucket_seconds, self._open, self._high, self._low, self._close)
+        self.count += 1
+
+    def _compact(self):
+        """Doubles the bucket width and merges the stored buckets by the wider bucket their time falls in."""
+        width = self.bucket_seconds * 2
+        rows = self.series[:self.count]
+        groups = rows[:, 0] // width
+        starts = np.flatnonzero(np.concatenate(([True], groups[1:] != groups[:-1])))
+        ends = np.concatenate((starts[1:], [self.count])) - 1
+        merged = np.column_stack((
+            groups[starts] * width,
+            rows[starts, 1],
+            np.maximum.reduceat(rows[:, 2], starts),
+            np.minimum.reduceat(rows[:, 3], starts),
+            rows[ends, 4],
+        ))
+        self.count = len(merged)
+        self.series[:self.count] = merged
+        if self._bucket is not None:
+            # The forming bucket joins the wider bucket its start falls in, together with
+            # the last stored bucket if that one falls in the same wider bucket
+            self._bucket = (self._bucket * self.bucket_seconds) // width
+            if self.count and self.series[self.count - 1, 0] == self._bucket * width:
+                self.count -= 1
+                _, self._open, high, low, _ = self.series[self.count]
+                self._high = max(self._high, high)
+                self._low = min(self._low, low)
+        self.bucket_seconds = width
+
+    @property
+    def current_drawdown(self):
+        """Drawdown of the latest equity from its peak (%)."""
+        return (self.peak - self.equity) / self.peak * 100 if self.peak > 0 else 0.0
+
+    def to_frame(self, tz=None):
+        """The stored series plus the forming bucket as a DataFrame, timestamps in tz."""
+        rows = self.series[:self.count]
+        if self._bucket is not None:
+            forming = (self._bucket * self.bucket_seconds, self._open, self._high, self._low, self._close)
+            rows = np.vstack((rows, forming))
+        df = pd.DataFrame(rows, columns=list(SERIES_COLUMNS))
+        df['timestamp'] = pd.to_datetime(df.pop('time'), unit='s', utc=True)
+        if tz is not None:
+            df['timestamp'] = df['timestamp'].dt.tz_convert(tz)
+        return df[['timestamp', 'open', 'high', 'low', 'close']]
+
+    def summary(self):
+        return {
+            'max_drawdown': self.max_drawdown,
+            'current_drawdown': self.current_drawdown,
+            'low_water_mark': self.low_water,
+            'low_water_time': self.low_water_time,
+            'max_drawdown_time': self.max_drawdown_time,
+        }
+
+    def get_state(self):
+        state = {name: getattr(self, name) for name in (
+            'bucket_seconds', 'count', 'equity', 'peak', 'max_drawdown', 'low_water', 'low_water_time',
+            'max_drawdown_time', '_bucket', '_open', '_high', '_low', '_close')}
+        state['series'] = self.series[:self.count].copy()
+        return state
+
+    def set_state(self, state):
+        series = state['series']
+        if len(series) > self.max_points:
+            raise ValueError(f"Saved equity series has {len(series)} rows, more than max_points={self.max_points}")
+        for name, value in state.items():
+            if name != 'series':
+                setattr(self, name, value)
+        self.series[:len(series)] = series
+        self.count = len(series)
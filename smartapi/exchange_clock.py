@@ -0,0 +1,40 @@
+import time
+from datetime import datetime, timedelta
+
+
+class ExchangeClock:
+    """
+    Estimates the exchange time from the exchange timestamps of received ticks.
+    The offset between each tick's exchange timestamp and its local receipt time
+    is smoothed, so bar closes follow the exchange clock rather than the local one.
+    Until a tick has been seen the local clock is used as is.
+    """
+    def __init__(self, tz, smoothing=0.1):
+        """
+        Args:
+            tz (tzinfo): Timezone of the returned times.
+            smoothing (float): Weight of each new offset sample (0-1).
+        """
+        self.tz = tz
+        self.smoothing = smoothing
+        self.offset = None
+
+    def observe(self, exchange_timestamp, received_at=None):
+        """Records one tick's exchange timestamp, received at local epoch time received_at (default: now)."""
+        sample = exchange_timestamp.timestamp() - (received_at if received_at is not None else time.time())
+        if self.offset is None:
+            self.offset = sample
+        else:
+            self.offset += self.smoothing * (sample - self.offset)
+
+    def now(self):
+        """Current exchange time as an aware datetime."""
+        return datetime.fromtimestamp(time.time() + (self.offset or 0.0), tz=self.tz)
+
+    def seconds_until_next_close(self, grace_seconds):
+        """Seconds until the next minute boundary plus grace_seconds, in exchange time."""
+        now = self.now()
+        next_close = now.replace(second=0, microsecond=0) + timedelta(seconds=grace_seconds)
+        while next_close <= now:
+            next_close += timedelta(minutes=1)
+        return (next_close - now).total_seconds()
@@ -0,0 +1,119 @@
+import argparse
+import numpy as np
+import pandas as pd
+from tabulate import tabulate
+from .results_store import load_trades
+
+# Percentiles of the winners' MAE reported as stop-loss candidates
+WINNER_MAE_PERCENTILES = (50, 75, 90, 95)
+
+
+def position_excursions(trades_df):
+    """
+    One row per position from the trades of a backtest (partial exits are separate trades).
+    Columns: entry_time, entry_price, quantity, pnl, points (realized rupees per unit),
+    mae and mfe (largest adverse / favorable move while open, rupees per unit).
+    """
+    missing = {'mae', 'mfe'} - set(trades_df.columns)
+    if missing:
+        raise ValueError(f"Trades have no {', '.join(sorted(missing))} column; rerun the backtest to record excursions")
+    positions = trades_df.groupby('entry_time', sort=True).agg(
+        entry_price=('entry_price', 'first'), quantity=('quantity', 'sum'), pnl=('pnl', 'sum'),
+        mae=('mae', 'max'), mfe=('mfe', 'max'),
+    ).reset_index()
+    positions['points'] = positions['pnl'] / positions['quantity']
+    return positions
+
+
+def stop_curve(positions, levels):
+    """
+    Result of the traded positions with a fixed stop at each distance in levels (rupees).
+    A position whose MAE reached the stop is assumed stopped out at -stop; the others keep
+    their traded result. Only meaningful for stops no wider than the ones traded, since a
+    position stopped out in the backtest has no excursion recorded beyond its stop.
+    """
+    levels = np.asarray(levels, dtype=float)
+    hit = positions['mae'].to_numpy()[None, :] >= levels[:, None]
+    points = np.where(hit, -levels[:, None], positions['points'].to_numpy()[None, :])
+    return _curve(positions, levels, hit, points, 'stop')
+
+
+def target_curve(positions, levels):
+    """
+    Result of the traded positions with a single target at each distance in levels (rupees).
+    A position whose MFE reached the target is assumed to exit there at +target; the others
+    keep their traded result. The order of MAE and MFE inside a trade is not recorded, so a
+    position that touched its stop before the target counts as a target fill.
+    """
+    levels = np.asarray(levels, dtype=float)
+    hit = positions['mfe'].to_numpy()[None, :] >= levels[:, None]
+    points = np.where(hit, levels[:, None], positions['points'].to_numpy()[None, :])
+    return _curve(positions, levels, hit, points, 'target')
+
+
+def _curve(positions, levels, hit, points, name):
+    """Summary per level of a (levels x positions) matrix of per-unit results."""
+    quantity = positions['quantity'].to_numpy()[None, :]
+    pnl = points * quantity
+    gross_profit = np.where(pnl > 0, pnl, 0).sum(axis=1)
+    gross_loss = -np.where(pnl < 0, pnl, 0).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        profit_factor = np.where(gross_loss > 0, gross_profit / gross_loss, np.inf)
+    return pd.DataFrame({
+        name: levels,
+        'hit_rate': hit.mean(axis=1) * 100,
+        'win_rate': (points > 0).mean(axis=1) * 100,
+        'expectancy_points': points.mean(axis=1),
+        'total_pnl': pnl.sum(axis=1),
+        'profit_factor': profit_factor,
+    })
+
+
+def excursion_summary(positions):
+    """
+    How well the traded exits used the excursions:
+        capture: realized points / MFE of the winners (%), how much of the move was kept
+        winner_mae_pXX: MAE percentiles of the winners, stops tighter than these cut winners
+        loser_mfe_median: median MFE of the losers, a target below it would have saved them
+    """
+    winners = positions[positions['pnl'] > 0]
+    losers = positions[positions['pnl'] <= 0]
+    summary = {'positions': len(positions), 'winners': len(winners),
+               'avg_mae': positions['mae'].mean(), 'avg_mfe': positions['mfe'].mean()}
+    mfe = winners['mfe'].to_numpy()
+    summary['capture'] = float(np.mean(winners['points'].to_numpy()[mfe > 0] / mfe[mfe > 0]) * 100) \
+        if (mfe > 0).any() else float('nan')
+    for pct in WINNER_MAE_PERCENTILES:
+        summary[f'winner_mae_p{pct}'] = float(np.percentile(winners['mae'], pct)) if len(winners) else float('nan')
+    summary['loser_mfe_median'] = float(losers['mfe'].median()) if len(losers) else float('nan')
+    return summary
+
+
+def default_levels(values, steps=20):
+    """Evenly spaced levels from a small distance up to the largest excursion seen."""
+    top = float(np.max(values)) if len(values) else 0.0
+    if top <= 0:
+        return np.array([0.0])
+    return np.linspace(top / steps, top, steps)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MAE/MFE analysis of backtest trades: stop and target curves.")
+    parser.add_argument("trades", help="Trades CSV, or the id of a run in the results database.")
+    parser.add_argument("--stops", type=float, nargs='*', help="Stop distances (rupees) to evaluate.")
+    parser.add_argument("--targets", type=float, nargs='*', help="Target distances (rupees) to evaluate.")
+    args = parser.parse_args()
+
+    positions = position_excursions(load_trades(args.trades))
+    stops = args.stops or default_levels(positions['mae'])
+    targets = args.targets or default_levels(positions['mfe'])
+    print(tabulate([[key, value] for key, value in excursion_summary(positions).items()],
+                   headers=["Excursions", "Value"], floatfmt=".2f", tablefmt="grid"))
+    print("\nStop curve")
+    print(tabulate(stop_curve(positions, stops), headers="keys", floatfmt=".2f", tablefmt="grid", showindex=False))
+    print("\nTarget curve")
+    print(tabulate(target_curve(positions, targets), headers="keys", floatfmt=".2f", tablefmt="grid", showindex=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import os
+import copy
+import hashlib
+from collections import OrderedDict
+import numpy as np
+from .log_utils import logger
+
+FRAME_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+# Bump when a change alters indicator values without touching the modules below
+INDICATOR_CACHE_VERSION = 1
+
+# Modules whose source decides an indicator's series; editing any of them invalidates persisted series
+INDICATOR_MODULES = ('indicators', 'indicator_cache', 'records')
+
+_code_fingerprint = None
+
+
+def code_fingerprint():
+    """Hash of INDICATOR_CACHE_VERSION and the source of the indicator modules."""
+    global _code_fingerprint
+    if _code_fingerprint is None:
+        hasher = hashlib.sha256(f"v{INDICATOR_CACHE_VERSION}".encode('utf-8'))
+        package_dir = os.path.dirname(__file__)
+        for name in INDICATOR_MODULES:
+            with open(os.path.join(package_dir, f"{name}.py"), 'rb') as f:
+                hasher.update(f.read())
+        _code_fingerprint = hasher.hexdigest()
+    return _code_fingerprint
+
+
+def frame_signature(df):
+    """SHA-256 of the OHLCV values (and their dtypes) of a bar frame."""
+    hasher = hashlib.sha256()
+    for column in FRAME_COLUMNS:
+        values = np.ascontiguousarray(df[column].to_numpy())
+        hasher.update(f"{column}:{values.dtype.str}:{len(values)}".encode('utf-8'))
+        hasher.update(values.tobytes())
+    return hasher.hexdigest()
+
+
+class IndicatorCache:
+    """
+    Memo of indicator series, keyed by (data signature, indicator class, indicator parameters)
+    and the code fingerprint, so persisted series are dropped when the indicator code changes.
+    A series depends only on the bars and an indicator's PARAMETERS, so across backtests on
+    the same data each distinct Supertrend, EMA or RSI is computed once: a sweep over
+    fast_ema x slow_ema computes every EMA period a single time. Series are held in memory
+    (least recently used dropped beyond max_bytes) and, with persist_dir, saved as .npy files
+    that later processes open memory-mapped instead of recomputing.
+    """
+    def __init__(self, max_bytes=256 * 1024 * 1024, persist_dir=None):
+        """
+        Args:
+            max_bytes (int): Memory held by cached series before the least recently used are dropped.
+            persist_dir (str): Optional directory for .npy copies of every computed series.
+        """
+        self.max_bytes = max_bytes
+        self.persist_dir = persist_dir
+        self._series = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(data_signature, indicator, max_history=None):
+        """Cache key of an indicator's series, or None if the indicator does not declare its PARAMETERS."""
+        indicator_key = indicator.cache_key()
+        if indicator_key is None:
+            return None
+        parts = (data_signature, indicator_key, max_history, code_fingerprint())
+        return hashlib.sha256(repr(parts).encode('utf-8')).hexdigest()
+
+    def series(self, data_signature, indicator, df, max_history=None):
+        """
+        Values of indicator on every bar of df, as returned by compute_series(). The indicator
+        itself is left untouched; the series is computed on a copy. The returned array is
+        shared between callers and read-only.
+
+        Args:
+            data_signature (str): frame_signature(df), or any key identifying the bars.
+            indicator (BarIndicator): Indicator with compute_series() and PARAMETERS.
+            df (pd.DataFrame): Bars (open, high, low, close, volume), oldest first.
+            max_history (int): Bar history cap of the manager the values are used in.
+        """
+        key = self.key(data_signature, indicator, max_history)
+        if key is None:
+            raise ValueError(f"{type(indicator).__name__} does not declare PARAMETERS and cannot be cached")
+
+        values = self._series.get(key)
+        if values is not None:
+            self._series.move_to_end(key)
+            self.hits += 1
+            return values
+
+        values = self._load(key)
+        if values is None:
+            self.misses += 1
+            values = np.asarray(copy.deepcopy(indicator).compute_series(df, max_history), dtype=float)
+            values.flags.writeable = False
+            self._save(key, values)
+        else:
+            self.hits += 1
+        self._remember(key, values)
+        return values
+
+    def _remember(self, key, values):
+        self._series[key] = values
+        self._bytes += values.nbytes
+        while self._bytes > self.max_bytes and len(self._series) > 1:
+            _, dropped = self._series.popitem(last=False)
+            self._bytes -= dropped.nbytes
+
+    def _path(self, key):
+        return os.path.join(self.persist_dir, f"{key}.npy")
+
+    def _load(self, key):
+        if not self.persist_dir:
+            return None
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            return np.load(path, mmap_mode='r')
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable indicator cache file {path}: {e}")
+            return None
+
+    def _save(self, key, values):
+        if not self.persist_dir:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.persist_dir, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                np.save(f, values)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"Failed to persist indicator series to {path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def __len__(self):
+        return len(self._series)
+
+    def clear(self):
+        """Drops the in-memory series (persisted files are kept)."""
+        self._series.clear()
+        self._bytes = 0
+
+
+_shared_cache = None
+
+
+def shared_indicator_cache():
+    """The in-memory IndicatorCache shared by every backtest of this process."""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = IndicatorCache()
+    return _shared_cache
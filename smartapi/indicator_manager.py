@@ -1,29 +1,54 @@
+import bisect
 import pandas as pd
 import numpy as np
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any, Union
 from .indicators import (
     SupertrendIndicator, EMAIndicator, RSIIndicator, VWAPIndicator,
     ATRIndicator, HTFTrendIndicator
 )
+from .timeframes import TimeframeAggregator, parse_timeframe
+from .bar_builders import RANGE_EPSILON, validate_bar_type
+from .records import Bar, Tick, bars_to_frame
 
 
 class IndicatorManager:
-    """Manages all indicators and their calculations."""
+    """
+    Manages all indicators and their calculations.
+    Ticks build 1-minute bars; completed 1-minute bars are rolled up into every
+    higher timeframe in use (e.g. 3m, 5m, 15m), and each indicator is calculated
+    on the bars of its own timeframe.
+    With bar_type 'tick', 'volume' or 'range' the base bars close on activity instead
+    (every bar_size ticks, bar_size traded volume or bar_size points of range) and no
+    higher timeframes are built.
+    """
     
     def __init__(self, strategy_params: Dict[str, Any]):
         """Initialize the indicator manager with strategy parameters."""
         self.indicators: Dict[str, Any] = {}
-        self.bar_history: List[Dict[str, Any]] = []
-        self.current_bar_data: Dict[str, Any] = {
-            'open': None, 'high': None, 'low': None, 'close': None, 
-            'volume': 0, 'timestamp': None
-        }
+        self.bar_history: List[Bar] = []
+        self.current_bar_data: Bar = Bar()
         self.last_processed_minute: Optional[datetime] = None
         self.max_bar_history_length = 100
+        # Higher-timeframe bar builders, keyed by bar length in minutes
+        self.timeframe_aggregators: Dict[int, TimeframeAggregator] = {}
+
+        # Base bar construction ('time' = 1-minute bars)
+        self.bar_type: str = strategy_params.get('bar_type', 'time')
+        self.bar_size: Optional[float] = strategy_params.get('bar_size')
+        validate_bar_type(self.bar_type, self.bar_size)
+        self._bar_ticks = 0
+        self._cumulative_volume = 0
+        self._volume_threshold = self.bar_size if self.bar_type == 'volume' else None
+
+        # Precomputed 1-minute indicator series (see precompute_indicators), by indicator name
+        self.precomputed: Dict[str, Any] = {}
+        self._precomputed_timestamps: List[datetime] = []
+        self._bars_closed = 0
         
         # Initialize indicators based on strategy parameters
         self._initialize_indicators(strategy_params)
+        self._ensure_timeframes(strategy_params.get('timeframes', []))
     
     def _initialize_indicators(self, params: Dict[str, Any]) -> None:
         """Initialize indicators based on strategy parameters."""
@@ -59,8 +84,9 @@ class IndicatorManager:
         
         # HTF Trend indicator
         self.indicators['htf_trend'] = HTFTrendIndicator(
-            period=20,
-            enabled=True
+            period=params.get('htf_period', 20),
+            enabled=True,
+            timeframe=parse_timeframe(params.get('htf_timeframe', '1m'))
         )
         
         # ATR indicator (for reference)
@@ -69,27 +95,67 @@ class IndicatorManager:
             enabled=True
         )
     
+    def _ensure_timeframes(self, extra_timeframes: List[Union[int, str]]) -> None:
+        """Create a bar builder for every higher timeframe used by an indicator or requested explicitly."""
+        minutes = {parse_timeframe(tf) for tf in extra_timeframes}
+        minutes.update(getattr(indicator, 'timeframe', 1) for indicator in self.indicators.values())
+        if self.bar_type != 'time' and any(tf > 1 for tf in minutes):
+            raise ValueError(f"Higher timeframes can only be built from time bars, not {self.bar_type} bars")
+        for tf in sorted(minutes):
+            if tf > 1 and tf not in self.timeframe_aggregators:
+                self.timeframe_aggregators[tf] = TimeframeAggregator(tf, self.max_bar_history_length)
+
     def update_current_bar(self, timestamp: datetime, price: float, volume: int) -> None:
         """Update the current bar being formed."""
-        if self.current_bar_data['open'] is None:
-            self.current_bar_data['open'] = price
-            self.current_bar_data['high'] = price
-            self.current_bar_data['low'] = price
-            self.current_bar_data['timestamp'] = timestamp.replace(second=0, microsecond=0)
-        else:
-            self.current_bar_data['high'] = max(self.current_bar_data['high'], price)
-            self.current_bar_data['low'] = min(self.current_bar_data['low'], price)
+        bar = self.current_bar_data
+        if bar.open is None:
+            bar.open = bar.high = bar.low = price
+            # Activity bars are stamped with their first tick
+            bar.timestamp = timestamp.replace(second=0, microsecond=0) if self.bar_type == 'time' else timestamp
+        elif price > bar.high:
+            bar.high = price
+        elif price < bar.low:
+            bar.low = price
         
-        self.current_bar_data['close'] = price
-        self.current_bar_data['volume'] += volume
+        bar.close = price
+        bar.volume += volume
     
+    def update_activity_bar(self, timestamp: datetime, price: float, volume: int) -> bool:
+        """
+        Add a tick to the forming tick, volume or range bar and close the bar once it is full.
+        The tick that fills a bar belongs to it. Volume bars close each time the cumulative
+        volume crosses a multiple of bar_size, so an overshoot shortens the next bar.
+        Returns True if the tick closed a bar.
+        """
+        self.update_current_bar(timestamp, price, volume)
+        self._bar_ticks += 1
+        self._cumulative_volume += volume
+
+        bar = self.current_bar_data
+        if self.bar_type == 'tick':
+            full = self._bar_ticks >= self.bar_size
+        elif self.bar_type == 'volume':
+            full = self._cumulative_volume >= self._volume_threshold
+        elif self.bar_type == 'range':
+            full = bar.high - bar.low >= self.bar_size - RANGE_EPSILON
+        else:
+            raise ValueError("Time bars are closed by roll_to_minute()")
+
+        if full:
+            self.close_current_bar(bar.timestamp)
+            self._bar_ticks = 0
+            if self.bar_type == 'volume':
+                self._volume_threshold = (self._cumulative_volume // self.bar_size + 1) * self.bar_size
+        return full
+
     def close_current_bar(self, bar_timestamp: datetime) -> None:
         """Close the current bar and add it to history."""
-        if self.current_bar_data['open'] is None:
+        if self.current_bar_data.open is None:
             return
         
-        completed_bar = self.current_bar_data.copy()
-        completed_bar['timestamp'] = bar_timestamp
+        # The forming bar record becomes the completed bar; a fresh one takes its place
+        completed_bar = self.current_bar_data
+        completed_bar.timestamp = bar_timestamp
         self.bar_history.append(completed_bar)
         
         # Maintain history length
@@ -97,37 +163,302 @@ class IndicatorManager:
             self.bar_history.pop(0)
         
         # Reset current bar
-        self.current_bar_data = {
-            'open': None, 'high': None, 'low': None, 'close': None, 
-            'volume': 0, 'timestamp': None
-        }
+        self.current_bar_data = Bar()
+        self._bars_closed += 1
         
+        # Roll the bar up first, so higher-timeframe values are current on this bar
+        self._roll_up_bar(completed_bar)
+
         # Calculate bar-based indicators
         self._calculate_bar_indicators()
+
+    def _roll_up_bar(self, bar: Dict[str, Any]) -> None:
+        """Feed a completed 1-minute bar to the higher timeframes and update their indicators."""
+        for minutes, aggregator in self.timeframe_aggregators.items():
+            completed = aggregator.add_bar(bar)
+            # A gap across a bucket boundary completes two bars; stateful indicators
+            # (e.g. Supertrend's bands) must see each of them, as in seed()/compute_series
+            for remaining in range(len(completed) - 1, -1, -1):
+                history = aggregator.bars[:len(aggregator.bars) - remaining] if remaining else None
+                self._calculate_bar_indicators(minutes, history)
     
-    def _calculate_bar_indicators(self) -> None:
-        """Calculate all bar-based indicators on the latest completed bar."""
-        if not self.bar_history:
+    def roll_to_minute(self, minute: datetime, empty_bar_policy: str = 'skip', session_calendar=None) -> int:
+        """
+        Make `minute` the forming minute, closing every bar before it.
+        The forming bar is closed if it has ticks. Minutes without ticks produce no bar with
+        empty_bar_policy='skip', or a flat zero-volume bar at the previous close with 'carry'.
+        Carried minutes never cross a date change and, with a session_calendar, stay inside
+        the exchange session of the day, so overnight and weekend gaps produce no bars.
+        Returns the number of bars closed.
+        """
+        last_minute = self.last_processed_minute
+        if last_minute is None or minute <= last_minute:
+            if last_minute is None:
+                self.last_processed_minute = minute
+            return 0
+
+        closed = 0
+        gap_minute = last_minute
+        if self.current_bar_data.open is not None:
+            self.close_current_bar(last_minute)
+            closed += 1
+            gap_minute = last_minute + timedelta(minutes=1)
+
+        if empty_bar_policy == 'carry' and self.bar_history:
+            # Never carry over a minute that already has a bar (e.g. after seeding)
+            gap_minute = max(gap_minute, self.bar_history[-1].timestamp + timedelta(minutes=1))
+            end_minute = minute if gap_minute.date() == minute.date() else gap_minute
+            if session_calendar is not None and end_minute > gap_minute:
+                hours = session_calendar.exchange_hours(minute.date())
+                if hours is None:
+                    end_minute = gap_minute
+                else:
+                    gap_minute = max(gap_minute, hours[0])
+                    end_minute = min(end_minute, hours[1])
+            while gap_minute < end_minute:
+                previous_close = self.bar_history[-1].close
+                self.current_bar_data = Bar(previous_close, previous_close, previous_close, previous_close, 0, gap_minute)
+                self.close_current_bar(gap_minute)
+                closed += 1
+                gap_minute += timedelta(minutes=1)
+
+        self.last_processed_minute = minute
+        return closed
+
+    def backfill_bars(self, bars: List[Dict[str, Any]]) -> int:
+        """
+        Insert 1-minute bars fetched after a feed outage so the bar history has no holes.
+        Bars at or before the last completed bar are ignored. The partially formed bar is
+        replaced by the exchange candle of the same minute; a forming bar of a later minute
+        (live ticks that arrived before the backfill) is kept. Returns the number of bars added.
+        Activity bars cannot be rebuilt from candles, so nothing is added for them.
+        """
+        if self.bar_type != 'time':
+            return 0
+        last_closed = self.bar_history[-1].timestamp if self.bar_history else None
+        forming_bar = self.current_bar_data if self.current_bar_data.open is not None else None
+        forming_minute = forming_bar.timestamp if forming_bar is not None else None
+        inserted = 0
+
+        for bar in sorted(bars, key=lambda b: b['timestamp']):
+            bar_timestamp = bar['timestamp']
+            if last_closed is not None and bar_timestamp <= last_closed:
+                continue
+
+            if forming_bar is not None and bar_timestamp >= forming_minute:
+                if bar_timestamp > forming_minute:
+                    # The forming bar has no candle of its own in the backfill; close it as it is
+                    self.current_bar_data = forming_bar
+                    self.close_current_bar(forming_minute)
+                forming_bar = None
+
+            self.current_bar_data = Bar(bar['open'], bar['high'], bar['low'], bar['close'], bar['volume'], bar_timestamp)
+            self.close_current_bar(bar_timestamp)
+
+            # Ticks of the forming minute were already counted in VWAP
+            if 'vwap' in self.indicators and bar_timestamp != forming_minute:
+                typical_price = (bar['high'] + bar['low'] + bar['close']) / 3
+                self.indicators['vwap'].calculate(Tick(bar_timestamp, typical_price, bar['volume']))
+
+            last_closed = bar_timestamp
+            inserted += 1
+
+        if forming_bar is not None:
+            self.current_bar_data = forming_bar
+        elif inserted:
+            self.last_processed_minute = last_closed
+        return inserted
+
+    def seed_history(self, bars: List[Dict[str, Any]]) -> int:
+        """
+        Bulk-load completed 1-minute bars (e.g. historical candles) before live ticks arrive.
+        Every indicator, including the Supertrend bands and VWAP day sums, is computed in one
+        vectorized pass and left in the state it would have after closing these bars live.
+        A manager that already has history gets the bars through backfill_bars() instead.
+        Activity bars cannot be rebuilt from candles, so nothing is seeded for them.
+        Returns the number of bars in the seeded history.
+        """
+        if self.bar_type != 'time':
+            return 0
+        if self.bar_history or self.current_bar_data.open is not None:
+            return self.backfill_bars(bars)
+        if not bars:
+            return 0
+
+        bars = sorted(bars, key=lambda b: b['timestamp'])
+        bars = [bar for i, bar in enumerate(bars) if i == 0 or bar['timestamp'] != bars[i - 1]['timestamp']]
+        df = bars_to_frame(bars, columns=('timestamp', 'open', 'high', 'low', 'close', 'volume'))
+        max_history = self.max_bar_history_length
+        # Position of each bar's value in the (capped) live history when it was closed
+        history_lengths = np.minimum(np.arange(1, len(df) + 1), max_history)
+
+        series = {}
+        for name, indicator in self.indicators.items():
+            if getattr(indicator, 'timeframe', 1) != 1:
+                continue
+            if hasattr(indicator, 'compute_series'):
+                values = indicator.compute_series(df, max_history)
+                if not indicator.is_enabled():
+                    values = np.full(len(df), np.nan)
+                series[name] = (values, history_lengths >= indicator.min_bars_required)
+            elif hasattr(indicator, 'seed_from_bars'):
+                indicator.seed_from_bars(df)
+        series.update(self._seed_timeframes(df))
+
+        start = max(0, len(df) - max_history)
+        self.bar_history = []
+        for i in range(start, len(df)):
+            bar = bars[i]
+            record = Bar(bar['open'], bar['high'], bar['low'], bar['close'], bar['volume'], bar['timestamp'])
+            for name, (values, computed) in series.items():
+                if computed[i]:
+                    record[name] = values[i].item()
+            self.bar_history.append(record)
+
+        self.last_processed_minute = bars[-1]['timestamp']
+        return len(self.bar_history)
+
+    def _seed_timeframes(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Seed the higher timeframes from 1-minute bars and compute their indicators in bulk.
+        Returns, per higher-timeframe indicator, its value as seen on each 1-minute bar.
+        """
+        series = {}
+        max_history = self.max_bar_history_length
+        row_positions = np.arange(len(df))
+        for minutes, aggregator in self.timeframe_aggregators.items():
+            closed_df, completed_at = aggregator.seed(df)
+            history_lengths = np.minimum(np.arange(1, len(closed_df) + 1), max_history)
+            bound = {name: indicator for name, indicator in self.indicators.items()
+                     if getattr(indicator, 'timeframe', 1) == minutes and hasattr(indicator, 'compute_series')}
+
+            values_by_name = {}
+            for name, indicator in bound.items():
+                values = indicator.compute_series(closed_df, max_history)
+                if not indicator.is_enabled():
+                    values = np.full(len(closed_df), np.nan)
+                values_by_name[name] = (values, history_lengths >= indicator.min_bars_required)
+
+            start = max(0, len(closed_df) - max_history)
+            aggregator.bars = []
+            for i in range(start, len(closed_df)):
+                row = closed_df.iloc[i]
+                record = Bar(row['open'].item(), row['high'].item(), row['low'].item(), row['close'].item(),
+                             row['volume'].item(), row['timestamp'].to_pydatetime())
+                for name, (values, computed) in values_by_name.items():
+                    if computed[i]:
+                        record[name] = values[i].item()
+                aggregator.bars.append(record)
+
+            # Each 1-minute bar sees the latest higher-timeframe bar completed by then
+            latest = np.searchsorted(completed_at, row_positions, side='right') - 1
+            for name, (values, computed) in values_by_name.items():
+                visible = latest >= 0
+                visible[visible] = computed[latest[visible]]
+                seen = np.full(len(df), np.nan)
+                seen[visible] = values[latest[visible]]
+                series[name] = (seen, visible)
+        return series
+
+    def _calculate_bar_indicators(self, timeframe: int = 1, history: Optional[List[Bar]] = None) -> None:
+        """
+        Calculate the bar-based indicators of one timeframe on its latest completed bar,
+        or on the last bar of history when given (an earlier prefix of the timeframe's bars).
+        """
+        if history is None:
+            history = self.get_timeframe_history(timeframe, copy=False)
+        if not history:
             return
         
+        position = self._precomputed_position(history[-1]) if timeframe == 1 and self.precomputed else None
+
         # Calculate each bar-based indicator
         for name, indicator in self.indicators.items():
-            if hasattr(indicator, 'can_calculate') and indicator.can_calculate(self.bar_history):
-                value = indicator.calculate(self.bar_history)
+            if getattr(indicator, 'timeframe', 1) != timeframe:
+                continue
+            if position is not None and name in self.precomputed:
+                values, computed = self.precomputed[name]
+                if computed[position]:
+                    indicator.value = values[position]
+                    history[-1][name] = indicator.value
+            elif hasattr(indicator, 'can_calculate') and indicator.can_calculate(history):
+                value = indicator.calculate(history)
                 # Store the value in the latest bar
-                self.bar_history[-1][name] = value
+                history[-1][name] = value
+
+        if timeframe == 1:
+            # The latest higher-timeframe values are carried on every 1-minute bar
+            for name, indicator in self.indicators.items():
+                if getattr(indicator, 'timeframe', 1) != 1 and hasattr(indicator, 'can_calculate') \
+                        and indicator.last_update is not None:
+                    history[-1][name] = indicator.value
+
+    def precompute_indicators(self, df: pd.DataFrame, cache: Any, data_signature: Optional[str] = None) -> List[str]:
+        """
+        Take the series of the 1-minute bar indicators from an IndicatorCache instead of
+        calculating them bar by bar, for bars that are about to be closed one by one in this
+        exact order (a backtest over df). The manager must be empty, or hold only history seeded
+        from the first bars of df (seed_history), which are then skipped. Each closed bar then gets
+        the precomputed value of its position; indicators that do not declare PARAMETERS keep
+        calculating live. Returns the names of the precomputed indicators.
+
+        Args:
+            df (pd.DataFrame): The bars (open, high, low, close, volume) with a DatetimeIndex of
+                               their minutes, oldest first.
+            cache (IndicatorCache): Memo the series are looked up in (and added to).
+            data_signature (str): Key identifying the bars; frame_signature(df) if not given.
+        """
+        from .indicator_cache import frame_signature
+        self.precomputed = {}
+        self._bars_closed = 0
+        if self.bar_type != 'time' or self.current_bar_data.open is not None:
+            return []
+        timestamps = list(df.index.to_pydatetime())
+        seeded = 0
+        if self.bar_history:
+            # The seeded bars must be the first rows of df, so positions line up after them
+            seeded = bisect.bisect_right(timestamps, self.bar_history[-1].timestamp)
+            history = [bar.timestamp for bar in self.bar_history]
+            if seeded < len(history) or timestamps[seeded - len(history):seeded] != history:
+                return []
+
+        frame = df[['open', 'high', 'low', 'close', 'volume']].reset_index(drop=True)
+        signature = data_signature or frame_signature(frame)
+        max_history = self.max_bar_history_length
+        history_lengths = np.minimum(np.arange(1, len(frame) + 1), max_history)
+        for name, indicator in self.indicators.items():
+            if getattr(indicator, 'timeframe', 1) != 1 or not indicator.is_enabled() \
+                    or not hasattr(indicator, 'cache_key') or indicator.cache_key() is None:
+                continue
+            values = cache.series(signature, indicator, frame, max_history)
+            self.precomputed[name] = (values, history_lengths >= indicator.min_bars_required)
+        self._precomputed_timestamps = timestamps if self.precomputed else []
+        self._bars_closed = seeded
+        return list(self.precomputed)
+
+    def _precomputed_position(self, bar: Bar) -> int:
+        """Position of the bar just closed in the precomputed series."""
+        position = self._bars_closed - 1
+        if position >= len(self._precomputed_timestamps) or bar.timestamp != self._precomputed_timestamps[position]:
+            raise RuntimeError(f"Bar {bar.timestamp} does not match the precomputed indicator series")
+        return position
+
+    def get_timeframe_history(self, timeframe: Union[int, str] = 1, copy: bool = True) -> List[Bar]:
+        """Get the completed bars of a timeframe (1 = the 1-minute bar history)."""
+        minutes = parse_timeframe(timeframe)
+        if minutes == 1:
+            history = self.bar_history
+        elif minutes in self.timeframe_aggregators:
+            history = self.timeframe_aggregators[minutes].bars
+        else:
+            raise KeyError(f"Timeframe {timeframe} is not built by this manager")
+        return history.copy() if copy else history
     
     def update_tick_indicators(self, timestamp: datetime, price: float, volume: int) -> float:
         """Update tick-based indicators."""
-        tick_data = {
-            'price': price,
-            'volume': volume,
-            'timestamp': timestamp
-        }
-        
         # Update VWAP
         if 'vwap' in self.indicators:
-            vwap_value = self.indicators['vwap'].calculate(tick_data)
+            vwap_value = self.indicators['vwap'].calculate(Tick(timestamp, price, volume))
             return vwap_value
         
         return np.nan
@@ -139,12 +470,12 @@ class IndicatorManager:
         return np.nan
     
     def get_latest_bar_data(self) -> Dict[str, Any]:
-        """Get the latest completed bar data with all indicator values."""
+        """Get a copy of the latest completed bar (a Bar record) with all indicator values, or {}."""
         if self.bar_history:
             return self.bar_history[-1].copy()
         return {}
     
-    def get_bar_history(self) -> List[Dict[str, Any]]:
+    def get_bar_history(self) -> List[Bar]:
         """Get the complete bar history."""
         return self.bar_history.copy()
     
@@ -159,6 +490,35 @@ class IndicatorManager:
             df.index = pd.to_datetime(df.index)
         return df
     
+    def get_state(self) -> Dict[str, Any]:
+        """Snapshot of the bar histories, the forming bars and every indicator's state."""
+        return {
+            'bar_history': list(self.bar_history),
+            'current_bar_data': self.current_bar_data.copy(),
+            'last_processed_minute': self.last_processed_minute,
+            'timeframes': {minutes: aggregator.get_state() for minutes, aggregator in self.timeframe_aggregators.items()},
+            'activity_bar': {'ticks': self._bar_ticks, 'cumulative_volume': self._cumulative_volume,
+                             'volume_threshold': self._volume_threshold},
+            'indicators': {name: indicator.get_state() for name, indicator in self.indicators.items()},
+        }
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        """Restore a snapshot taken with get_state(). Indicators missing from either side are left as they are."""
+        self.bar_history = [bar.copy() for bar in state['bar_history'][-self.max_bar_history_length:]]
+        self.current_bar_data = state['current_bar_data'].copy()
+        self.last_processed_minute = state['last_processed_minute']
+        activity = state.get('activity_bar')
+        if activity is not None:
+            self._bar_ticks = activity['ticks']
+            self._cumulative_volume = activity['cumulative_volume']
+            self._volume_threshold = activity['volume_threshold']
+        for minutes, aggregator_state in state.get('timeframes', {}).items():
+            if minutes in self.timeframe_aggregators:
+                self.timeframe_aggregators[minutes].set_state(aggregator_state)
+        for name, indicator_state in state['indicators'].items():
+            if name in self.indicators:
+                self.indicators[name].set_state(indicator_state)
+
     def has_enough_history(self, min_bars: int) -> bool:
         """Check if we have enough bar history."""
         return len(self.bar_history) >= min_bars
@@ -170,11 +530,15 @@ class IndicatorManager:
                 indicator.reset_state()
         
         self.bar_history = []
-        self.current_bar_data = {
-            'open': None, 'high': None, 'low': None, 'close': None, 
-            'volume': 0, 'timestamp': None
-        }
+        self.current_bar_data = Bar()
         self.last_processed_minute = None
+        self._bar_ticks = 0
+        self._cumulative_volume = 0
+        self._volume_threshold = self.bar_size if self.bar_type == 'volume' else None
+        self.precomputed = {}
+        self._bars_closed = 0
+        for aggregator in self.timeframe_aggregators.values():
+            aggregator.set_state({'bars': [], 'current': None})
     
     def get_enabled_indicators(self) -> List[str]:
         """Get list of enabled indicators."""
@@ -184,17 +548,22 @@ class IndicatorManager:
         """Enable a specific indicator."""
         if indicator_name in self.indicators:
             self.indicators[indicator_name].enable()
+            self.precomputed.pop(indicator_name, None)
     
     def disable_indicator(self, indicator_name: str) -> None:
         """Disable a specific indicator."""
         if indicator_name in self.indicators:
             self.indicators[indicator_name].disable()
+            self.precomputed.pop(indicator_name, None)
     
     def add_indicator(self, name: str, indicator: Any) -> None:
         """Add a new indicator to the manager."""
         self.indicators[name] = indicator
+        self.precomputed.pop(name, None)
+        self._ensure_timeframes([])
     
     def remove_indicator(self, name: str) -> None:
         """Remove an indicator from the manager."""
         if name in self.indicators:
-            del self.indicators[name]
\ No newline at end of file
+            del self.indicators[name]
+        self.precomputed.pop(name, None)
\ No newline at end of file
@@ -3,14 +3,44 @@ import numpy as np
 from abc import ABC, abstractmethod
 from datetime import datetime
 import pytz
+from numpy.lib.stride_tricks import sliding_window_view
+from .records import Tick, bars_to_frame
+
+
+def _true_range(high, low, close):
+    """True range per bar; the first bar has no previous close and yields NaN."""
+    prev_close = np.concatenate(([np.nan], close[:-1]))
+    return np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+def _tail_ema_series(close, period, max_history=None):
+    """
+    EMA per bar as computed live: an adjust=False ewm over only the last
+    `period * 2` closes (or fewer, while the history is shorter).
+    """
+    window = period * 2
+    if max_history:
+        window = min(window, max_history)
+    # While the history is shorter than the window, the tail is the whole prefix
+    values = pd.Series(close).ewm(span=period, adjust=False).mean().to_numpy().copy()
+    if len(close) > window:
+        alpha = 2.0 / (period + 1)
+        weights = alpha * (1 - alpha) ** np.arange(window - 1, -1, -1)
+        weights[0] = (1 - alpha) ** (window - 1)
+        values[window - 1:] = sliding_window_view(close, window) @ weights
+    return values
 
 
 class Indicator(ABC):
     """Base abstract class for all indicators."""
+
+    # Attributes that make up the indicator's runtime state (see get_state)
+    STATE_FIELDS = ('enabled', 'value', 'last_update')
     
-    def __init__(self, name, enabled=True):
+    def __init__(self, name, enabled=True, timeframe=1):
         self.name = name
         self.enabled = enabled
+        self.timeframe = timeframe  # bar interval in minutes the indicator is calculated on
         self.value = np.nan
         self.last_update = None
     
@@ -35,12 +65,26 @@ class Indicator(ABC):
         """Disable the indicator."""
         self.enabled = False
 
+    def get_state(self):
+        """Return a snapshot of the runtime state, for checkpointing."""
+        return {field: getattr(self, field) for field in self.STATE_FIELDS}
+
+    def set_state(self, state):
+        """Restore a snapshot taken with get_state()."""
+        for field in self.STATE_FIELDS:
+            if field in state:
+                setattr(self, field, state[field])
+
 
 class BarIndicator(Indicator):
     """Base class for indicators that are calculated on historical bar data."""
+
+    # Attributes that, together with the bars, decide every value of compute_series().
+    # Indicators that declare them can have their series memoized (see cache_key).
+    PARAMETERS = None
     
-    def __init__(self, name, min_bars_required, enabled=True):
-        super().__init__(name, enabled)
+    def __init__(self, name, min_bars_required, enabled=True, timeframe=1):
+        super().__init__(name, enabled, timeframe)
         self.min_bars_required = min_bars_required
     
     def can_calculate(self, bar_history):
@@ -61,18 +105,52 @@ class BarIndicator(Indicator):
         """Internal calculation method. Must be implemented by subclasses."""
         pass
 
+    def compute_series(self, df, max_history=None):
+        """
+        Computes the indicator for every bar of df (oldest first) as if the bars had
+        been closed one by one, and leaves the indicator in the state it would have
+        after the last bar. Subclasses override this with a vectorized version;
+        this fallback replays the bars through _calculate_impl.
+        """
+        bars = df.to_dict('records')
+        values = np.full(len(bars), np.nan)
+        for i in range(len(bars)):
+            start = max(0, i + 1 - max_history) if max_history else 0
+            window = bars[start:i + 1]
+            if self.enabled and self.can_calculate(window):
+                values[i] = self._calculate_impl(window)
+        self._set_last_value(values, max_history)
+        return values
+
+    def cache_key(self):
+        """Identity of the series this indicator computes (class and PARAMETERS values), or None."""
+        if self.PARAMETERS is None:
+            return None
+        cls = type(self)
+        return (f"{cls.__module__}.{cls.__qualname__}", self.timeframe) + tuple(getattr(self, name) for name in self.PARAMETERS)
+
+    def _set_last_value(self, values, max_history=None):
+        history_length = min(len(values), max_history) if max_history else len(values)
+        if self.enabled and len(values) and history_length >= self.min_bars_required:
+            self.value = values[-1]
+            self.last_update = datetime.now()
+
 
 class TickIndicator(Indicator):
     """Base class for indicators that are calculated on real-time tick data."""
+
+    STATE_FIELDS = Indicator.STATE_FIELDS + ('_state',)
     
     def __init__(self, name, enabled=True):
         super().__init__(name, enabled)
         self._state = {}
     
     def calculate(self, tick_data):
-        """Calculate indicator on tick data."""
+        """Calculate indicator on one tick (a Tick record; a dict is converted)."""
         if not self.enabled:
             return np.nan
+        if isinstance(tick_data, dict):
+            tick_data = Tick(tick_data['timestamp'], tick_data['price'], tick_data.get('volume', 0))
         
         self.value = self._calculate_impl(tick_data)
         self.last_update = datetime.now()
@@ -90,9 +168,12 @@ class TickIndicator(Indicator):
 
 class SupertrendIndicator(BarIndicator):
     """Supertrend indicator implementation."""
+
+    PARAMETERS = ('atr_length', 'atr_multiplier')
+    STATE_FIELDS = BarIndicator.STATE_FIELDS + ('trend', 'final_upperband', 'final_lowerband')
     
-    def __init__(self, atr_length=10, atr_multiplier=3.0, enabled=True):
-        super().__init__("Supertrend", atr_length + 1, enabled)
+    def __init__(self, atr_length=10, atr_multiplier=3.0, enabled=True, timeframe=1):
+        super().__init__("Supertrend", atr_length + 1, enabled, timeframe)
         self.atr_length = atr_length
         self.atr_multiplier = atr_multiplier
         self.trend = 1
@@ -105,7 +186,7 @@ class SupertrendIndicator(BarIndicator):
             return self.trend
         
         # Convert to DataFrame for easier calculations
-        df = pd.DataFrame(bar_history)
+        df = bars_to_frame(bar_history)
         current_bar = df.iloc[-1]
         
         # Calculate ATR
@@ -152,6 +233,45 @@ class SupertrendIndicator(BarIndicator):
         atr = true_range.rolling(window=self.atr_length).mean().iloc[-1]
         return atr
     
+    def compute_series(self, df, max_history=None):
+        """Vectorized ATR and bands; only the band/trend recursion runs per bar."""
+        self.reset_state()
+        high = df['high'].to_numpy(dtype=float)
+        low = df['low'].to_numpy(dtype=float)
+        close = df['close'].to_numpy(dtype=float)
+        atr = pd.Series(_true_range(high, low, close)).rolling(window=self.atr_length).mean().to_numpy()
+        hlc3 = (high + low + close) / 3
+        upperbands = hlc3 + self.atr_multiplier * atr
+        lowerbands = hlc3 - self.atr_multiplier * atr
+
+        values = np.full(len(close), np.nan)
+        if not self.enabled:
+            return values
+
+        trend = self.trend
+        final_upper, final_lower = self.final_upperband, self.final_lowerband
+        for i in range(self.atr_length, len(close)):
+            if np.isnan(atr[i]):
+                values[i] = trend
+                continue
+            c = close[i]
+            if final_upper is None:
+                final_upper, final_lower = upperbands[i], lowerbands[i]
+            final_upper = lowerbands[i] if c > final_upper else min(upperbands[i], final_upper)
+            final_lower = upperbands[i] if c < final_lower else max(lowerbands[i], final_lower)
+            if trend == 1 and c < final_lower:
+                trend = -1
+            elif trend == -1 and c > final_upper:
+                trend = 1
+            values[i] = trend
+
+        self.trend = trend
+        self.final_upperband, self.final_lowerband = final_upper, final_lower
+        self._set_last_value(values, max_history)
+        if self.last_update is not None:
+            self.value = self.trend
+        return values
+
     def reset_state(self):
         """Reset Supertrend state."""
         self.trend = 1
@@ -161,28 +281,39 @@ class SupertrendIndicator(BarIndicator):
 
 class EMAIndicator(BarIndicator):
     """Exponential Moving Average indicator."""
+
+    PARAMETERS = ('period',)
     
-    def __init__(self, period, enabled=True):
-        super().__init__(f"EMA_{period}", period, enabled)
+    def __init__(self, period, enabled=True, timeframe=1):
+        super().__init__(f"EMA_{period}", period, enabled, timeframe)
         self.period = period
     
     def _calculate_impl(self, bar_history):
         """Calculate EMA value."""
-        df = pd.DataFrame(bar_history)
+        df = bars_to_frame(bar_history)
         series = df['close'].tail(self.period * 2)
         return series.ewm(span=self.period, adjust=False).mean().iloc[-1]
 
+    def compute_series(self, df, max_history=None):
+        """Vectorized EMA over the same tail window used live."""
+        values = _tail_ema_series(df['close'].to_numpy(dtype=float), self.period, max_history)
+        values[:self.min_bars_required - 1] = np.nan
+        self._set_last_value(values, max_history)
+        return values
+
 
 class RSIIndicator(BarIndicator):
     """Relative Strength Index indicator."""
+
+    PARAMETERS = ('length',)
     
-    def __init__(self, length=14, enabled=True):
-        super().__init__(f"RSI_{length}", length + 1, enabled)
+    def __init__(self, length=14, enabled=True, timeframe=1):
+        super().__init__(f"RSI_{length}", length + 1, enabled, timeframe)
         self.length = length
     
     def _calculate_impl(self, bar_history):
         """Calculate RSI value."""
-        df = pd.DataFrame(bar_history)
+        df = bars_to_frame(bar_history)
         series = df['close'].tail(self.length * 2)
         delta = series.diff()
         gain = (delta.where(delta > 0, 0)).rolling(window=self.length).mean()
@@ -195,9 +326,22 @@ class RSIIndicator(BarIndicator):
         rsi = 100 - (100 / (1 + rs))
         return rsi.iloc[-1]
 
+    def compute_series(self, df, max_history=None):
+        """Vectorized RSI; the live tail window always covers the last `length` deltas."""
+        delta = df['close'].diff()
+        gain = (delta.where(delta > 0, 0)).rolling(window=self.length).mean()
+        loss = (-delta.where(delta < 0, 0)).rolling(window=self.length).mean()
+        rs = (gain / loss).replace([np.inf, -np.inf], 0)
+        values = (100 - (100 / (1 + rs))).to_numpy(dtype=float, copy=True)
+        values[:self.min_bars_required - 1] = np.nan
+        self._set_last_value(values, max_history)
+        return values
+
 
 class VWAPIndicator(TickIndicator):
     """Volume Weighted Average Price indicator for real-time calculation."""
+
+    STATE_FIELDS = TickIndicator.STATE_FIELDS + ('daily_sum_tpv', 'daily_sum_volume', 'last_vwap_day')
     
     def __init__(self, enabled=True):
         super().__init__("VWAP", enabled)
@@ -205,11 +349,11 @@ class VWAPIndicator(TickIndicator):
         self.daily_sum_volume = 0.0
         self.last_vwap_day = None
     
-    def _calculate_impl(self, tick_data):
-        """Calculate VWAP value."""
-        current_price = tick_data['price']
-        current_volume = tick_data['volume']
-        current_timestamp = tick_data['timestamp']
+    def _calculate_impl(self, tick):
+        """Calculate VWAP value from a Tick record."""
+        current_price = tick.price
+        current_volume = tick.volume
+        current_timestamp = tick.timestamp
         
         # Reset daily values if it's a new day
         current_day = current_timestamp.date()
@@ -226,6 +370,24 @@ class VWAPIndicator(TickIndicator):
         if self.daily_sum_volume > 0:
             return self.daily_sum_tpv / self.daily_sum_volume
         return np.nan
+
+    def seed_from_bars(self, df):
+        """
+        Rebuilds the day sums from completed bars (oldest first), using the typical
+        price of each bar of the last day as its traded price.
+        """
+        self.reset_state()
+        if df.empty:
+            return self.value
+        days = np.array([ts.date() for ts in df['timestamp']])
+        today = days[-1] == days
+        typical_price = (df['high'].to_numpy(dtype=float) + df['low'].to_numpy(dtype=float) + df['close'].to_numpy(dtype=float)) / 3
+        volume = df['volume'].to_numpy(dtype=float)
+        self.daily_sum_tpv = float(np.sum(typical_price[today] * volume[today]))
+        self.daily_sum_volume = float(np.sum(volume[today]))
+        self.last_vwap_day = days[-1]
+        self.value = self.daily_sum_tpv / self.daily_sum_volume if self.daily_sum_volume > 0 else np.nan
+        return self.value
     
     def reset_state(self):
         """Reset VWAP state."""
@@ -237,14 +399,16 @@ class VWAPIndicator(TickIndicator):
 
 class ATRIndicator(BarIndicator):
     """Average True Range indicator."""
+
+    PARAMETERS = ('length',)
     
-    def __init__(self, length=14, enabled=True):
-        super().__init__(f"ATR_{length}", length + 1, enabled)
+    def __init__(self, length=14, enabled=True, timeframe=1):
+        super().__init__(f"ATR_{length}", length + 1, enabled, timeframe)
         self.length = length
     
     def _calculate_impl(self, bar_history):
         """Calculate ATR value."""
-        df = pd.DataFrame(bar_history)
+        df = bars_to_frame(bar_history)
         high_low = df['high'] - df['low']
         high_close = np.abs(df['high'] - df['close'].shift())
         low_close = np.abs(df['low'] - df['close'].shift())
@@ -253,16 +417,33 @@ class ATRIndicator(BarIndicator):
         atr = true_range.rolling(window=self.length).mean().iloc[-1]
         return atr
 
+    def compute_series(self, df, max_history=None):
+        """Vectorized rolling-mean ATR."""
+        true_range = _true_range(df['high'].to_numpy(dtype=float), df['low'].to_numpy(dtype=float),
+                                 df['close'].to_numpy(dtype=float))
+        values = pd.Series(true_range).rolling(window=self.length).mean().to_numpy().copy()
+        self._set_last_value(values, max_history)
+        return values
+
 
 class HTFTrendIndicator(BarIndicator):
-    """Higher Timeframe Trend indicator (using EMA)."""
+    """Higher Timeframe Trend indicator (EMA of the closes of `timeframe`-minute bars)."""
+
+    PARAMETERS = ('period',)
     
-    def __init__(self, period=20, enabled=True):
-        super().__init__(f"HTF_Trend_{period}", period, enabled)
+    def __init__(self, period=20, enabled=True, timeframe=1):
+        super().__init__(f"HTF_Trend_{period}", period, enabled, timeframe)
         self.period = period
     
     def _calculate_impl(self, bar_history):
         """Calculate HTF trend value."""
-        df = pd.DataFrame(bar_history)
+        df = bars_to_frame(bar_history)
         series = df['close'].tail(self.period * 2)
-        return series.ewm(span=self.period, adjust=False).mean().iloc[-1]
\ No newline at end of file
+        return series.ewm(span=self.period, adjust=False).mean().iloc[-1]
+
+    def compute_series(self, df, max_history=None):
+        """Vectorized EMA over the same tail window used live."""
+        values = _tail_ema_series(df['close'].to_numpy(dtype=float), self.period, max_history)
+        values[:self.min_bars_required - 1] = np.nan
+        self._set_last_value(values, max_history)
+        return values
\ No newline at end of file
@@ -2,56 +2,198 @@ import time
 import threading
 from tabulate import tabulate
 import pandas as pd
+import pytz
 import os
 # Import your classes
 from .log_utils import logger # Import pre-configured logger
 from .strategy import ModularIntradayStrategy
+from .strategy_params import StrategyParams
 from .websocket_stream import WebSocketStreamer
+from .tick_buffer import TickBuffer
+from .login import login
+from .warmup import fetch_candles, load_candles_csv
+from .checkpoint import StrategyCheckpointer, checkpoint_path_for, restore_strategy
+from .exchange_clock import ExchangeClock
 
 class LiveTradingBot:
     """
     Encapsulates the entire live trading logic.
     Can be instantiated and run from a GUI or a simple script.
     """
-    def __init__(self, instrument_token, strategy_params, exchange_type=1, feed_mode=2, log_ticks=False, symbol=None):
-        self.instrument_token = instrument_token
-        self.strategy_params = strategy_params
+    def __init__(self, instrument_token, strategy_params, exchange_type=1, feed_mode=2, log_ticks=False, symbol=None,
+                 streamer=None, record_ticks=True, warmup=True, warmup_csv=None,
+                 checkpoint_path=None, checkpoint_interval=5.0):
+        """
+        Args:
+            strategy_params (StrategyParams | dict): Strategy parameters; a dict is validated into StrategyParams.
+            streamer (WebSocketStreamer): Optional shared streamer. When given, the bot only
+                                          registers its token on it instead of opening its own
+                                          connection, and leaves the streamer running on stop().
+            record_ticks (bool): Keep the raw ticks and save them to CSV on stop(). Bots sharing
+                                 a token only need one of them to record.
+            warmup (bool): Seed the strategy with recent 1-minute candles before going live,
+                           so signals do not wait for live bars to accumulate.
+            warmup_csv (str): Optional local candle CSV used for the warm-up instead of the API.
+            checkpoint_path (str): State checkpoint file. A checkpoint from today is restored on
+                                   start. Defaults to data/checkpoints/<symbol>.ckpt.
+            checkpoint_interval (float): Seconds between state checkpoints; 0 or None disables them.
+        """
+        self.instrument_token = str(instrument_token)
+        self.strategy_params = StrategyParams.from_mapping(strategy_params)
         self.exchange_type = exchange_type
         self.feed_mode = feed_mode
         self.log_ticks = log_ticks
         self.symbol = str(symbol) if symbol else f"Token_{instrument_token}"  # Ensure symbol is always a string
         self.strategy = None
-        self.streamer = None
+        self.streamer = streamer
+        self._owns_streamer = streamer is None
         self._stop_event = threading.Event()
-        self.tick_data_buffer = [] # Buffer to store live tick data
+        self.record_ticks = record_ticks
+        self.warmup = warmup
+        self.warmup_csv = warmup_csv
+        # The strategy's price representation decides what the streamer delivers
+        self.integer_prices = self.strategy_params.integer_prices
+        self.checkpointer = None
+        if checkpoint_interval:
+            self.checkpointer = StrategyCheckpointer(checkpoint_path or checkpoint_path_for(self.symbol),
+                                                     interval=checkpoint_interval)
+
+        # CPU time spent in the strategy, for per-strategy cost accounting
+        self.cpu_time_ns = 0
+        self.tick_count = 0
+
+        # Ticks arrive on the WebSocket thread, bar closes on the clock thread
+        self._strategy_lock = threading.Lock()
+        self.exchange_clock = ExchangeClock(tz=pytz.timezone('Asia/Kolkata'))
+        self._clock_thread = None
+
+        # Buffer to store live tick data. Full chunks are spilled to disk in the background.
+        self.data_folder_path = os.path.join(os.path.dirname(__file__), "data")
+        session_tag = f"{self.symbol}_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}"
+        self.tick_data_buffer = TickBuffer(
+            spill_dir=os.path.join(self.data_folder_path, "tick_spill", session_tag),
+            integer_prices=self.integer_prices
+        )
 
     def _on_live_tick(self, timestamp, price, volume):
         """Wrapper callback to process live ticks and pass to strategy."""
-        self.tick_data_buffer.append({
-            'timestamp': timestamp,
-            'price': price,
-            'volume': volume
-        })
+        if self.record_ticks:
+            self.tick_data_buffer.append(timestamp, price, volume)
+        self.exchange_clock.observe(timestamp)
         if self.strategy:
-            self.strategy.on_tick(timestamp, price, volume)
+            with self._strategy_lock:
+                cpu_start = time.thread_time_ns()
+                self.strategy.on_tick(timestamp, price, volume)
+                self.cpu_time_ns += time.thread_time_ns() - cpu_start
+                self.tick_count += 1
+                if self.checkpointer:
+                    self.checkpointer.maybe_checkpoint(self.strategy)
 
-    def run(self):
-        """Sets up and runs the live trading strategy and status monitor."""
+    def on_clock(self):
+        """Lets the strategy close bars on the exchange clock."""
+        if self.strategy:
+            with self._strategy_lock:
+                cpu_start = time.thread_time_ns()
+                self.strategy.on_clock(self.exchange_clock.now())
+                self.cpu_time_ns += time.thread_time_ns() - cpu_start
+
+    def seconds_until_next_clock(self):
+        """Seconds until the strategy's next clock-driven bar close is due."""
+        grace_seconds = self.strategy.params.bar_close_grace_seconds if self.strategy else 0
+        return self.exchange_clock.seconds_until_next_close(grace_seconds)
+
+    def _clock_loop(self):
+        """Wakes up at every minute boundary (plus grace) to close the bar without waiting for a tick."""
+        while not self._stop_event.wait(self.seconds_until_next_clock()):
+            try:
+                self.on_clock()
+            except Exception as e:
+                logger.error(f"Clock-driven bar close failed: {e}")
+
+    def _on_backfill(self, bars):
+        """Callback for the bars the streamer fetched after a reconnect."""
+        if self.strategy:
+            with self._strategy_lock:
+                inserted = self.strategy.backfill_bars(bars)
+            logger.info(f"Backfilled {inserted} bars after reconnect | Symbol={self.symbol}")
+
+    def _warm_up(self):
+        """Seeds the strategy with recent candles from the local CSV or the historical API."""
+        started = time.perf_counter()
+        try:
+            if self.warmup_csv:
+                bars = load_candles_csv(self.warmup_csv, until=pd.Timestamp.now(tz=self.strategy.ist_tz))
+            else:
+                smart_api, _, _ = login()
+                bars = fetch_candles(smart_api, self.instrument_token, self.exchange_type) if smart_api else []
+            seeded = self.strategy.warm_up(bars)
+            logger.info(f"Warm-up seeded {seeded} bars in {time.perf_counter() - started:.2f}s | Symbol={self.symbol}")
+        except Exception as e:
+            logger.error(f"Warm-up failed, collecting bars live instead: {e}")
+
+    def _restore_checkpoint(self):
+        """Brings the strategy back to its last checkpointed state, if one exists for today."""
+        started = time.perf_counter()
+        try:
+            saved_at = restore_strategy(self.strategy, self.checkpointer.path)
+        except Exception as e:
+            logger.error(f"Checkpoint restore failed, starting fresh: {e}")
+            self.strategy = ModularIntradayStrategy(params=self.strategy_params)
+            return
+        if saved_at:
+            logger.info(
+                f"Restored state from checkpoint of {saved_at.strftime('%H:%M:%S')} in "
+                f"{(time.perf_counter() - started) * 1000:.1f}ms | Symbol={self.symbol}, Position={self.strategy.position_size}"
+            )
+
+    def start(self, run_clock=True):
+        """
+        Creates the strategy and attaches it to the data stream without blocking.
+
+        Args:
+            run_clock (bool): Start a clock thread that closes bars at each minute boundary.
+                              A host driving on_clock() for many bots passes False.
+        """
         logger.info("--- Live Trading Bot Initializing ---")
 
         self.strategy = ModularIntradayStrategy(params=self.strategy_params)
         logger.info(f"Strategy instance created with parameters: {self.strategy_params}")
 
-        logger.info("Setting up WebSocket data streamer...")
-        self.streamer = WebSocketStreamer(
-            instrument_keys=[self.instrument_token],
-            on_tick_callback=self._on_live_tick, # Use the wrapper callback
-            exchange_type=self.exchange_type,
-            feed_mode=self.feed_mode,
-            log_ticks=self.log_ticks
-        )
+        if self.checkpointer:
+            self._restore_checkpoint()
+        # After a restore the warm-up only backfills the bars missed while the bot was down
+        if self.warmup:
+            self._warm_up()
+
+        if self._owns_streamer:
+            logger.info("Setting up WebSocket data streamer...")
+            self.streamer = WebSocketStreamer(
+                instrument_keys=[self.instrument_token],
+                on_tick_callback=self._on_live_tick, # Use the wrapper callback
+                on_backfill_callback=self._on_backfill,
+                exchange_type=self.exchange_type,
+                feed_mode=self.feed_mode,
+                log_ticks=self.log_ticks,
+                integer_prices=self.integer_prices
+            )
+            self.streamer.connect()
+        else:
+            logger.info("Registering on shared WebSocket data streamer...")
+            if self.streamer.integer_prices != self.integer_prices:
+                raise ValueError(f"Bot {self.symbol} and the shared streamer disagree on integer_prices")
+            self.streamer.add_instrument(self.instrument_token, self._on_live_tick,
+                                         exchange_type=self.exchange_type, on_backfill=self._on_backfill)
+            if not self.streamer.is_running:
+                self.streamer.connect()
+
+        if run_clock:
+            self._clock_thread = threading.Thread(target=self._clock_loop, daemon=True)
+            self._clock_thread.start()
+
+    def run(self):
+        """Sets up and runs the live trading strategy and status monitor."""
+        self.start()
 
-        self.streamer.connect()
         print(f"\n*** Bot is now live for token {self.instrument_token}. ***\n")
         print("*** Check live_trader.log for detailed status updates. ***\n")
 
@@ -73,6 +215,28 @@ class LiveTradingBot:
         if not self.strategy:
             return
 
+        # A shared streamer reports its own feed statistics
+        if self._owns_streamer and self.streamer and self.streamer.reconnect_count > 0:
+            stats = self.streamer.get_connection_stats()
+            last_recovery = f"{stats['last_recovery_seconds']:.1f}s" if stats['last_recovery_seconds'] is not None else "pending"
+            logger.info(
+                f"FEED: Reconnects={stats['reconnect_count']}, Last recovery={last_recovery}, "
+                f"Backfilled bars={stats['backfilled_bars']} | Symbol={self.symbol}"
+            )
+
+        # Running P&L figures; read from the strategy's metrics, nothing is recomputed here
+        metrics = self.strategy.metrics
+        if metrics.total_trades > 0 or self.strategy.position_size > 0:
+            figures = metrics.summary()
+            tracker = self.strategy.equity_tracker
+            mae, mfe = metrics.excursion()
+            logger.info(
+                f"P&L: Trades={figures['total_trades']}, PnL=₹{figures['total_pnl']:,.2f}, "
+                f"Win Rate={figures['win_rate']:.1f}%, Profit Factor={figures['profit_factor']:.2f}, "
+                f"Drawdown={tracker.current_drawdown:.2f}% (max {tracker.max_drawdown:.2f}%), "
+                f"Exposure={figures['exposure']:.1f}%, Open MAE/MFE={mae:.2f}/{mfe:.2f} | Symbol={self.symbol}"
+            )
+
         # Get bar history from indicator manager
         bar_history = self.strategy.indicator_manager.get_bar_history()
         if not bar_history:
@@ -82,7 +246,7 @@ class LiveTradingBot:
         min_bars_needed = self.strategy.min_bars_for_signals
 
         if self.strategy.position_size > 0:
-            logger.info(f"STATUS: In Position | Symbol={self.symbol}, Size={self.strategy.position_size}, Entry={self.strategy.position_entry_price:.2f}, Current SL={self.strategy.get_effective_stop_price():.2f}")
+            logger.info(f"STATUS: In Position | Symbol={self.symbol}, Size={self.strategy.position_size}, Entry={self.strategy.price_in_rupees(self.strategy.position_entry_price):.2f}, Current SL={self.strategy.price_in_rupees(self.strategy.get_effective_stop_price()):.2f}")
         elif bars_collected < min_bars_needed:
             status_msg = (
                 f"STATUS: Collecting initial bar data... "
@@ -121,8 +285,12 @@ class LiveTradingBot:
         self._stop_event.set()
 
         if self.streamer:
-            logger.info("Stopping data stream...")
-            self.streamer.stop()
+            if self._owns_streamer:
+                logger.info("Stopping data stream...")
+                self.streamer.stop()
+            else:
+                logger.info("Unregistering from shared data stream...")
+                self.streamer.remove_instrument(self.instrument_token, self._on_live_tick, self._on_backfill)
 
         if self.strategy:
             logger.info("--- Generating Final Trade Report ---")
@@ -136,7 +304,8 @@ class LiveTradingBot:
                     "Total Return": f"{results['total_return']:.2f}%", "Final Equity": f"₹{results['final_equity']:,.2f}",
                     "Total PnL": f"₹{results['total_pnl']:,.2f}", "Total Trades": results['total_trades'],
                     "Win Rate": f"{results['win_rate']:.2f}%", "Profit Factor": f"{results['profit_factor']:.2f}",
-                    "Max Drawdown": f"{results['max_drawdown']:.2f}%"
+                    "Max Drawdown": f"{results['max_drawdown']:.2f}%", "Sharpe (per trade)": f"{results['sharpe']:.2f}",
+                    "Sortino (per trade)": f"{results['sortino']:.2f}", "Exposure": f"{results['exposure']:.1f}%"
                 }
                 for key, value in summary.items():
                     print(f"{key:<20}: {value}")
@@ -145,19 +314,22 @@ class LiveTradingBot:
                 if trades_df is not None and isinstance(trades_df, pd.DataFrame) and not trades_df.empty:
                     print("\n--- All Trades ---")
                     print(tabulate(trades_df, headers='keys', tablefmt='psql'))
-        if self.tick_data_buffer:
+
+            if self.checkpointer:
+                self.checkpointer.checkpoint(self.strategy)
+                self.checkpointer.close()
+                logger.info(f"Final state checkpoint written to {self.checkpointer.path}")
+        if len(self.tick_data_buffer) > 0:
             try:
-                # Construct the path to the 'data' folder within the 'smartapi' directory
-                script_dir = os.path.dirname(__file__)
-                data_folder_path = os.path.join(script_dir, "data")
-                os.makedirs(data_folder_path, exist_ok=True) # Create the directory if it doesn't exist
-
-                df_ticks = pd.DataFrame(self.tick_data_buffer)
-                csv_filename = os.path.join(data_folder_path, f"live_ticks_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv")
-                df_ticks.to_csv(csv_filename, index=False)
-                logger.info(f"Raw tick data saved to {csv_filename}")
+                os.makedirs(self.data_folder_path, exist_ok=True) # Create the directory if it doesn't exist
+
+                csv_filename = os.path.join(self.data_folder_path, f"live_ticks_{self.symbol}_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv")
+                tick_count = self.tick_data_buffer.export_csv(csv_filename)
+                self.tick_data_buffer.close(cleanup=True)
+                logger.info(f"Raw tick data ({tick_count} ticks) saved to {csv_filename}")
             except Exception as e:
-                logger.error(f"Failed to save raw tick data to CSV: {e}")
+                self.tick_data_buffer.close(cleanup=False)
+                logger.error(f"Failed to save raw tick data to CSV: {e}. Spilled chunks kept in {self.tick_data_buffer.spill_dir}")
         logger.info("--- Bot has been shut down gracefully. ---")
 
     def pause_stream(self):
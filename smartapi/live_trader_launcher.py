@@ -8,7 +8,7 @@ from datetime import datetime, timedelta
 
 # Import the refactored bot class and the strategy class to get defaults
 from .live_trader import LiveTradingBot
-from .strategy import ModularIntradayStrategy
+from .strategy_params import StrategyParams
 
 class LiveTraderGUI:
     """
@@ -20,8 +20,8 @@ class LiveTraderGUI:
         self.bot_thread = None
         self.bot_instance = None
 
-        # Get default parameters from the strategy class itself
-        default_strategy = ModularIntradayStrategy()
+        # Default parameters of the strategy
+        defaults = StrategyParams()
 
         # Cache file path for symbol-token mapping
         self.cache_file = "smartapi/symbol_cache.json"
@@ -38,35 +38,35 @@ class LiveTraderGUI:
         self.log_ticks = tk.BooleanVar(value=False) # Default to not logging ticks
 
         # Indicator toggles
-        self.use_supertrend = tk.BooleanVar(value=default_strategy.use_supertrend)
-        self.use_ema_crossover = tk.BooleanVar(value=default_strategy.use_ema_crossover)
-        self.use_rsi_filter = tk.BooleanVar(value=default_strategy.use_rsi_filter)
-        self.use_vwap = tk.BooleanVar(value=default_strategy.use_vwap)
+        self.use_supertrend = tk.BooleanVar(value=defaults.use_supertrend)
+        self.use_ema_crossover = tk.BooleanVar(value=defaults.use_ema_crossover)
+        self.use_rsi_filter = tk.BooleanVar(value=defaults.use_rsi_filter)
+        self.use_vwap = tk.BooleanVar(value=defaults.use_vwap)
 
         # Indicator parameters
-        self.atr_len = tk.IntVar(value=default_strategy.atr_len)
-        self.atr_mult = tk.DoubleVar(value=default_strategy.atr_mult)
-        self.fast_ema = tk.IntVar(value=default_strategy.fast_ema)
-        self.slow_ema = tk.IntVar(value=default_strategy.slow_ema)
-        self.rsi_length = tk.IntVar(value=default_strategy.rsi_length)
-        self.rsi_overbought = tk.IntVar(value=default_strategy.rsi_overbought)
-        self.rsi_oversold = tk.IntVar(value=default_strategy.rsi_oversold)
+        self.atr_len = tk.IntVar(value=defaults.atr_len)
+        self.atr_mult = tk.DoubleVar(value=defaults.atr_mult)
+        self.fast_ema = tk.IntVar(value=defaults.fast_ema)
+        self.slow_ema = tk.IntVar(value=defaults.slow_ema)
+        self.rsi_length = tk.IntVar(value=defaults.rsi_length)
+        self.rsi_overbought = tk.IntVar(value=defaults.rsi_overbought)
+        self.rsi_oversold = tk.IntVar(value=defaults.rsi_oversold)
 
         # Stop loss and targets
-        self.base_sl_points = tk.IntVar(value=default_strategy.base_sl_points)
-        self.tp1_points = tk.IntVar(value=default_strategy.tp1_points)
-        self.tp2_points = tk.IntVar(value=default_strategy.tp2_points)
-        self.tp3_points = tk.IntVar(value=default_strategy.tp3_points)
+        self.base_sl_points = tk.IntVar(value=defaults.base_sl_points)
+        self.tp1_points = tk.IntVar(value=defaults.tp1_points)
+        self.tp2_points = tk.IntVar(value=defaults.tp2_points)
+        self.tp3_points = tk.IntVar(value=defaults.tp3_points)
         
         # Trail Stop
-        self.use_trail_stop = tk.BooleanVar(value=default_strategy.use_trail_stop)
-        self.trail_activation_points = tk.IntVar(value=default_strategy.trail_activation_points)
-        self.trail_distance_points = tk.IntVar(value=default_strategy.trail_distance_points)
+        self.use_trail_stop = tk.BooleanVar(value=defaults.use_trail_stop)
+        self.trail_activation_points = tk.IntVar(value=defaults.trail_activation_points)
+        self.trail_distance_points = tk.IntVar(value=defaults.trail_distance_points)
 
         # Other parameters
-        self.initial_capital = tk.IntVar(value=default_strategy.initial_capital)
-        self.risk_per_trade_percent = tk.DoubleVar(value=default_strategy.risk_per_trade_percent)
-        self.exit_before_close = tk.IntVar(value=default_strategy.exit_before_close)
+        self.initial_capital = tk.IntVar(value=defaults.initial_capital)
+        self.risk_per_trade_percent = tk.DoubleVar(value=defaults.risk_per_trade_percent)
+        self.exit_before_close = tk.IntVar(value=defaults.exit_before_close)
 
         self.create_widgets()
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
@@ -260,22 +260,8 @@ class LiveTraderGUI:
         self.status_button.pack(side="left", padx=5)
 
     def get_params_from_gui(self):
-        """Collects all parameters from the GUI fields into a dictionary."""
-        return {
-            "use_supertrend": self.use_supertrend.get(), "use_ema_crossover": self.use_ema_crossover.get(),
-            "use_rsi_filter": self.use_rsi_filter.get(), "use_vwap": self.use_vwap.get(),
-            "atr_len": self.atr_len.get(), "atr_mult": self.atr_mult.get(),
-            "fast_ema": self.fast_ema.get(), "slow_ema": self.slow_ema.get(),
-            "rsi_length": self.rsi_length.get(), "rsi_overbought": self.rsi_overbought.get(),
-            "rsi_oversold": self.rsi_oversold.get(), "base_sl_points": self.base_sl_points.get(),
-            "tp1_points": self.tp1_points.get(), "tp2_points": self.tp2_points.get(),
-            "tp3_points": self.tp3_points.get(), "use_trail_stop": self.use_trail_stop.get(),
-            "trail_activation_points": self.trail_activation_points.get(),
-            "trail_distance_points": self.trail_distance_points.get(),
-            "initial_capital": self.initial_capital.get(),
-            "risk_per_trade_percent": self.risk_per_trade_percent.get(),
-            "exit_before_close": self.exit_before_close.get(),
-        }
+        """Collects all parameters from the GUI fields into StrategyParams."""
+        return StrategyParams.from_variables(self)
 
     def start_trading(self):
         """Starts the live trading bot in a new thread."""
@@ -0,0 +1,157 @@
+import math
+
+
+class StreamingMetrics:
+    """
+    Performance figures of a strategy, kept up to date as it trades.
+    Every closed trade (each partial exit counts as one, as in the trades list) updates
+    the win rate, profit factor, equity drawdown and the running mean and variances of
+    the trade returns behind Sharpe and Sortino, and every tick updates the time spent
+    in a position and the open position's excursion. Each update is O(1), so live
+    status can read the figures at any time and the end-of-run report is a lookup.
+    Trade returns are P&L over the equity the trade was taken with; Sharpe and Sortino
+    are per trade, not annualized. Excursions are in rupees per unit.
+    """
+    # Attributes saved by get_state()
+    STATE_ATTRIBUTES = (
+        'total_trades', 'winning_trades', 'gross_profit', 'gross_loss', 'equity', 'peak_equity',
+        'max_drawdown', 'return_count', 'return_mean', 'return_m2', 'downside_sq_sum',
+        'first_seen', 'last_seen', 'exposure_seconds', 'in_position', 'position_low', 'position_high',
+        'position_entry_price', 'mae_sum', 'mfe_sum', 'max_mae', 'max_mfe',
+    )
+
+    def __init__(self, initial_capital, price_scale=1):
+        """
+        Args:
+            initial_capital (float): Starting equity (rupees).
+            price_scale (float): Rupees per unit of the prices passed in (0.01 for integer paise).
+        """
+        self.initial_capital = initial_capital
+        self.price_scale = price_scale
+        self.reset()
+
+    def reset(self):
+        self.total_trades = 0
+        self.winning_trades = 0
+        self.gross_profit = 0.0
+        self.gross_loss = 0.0
+        self.equity = self.initial_capital
+        self.peak_equity = self.initial_capital
+        self.max_drawdown = 0.0
+        # Welford running mean / sum of squared deviations of the trade returns
+        self.return_count = 0
+        self.return_mean = 0.0
+        self.return_m2 = 0.0
+        self.downside_sq_sum = 0.0
+        # Epoch seconds of the first and latest tick, and the time spent in a position
+        self.first_seen = None
+        self.last_seen = None
+        self.exposure_seconds = 0.0
+        # Lowest and highest price since the open position was entered
+        self.in_position = False
+        self.position_low = 0
+        self.position_high = 0
+        self.position_entry_price = 0
+        self.mae_sum = 0.0
+        self.mfe_sum = 0.0
+        self.max_mae = 0.0
+        self.max_mfe = 0.0
+
+    def on_tick(self, now, price):
+        """Account a tick at epoch seconds now; the position was held since the previous tick."""
+        if self.first_seen is None:
+            self.first_seen = now
+        elif self.in_position:
+            self.exposure_seconds += now - self.last_seen
+            if price < self.position_low:
+                self.position_low = price
+            elif price > self.position_high:
+                self.position_high = price
+        self.last_seen = now
+
+    def on_entry(self, price):
+        """A position was opened at price."""
+        self.in_position = True
+        self.position_entry_price = price
+        self.position_low = price
+        self.position_high = price
+
+    def excursion(self):
+        """(MAE, MFE) of the open position so far, in rupees per unit."""
+        if not self.in_position:
+            return 0.0, 0.0
+        return ((self.position_entry_price - self.position_low) * self.price_scale,
+                (self.position_high - self.position_entry_price) * self.price_scale)
+
+    def on_trade(self, pnl, position_closed=True):
+        """A (partial) exit with the given P&L; position_closed when nothing is left open."""
+        equity_before = self.equity
+        self.total_trades += 1
+        if pnl > 0:
+            self.winning_trades += 1
+            self.gross_profit += pnl
+        elif pnl < 0:
+            self.gross_loss -= pnl
+
+        self.equity += pnl
+        if self.equity > self.peak_equity:
+            self.peak_equity = self.equity
+        elif self.peak_equity > 0:
+            drawdown = (self.peak_equity - self.equity) / self.peak_equity * 100
+            if drawdown > self.max_drawdown:
+                self.max_drawdown = drawdown
+
+        trade_return = pnl / equity_before if equity_before else 0.0
+        self.return_count += 1
+        delta = trade_return - self.return_mean
+        self.return_mean += delta / self.return_count
+        self.return_m2 += delta * (trade_return - self.return_mean)
+        if trade_return < 0:
+            self.downside_sq_sum += trade_return * trade_return
+
+        mae, mfe = self.excursion()
+        self.mae_sum += mae
+        self.mfe_sum += mfe
+        if mae > self.max_mae:
+            self.max_mae = mae
+        if mfe > self.max_mfe:
+            self.max_mfe = mfe
+        if position_closed:
+            self.in_position = False
+
+    @property
+    def current_drawdown(self):
+        """Drawdown of the equity from its peak (%)."""
+        return (self.peak_equity - self.equity) / self.peak_equity * 100 if self.peak_equity > 0 else 0.0
+
+    def summary(self):
+        """The figures as a dict (see generate_results)."""
+        total = self.total_trades
+        std = math.sqrt(self.return_m2 / (self.return_count - 1)) if self.return_count > 1 else 0.0
+        downside = math.sqrt(self.downside_sq_sum / self.return_count) if self.return_count else 0.0
+        elapsed = self.last_seen - self.first_seen if self.first_seen is not None else 0.0
+        return {
+            'total_trades': total,
+            'win_rate': self.winning_trades / total * 100 if total > 0 else 0,
+            'total_pnl': self.gross_profit - self.gross_loss,
+            'profit_factor': self.gross_profit / self.gross_loss if self.gross_loss > 0 else float('inf'),
+            'max_drawdown': self.max_drawdown,
+            'current_drawdown': self.current_drawdown,
+            'total_return': (self.equity - self.initial_capital) / self.initial_capital * 100,
+            'sharpe': self.return_mean / std if std > 0 else 0.0,
+            'sortino': self.return_mean / downside if downside > 0 else 0.0,
+            'exposure_seconds': self.exposure_seconds,
+            'exposure': self.exposure_seconds / elapsed * 100 if elapsed > 0 else 0.0,
+            'avg_mae': self.mae_sum / total if total else 0.0,
+            'avg_mfe': self.mfe_sum / total if total else 0.0,
+            'max_mae': self.max_mae,
+            'max_mfe': self.max_mfe,
+        }
+
+    def get_state(self):
+        return {name: getattr(self, name) for name in self.STATE_ATTRIBUTES}
+
+    def set_state(self, state):
+        for name in self.STATE_ATTRIBUTES:
+            if name in state:
+                setattr(self, name, state[name])
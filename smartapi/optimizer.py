@@ -0,0 +1,217 @@
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from tabulate import tabulate
+from .log_utils import logger
+from .strategy_params import StrategyParams
+
+# Score of a candidate by a metric of its generate_results(); higher is better
+METRICS = {
+    'profit_factor': lambda results: results['profit_factor'],
+    'return_over_drawdown': lambda results: (results['total_return'] / results['max_drawdown']
+                                             if results['max_drawdown'] > 0 else float('inf')),
+    'total_return': lambda results: results['total_return'],
+    'total_pnl': lambda results: results['total_pnl'],
+    'win_rate': lambda results: results['win_rate'],
+}
+
+SUMMARY_FIELDS = ('total_trades', 'win_rate', 'total_pnl', 'total_return', 'max_drawdown', 'profit_factor')
+
+
+def expand_grid(grid, base_params=None):
+    """
+    StrategyParams for every combination of a parameter grid.
+
+    Args:
+        grid (dict): Parameter name -> list of values to try.
+        base_params (StrategyParams | dict): Values of the parameters not in the grid.
+    """
+    base = StrategyParams.from_mapping(base_params)
+    names = list(grid)
+    return [base.replace(**dict(zip(names, values))) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def score_results(results, metric, min_trades=1):
+    """Score of one backtest by metric; -inf without results or with fewer than min_trades trades."""
+    if "error" in results or results['total_trades'] < min_trades:
+        return float('-inf')
+    score = METRICS[metric](results)
+    return float('-inf') if pd.isna(score) else float(score)
+
+
+# Bars of the optimized data file, loaded once per worker process
+_worker_bars = None
+
+
+def _init_worker(bars):
+    global _worker_bars
+    _worker_bars = bars
+    # Strategies print every entry and exit; keep the workers quiet
+    sys.stdout = open(os.devnull, 'w')
+
+
+def trading_day_starts(bars):
+    """Position of the first bar of every trading day in bars, plus len(bars) at the end."""
+    days = bars.index.normalize()
+    return np.append(np.flatnonzero(np.append(True, days[1:] != days[:-1])), len(bars))
+
+
+def _backtest_slice(params, start, end, warmup_bars=0):
+    """
+    Backtest of params on bars [start, end) of the worker's data. With warmup_bars, the
+    strategy is first seeded with up to that many bars before start, so its indicators
+    are ready on the first bar of the slice. Returns generate_results().
+    """
+    from .backtest import BacktestEngine
+    warmup = _worker_bars.iloc[max(0, start - warmup_bars):start] if warmup_bars else None
+    return BacktestEngine(params).run_bars(_worker_bars.iloc[start:end], warmup)
+
+
+def _evaluate(params, end, start=0, warmup_bars=0):
+    """Backtest of params on bars [start, end) of the worker's data; returns the result summary."""
+    results = _backtest_slice(params, start, end, warmup_bars)
+    if "error" in results:
+        return {"error": results["error"]}
+    return {field: results[field] for field in SUMMARY_FIELDS}
+
+
+class SuccessiveHalvingOptimizer:
+    """
+    Parameter search by successive halving.
+    All candidates are backtested on the first min_days trading days of the data; only
+    the best keep_fraction by the chosen metric go on to a slice growth times as long,
+    and so on until the survivors are evaluated on the whole data. Bad configurations
+    are dropped after a short backtest instead of costing a full one. Candidates run in
+    parallel on a process pool; each worker loads the bars once and keeps its own
+    indicator cache, so indicator series repeat across candidates at no cost.
+    """
+    def __init__(self, bars, candidates, metric='profit_factor', min_days=5, keep_fraction=0.5,
+                 growth=2, min_trades=1, max_workers=None):
+        """
+        Args:
+            bars (pd.DataFrame): 1-minute bars (BacktestEngine.load_bars), oldest first.
+            candidates (list): StrategyParams (or dicts) to choose from, e.g. expand_grid(...).
+            metric (str): Key of METRICS the candidates are ranked by.
+            min_days (int): Trading days of the first slice.
+            keep_fraction (float): Share of the candidates kept after each slice.
+            growth (float): Factor by which the slice grows from one round to the next.
+            min_trades (int): Candidates with fewer trades on a slice score -inf there.
+            max_workers (int): Worker processes; defaults to the CPU count.
+        """
+        if metric not in METRICS:
+            raise ValueError(f"metric must be one of {sorted(METRICS)}, got {metric!r}")
+        if not 0 < keep_fraction < 1:
+            raise ValueError(f"keep_fraction must be between 0 and 1, got {keep_fraction}")
+        if growth <= 1 or min_days < 1:
+            raise ValueError("growth must be above 1 and min_days at least 1")
+        self.bars = bars
+        self.candidates = list(dict.fromkeys(StrategyParams.from_mapping(c) for c in candidates))
+        if not self.candidates:
+            raise ValueError("No candidates to optimize")
+        for candidate in self.candidates:
+            if candidate.bar_type != 'time':
+                raise ValueError("The optimizer replays 1-minute bars; activity-bar candidates need tick data")
+        self.metric = metric
+        self.min_days = min_days
+        self.keep_fraction = keep_fraction
+        self.growth = growth
+        self.min_trades = min_trades
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.rounds = []
+        self.bar_evaluations = 0
+
+    @classmethod
+    def from_file(cls, data_file, candidates, data_type='csv', **kwargs):
+        """Optimizer over the bars of a CSV or price_ticks.log file."""
+        from .backtest import BacktestEngine
+        return cls(BacktestEngine().load_bars(data_file, data_type), candidates, **kwargs)
+
+    def slice_ends(self):
+        """Number of bars in each round's slice: growing whole trading days, the last one all bars."""
+        day_ends = trading_day_starts(self.bars)[1:]
+        ends = []
+        n_days = self.min_days
+        while n_days < len(day_ends):
+            ends.append(int(day_ends[n_days - 1]))
+            n_days = int(math.ceil(n_days * self.growth))
+        ends.append(len(self.bars))
+        return ends
+
+    def _evaluate_all(self, pool, candidates, end):
+        summaries = list(pool.map(_evaluate, candidates, [end] * len(candidates)))
+        self.bar_evaluations += end * len(candidates)
+        return [{'params': params, 'score': score_results(summary, self.metric, self.min_trades), **summary}
+                for params, summary in zip(candidates, summaries)]
+
+    def run(self):
+        """
+        Runs the search. Returns the candidates evaluated on all bars, best first, as
+        dicts of params, score and the result summary (see SUMMARY_FIELDS).
+        """
+        self.rounds = []
+        self.bar_evaluations = 0
+        survivors = self.candidates
+        ends = self.slice_ends()
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                 initargs=(self.bars,)) as pool:
+            for index, end in enumerate(ends):
+                started = time.perf_counter()
+                ranked = sorted(self._evaluate_all(pool, survivors, end), key=lambda row: row['score'], reverse=True)
+                self.rounds.append(ranked)
+                logger.info(f"Round {index + 1}/{len(ends)}: {len(survivors)} candidates on {end} bars "
+                            f"in {time.perf_counter() - started:.1f}s, best {self.metric} {ranked[0]['score']:.3f}")
+                if index < len(ends) - 1:
+                    survivors = [row['params'] for row in ranked[:max(1, math.ceil(len(ranked) * self.keep_fraction))]]
+        return self.rounds[-1]
+
+    def grid_search(self):
+        """Every candidate on all bars (the brute-force baseline), best first."""
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                 initargs=(self.bars,)) as pool:
+            return sorted(self._evaluate_all(pool, self.candidates, len(self.bars)),
+                          key=lambda row: row['score'], reverse=True)
+
+    def print_leaderboard(self, rows, top=10):
+        """Prints the best rows with the parameters that differ between candidates."""
+        varying = [name for name in StrategyParams.field_names()
+                   if len({getattr(candidate, name) for candidate in self.candidates}) > 1]
+        table = [[getattr(row['params'], name) for name in varying]
+                 + [row['score']] + [row.get(field, '') for field in SUMMARY_FIELDS]
+                 for row in rows[:top]]
+        print(tabulate(table, headers=varying + [f"score ({self.metric})"] + list(SUMMARY_FIELDS), floatfmt=".2f", tablefmt="grid"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Successive-halving search over strategy parameters.")
+    parser.add_argument("data_file", help="CSV (or price_ticks.log) file with the bars to optimize on.")
+    parser.add_argument("grid", help='JSON file with the grid, e.g. {"fast_ema": [5, 9, 13], "slow_ema": [21, 34]}.')
+    parser.add_argument("--data-type", default='csv', choices=['csv', 'ticks'])
+    parser.add_argument("--metric", default='profit_factor', choices=sorted(METRICS))
+    parser.add_argument("--min-days", type=int, default=5)
+    parser.add_argument("--keep", type=float, default=0.5, help="Share of the candidates kept after each round.")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--grid-search", action='store_true', help="Evaluate every candidate on all data instead.")
+    args = parser.parse_args()
+
+    with open(args.grid, 'r') as f:
+        grid = json.load(f)
+    base_params = grid.pop('base', None)
+    optimizer = SuccessiveHalvingOptimizer.from_file(
+        args.data_file, expand_grid(grid, base_params), data_type=args.data_type, metric=args.metric,
+        min_days=args.min_days, keep_fraction=args.keep, max_workers=args.workers
+    )
+    started = time.perf_counter()
+    rows = optimizer.grid_search() if args.grid_search else optimizer.run()
+    print(f"{len(optimizer.candidates)} candidates in {time.perf_counter() - started:.1f}s")
+    optimizer.print_leaderboard(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,6 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from tabulate import tabulate
-from datetime import datetime
 import pandas as pd
 import os
 
@@ -135,26 +134,9 @@ class StrategyParameterGUI:
 
     def run_backtest(self):
         from backtest import run_backtest_from_file
+        from strategy_params import StrategyParams
 
-        params = {
-            "use_supertrend": self.use_supertrend.get(),
-            "use_ema_crossover": self.use_ema_crossover.get(),
-            "use_rsi_filter": self.use_rsi_filter.get(),
-            "use_vwap": self.use_vwap.get(),
-            "atr_len": self.atr_len.get(),
-            "atr_mult": self.atr_mult.get(),
-            "fast_ema": self.fast_ema.get(),
-            "slow_ema": self.slow_ema.get(),
-            "rsi_length": self.rsi_length.get(),
-            "rsi_overbought": self.rsi_overbought.get(),
-            "rsi_oversold": self.rsi_oversold.get(),
-            "base_sl_points": self.base_sl_points.get(),
-            "tp1_points": self.tp1_points.get(),
-            "tp2_points": self.tp2_points.get(),
-            "tp3_points": self.tp3_points.get(),
-            "initial_capital": self.initial_capital.get(),
-            "exit_before_close": self.exit_before_close.get(),
-        }
+        params = StrategyParams.from_variables(self)
 
         # Check if user wants to use price_ticks.log
         if self.use_ticks_log.get():
@@ -165,7 +147,7 @@ class StrategyParameterGUI:
             
             try:
                 # Run backtest using price_ticks.log
-                results, saved_files = run_backtest_from_file(ticks_log_path, params, 'ticks')
+                results, run_id = run_backtest_from_file(ticks_log_path, params, 'ticks')
             except Exception as e:
                 messagebox.showerror("Error", f"Error running backtest on price_ticks.log: {e}")
                 return
@@ -186,42 +168,26 @@ class StrategyParameterGUI:
 
             try:
                 # Run backtest using the new engine
-                results, saved_files = run_backtest_from_file(csv_path, params, 'csv')
+                results, run_id = run_backtest_from_file(csv_path, params, 'csv')
             except Exception as e:
                 messagebox.showerror("Error", f"Error running backtest: {e}")
                 return
 
         # Show results
         if "error" not in results:
-            # --- Prepare directory for saving results ---
-            script_dir = os.path.dirname(__file__)
-            results_dir = os.path.join(script_dir, "results")
-            os.makedirs(results_dir, exist_ok=True) # Create 'results' folder if it doesn't exist
-
-            timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
-            
-            # 1. Save the detailed trades log
+            # The run (summary, trades and equity) was saved to the results database
             trades_df = results['trades_df']
-            if isinstance(trades_df, pd.DataFrame) and not trades_df.empty:
-                trades_filename = os.path.join(results_dir, f"trades_{timestamp_str}.csv")
-                trades_df.to_csv(trades_filename, index=False)
-                print(f"\n[SUCCESS] Detailed trades saved to: {trades_filename}")
-
-            # 2. Save the summary statistics
             stats = [
+                ["Run ID", run_id],
                 ["Total Trades", results['total_trades']],
                 ["Win Rate (%)", f"{results['win_rate']:.2f}"],
                 ["Total P&L", f"{results['total_pnl']:.2f}"],
                 ["Total Return (%)", f"{results['total_return']:.2f}"],
                 ["Max Drawdown (%)", f"{results['max_drawdown']:.2f}"],
                 ["Profit Factor", f"{results['profit_factor']:.2f}"],
-                ["Avg Win", f"{results['avg_win']:.2f}"],
-                ["Avg Loss", f"{results['avg_loss']:.2f}"],
+                ["Avg Win", f"{trades_df.loc[trades_df['pnl'] > 0, 'pnl'].mean():.2f}"],
+                ["Avg Loss", f"{trades_df.loc[trades_df['pnl'] < 0, 'pnl'].mean():.2f}"],
             ]
-            summary_filename = os.path.join(results_dir, f"summary_{timestamp_str}.csv")
-            summary_df = pd.DataFrame(stats, columns=pd.Index(["Metric", "Value"]))
-            summary_df.to_csv(summary_filename, index=False)
-            print(f"[SUCCESS] Summary statistics saved to: {summary_filename}")
             
             # --- Display results in GUI and Terminal ---
             msg = (
@@ -230,7 +196,7 @@ class StrategyParameterGUI:
                 f"Total P&L: {results['total_pnl']:.2f}\n"
                 f"Total Return: {results['total_return']:.2f}%\n"
                 f"Max Drawdown: {results['max_drawdown']:.2f}%\n\n"
-                f"Results saved to CSV files in the 'results' folder."
+                f"Results saved as run {run_id} in the results database."
             )
             messagebox.showinfo("Backtest Results", msg)
 
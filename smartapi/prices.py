@@ -0,0 +1,25 @@
+from .records import Bar
+
+# The exchange quotes prices as integer paise (1/100 rupee). In integer price mode they
+# are kept that way through bars, stops and targets and only turned into rupees for reporting.
+PAISE_PER_RUPEE = 100
+
+
+def to_paise(rupees):
+    """Nearest whole number of paise for a rupee amount."""
+    return int(round(rupees * PAISE_PER_RUPEE))
+
+
+def to_rupees(paise):
+    """Rupee value of an amount in paise."""
+    return paise / PAISE_PER_RUPEE
+
+
+def bars_to_paise(bars):
+    """Copies of bars (Bar records or dicts) as Bar records with the prices in paise."""
+    converted = []
+    for bar in bars:
+        bar = Bar.from_mapping(bar)
+        bar.open, bar.high, bar.low, bar.close = to_paise(bar.open), to_paise(bar.high), to_paise(bar.low), to_paise(bar.close)
+        converted.append(bar)
+    return converted
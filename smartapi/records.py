@@ -0,0 +1,145 @@
+from collections.abc import MutableMapping
+import pandas as pd
+
+BAR_FIELDS = ('open', 'high', 'low', 'close', 'volume', 'timestamp')
+# Values of the built-in indicators and entry signals, stored on a bar when calculated
+VALUE_FIELDS = (
+    'supertrend', 'vwap', 'ema_fast', 'ema_slow', 'rsi', 'htf_trend', 'atr',
+    'vwap_bull', 'ema_bull', 'htf_bullish',
+)
+_SLOT_FIELDS = frozenset(BAR_FIELDS + VALUE_FIELDS)
+_VALUE_FIELDS = frozenset(VALUE_FIELDS)
+
+
+class Tick:
+    """One traded price update."""
+    __slots__ = ('timestamp', 'price', 'volume')
+
+    def __init__(self, timestamp, price, volume=0):
+        self.timestamp = timestamp
+        self.price = price
+        self.volume = volume
+
+    def __repr__(self):
+        return f"Tick({self.timestamp}, {self.price}, {self.volume})"
+
+    def __eq__(self, other):
+        if not isinstance(other, Tick):
+            return NotImplemented
+        return (self.timestamp, self.price, self.volume) == (other.timestamp, other.price, other.volume)
+
+    def __getstate__(self):
+        return self.timestamp, self.price, self.volume
+
+    def __setstate__(self, state):
+        self.timestamp, self.price, self.volume = state
+
+
+class Bar(MutableMapping):
+    """
+    One OHLCV bar and the indicator values calculated on it.
+    The OHLCV fields and the built-in indicator values live in slots; values of other
+    indicators go to a small dict created on first use. Fields are read as attributes
+    (bar.close) on hot paths, and the dict interface (bar['close'], bar.get('rsi'),
+    'vwap' in bar, dict(bar), pd.DataFrame(bars)) keeps working for everything else.
+    An indicator value of None counts as not calculated.
+    """
+    __slots__ = BAR_FIELDS + VALUE_FIELDS + ('extra',)
+
+    def __init__(self, open=None, high=None, low=None, close=None, volume=0, timestamp=None):
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.timestamp = timestamp
+        self.supertrend = self.vwap = self.ema_fast = self.ema_slow = self.rsi = None
+        self.htf_trend = self.atr = self.vwap_bull = self.ema_bull = self.htf_bullish = None
+        self.extra = None
+
+    @classmethod
+    def from_mapping(cls, mapping):
+        """Bar with the fields and indicator values of a dict (or a copy of a Bar)."""
+        if isinstance(mapping, Bar):
+            return mapping.copy()
+        bar = cls()
+        for key, value in mapping.items():
+            bar[key] = value
+        return bar
+
+    def copy(self):
+        bar = Bar.__new__(Bar)
+        bar.open, bar.high, bar.low, bar.close = self.open, self.high, self.low, self.close
+        bar.volume, bar.timestamp = self.volume, self.timestamp
+        bar.supertrend, bar.vwap, bar.ema_fast, bar.ema_slow = self.supertrend, self.vwap, self.ema_fast, self.ema_slow
+        bar.rsi, bar.htf_trend, bar.atr = self.rsi, self.htf_trend, self.atr
+        bar.vwap_bull, bar.ema_bull, bar.htf_bullish = self.vwap_bull, self.ema_bull, self.htf_bullish
+        bar.extra = dict(self.extra) if self.extra else None
+        return bar
+
+    def __getitem__(self, key):
+        if key in _SLOT_FIELDS:
+            value = getattr(self, key)
+            if value is None and key in _VALUE_FIELDS:
+                raise KeyError(key)
+            return value
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key in _SLOT_FIELDS:
+            value = getattr(self, key)
+            return default if value is None and key in _VALUE_FIELDS else value
+        if self.extra is not None:
+            return self.extra.get(key, default)
+        return default
+
+    def __contains__(self, key):
+        if key in _SLOT_FIELDS:
+            return key not in _VALUE_FIELDS or getattr(self, key) is not None
+        return self.extra is not None and key in self.extra
+
+    def __setitem__(self, key, value):
+        if key in _SLOT_FIELDS:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key):
+        if key in _VALUE_FIELDS and getattr(self, key) is not None:
+            setattr(self, key, None)
+        elif key not in _SLOT_FIELDS and self.extra is not None and key in self.extra:
+            del self.extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self):
+        yield from BAR_FIELDS
+        for key in VALUE_FIELDS:
+            if getattr(self, key) is not None:
+                yield key
+        if self.extra:
+            yield from list(self.extra)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"Bar({dict(self.items())})"
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in Bar.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(Bar.__slots__, state):
+            setattr(self, name, value)
+
+
+def bars_to_frame(bars, columns=('open', 'high', 'low', 'close', 'volume', 'timestamp')):
+    """DataFrame of some fields of a list of bars (Bar records or dicts), oldest first."""
+    if bars and isinstance(bars[0], Bar):
+        return pd.DataFrame({column: [getattr(bar, column) for bar in bars] for column in columns})
+    return pd.DataFrame([{column: bar[column] for column in columns} for bar in bars], columns=list(columns))
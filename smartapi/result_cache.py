@@ -0,0 +1,168 @@
+import os
+import zlib
+import pickle
+import hashlib
+from .log_utils import logger
+
+# Bump when a change to the backtest changes results without touching the pipeline modules below
+BACKTEST_ENGINE_VERSION = 1
+RESULT_CACHE_DIR = os.path.join(os.path.dirname(__file__), "data", "result_cache")
+
+# Modules whose source decides the outcome of a backtest; editing any of them invalidates the cache
+PIPELINE_MODULES = (
+    'backtest', 'strategy', 'strategy_params', 'indicator_manager', 'indicators', 'timeframes',
+    'bar_builders', 'records', 'prices', 'session_calendar', 'indicator_cache', 'metrics',
+    'equity_tracker',
+)
+
+_file_hashes = {}
+_engine_fingerprint = None
+
+
+def file_fingerprint(path):
+    """
+    SHA-256 of a file's content. Hashes are remembered per (path, size, mtime), so an
+    unchanged data file is only read once per process.
+    """
+    stat = os.stat(path)
+    signature = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    digest = _file_hashes.get(signature)
+    if digest is None:
+        hasher = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                hasher.update(block)
+        digest = hasher.hexdigest()
+        _file_hashes[signature] = digest
+    return digest
+
+
+def engine_fingerprint():
+    """Hash of BACKTEST_ENGINE_VERSION and the source of the backtest pipeline modules."""
+    global _engine_fingerprint
+    if _engine_fingerprint is None:
+        hasher = hashlib.sha256(f"v{BACKTEST_ENGINE_VERSION}".encode('utf-8'))
+        package_dir = os.path.dirname(__file__)
+        for name in PIPELINE_MODULES:
+            with open(os.path.join(package_dir, f"{name}.py"), 'rb') as f:
+                hasher.update(f.read())
+        _engine_fingerprint = hasher.hexdigest()
+    return _engine_fingerprint
+
+
+class ResultCache:
+    """
+    Content-addressed, size-bounded disk cache of backtest results.
+    A result is keyed by the hash of the data file's content, the data type, the
+    canonical strategy parameters and the engine fingerprint, so a run is only reused
+    when nothing that could change its outcome has changed. Entries are zlib-compressed
+    pickles of the generate_results() output; the least recently used entries are
+    evicted once the cache grows beyond max_bytes.
+    """
+    def __init__(self, cache_dir=RESULT_CACHE_DIR, max_bytes=256 * 1024 * 1024):
+        """
+        Args:
+            cache_dir (str): Directory holding one file per cached result.
+            max_bytes (int): Total size of the cached files kept after each store.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, data_file, params, data_type):
+        """
+        Cache key of a backtest run.
+
+        Args:
+            data_file (str): Path of the CSV or ticks file.
+            params (StrategyParams): Strategy parameters.
+            data_type (str): 'csv' or 'ticks'.
+        """
+        parts = (file_fingerprint(data_file), data_type, params.cache_key(), engine_fingerprint())
+        return hashlib.sha256("|".join(parts).encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pkl.z")
+
+    def get(self, key):
+        """The cached results of key, or None. A hit marks the entry as recently used."""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                results = pickle.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            logger.warning(f"Dropping unreadable result cache entry {path}: {e}")
+            self._remove(path)
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return results
+
+    def put(self, key, results):
+        """Stores results under key (atomically) and evicts old entries beyond max_bytes."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(zlib.compress(pickle.dumps(results, protocol=pickle.HIGHEST_PROTOCOL), 6))
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"Failed to store backtest result in cache {path}: {e}")
+            self._remove(tmp_path)
+            return
+        self._evict()
+
+    def _entries(self):
+        """(mtime, size, path) of every cached result, oldest first."""
+        entries = []
+        try:
+            names = os.listdir(self.cache_dir)
+        except FileNotFoundError:
+            return entries
+        for name in names:
+            if not name.endswith(".pkl.z"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        entries.sort()
+        return entries
+
+    def _evict(self):
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def size_bytes(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def __len__(self):
+        return len(self._entries())
+
+    def clear(self):
+        """Removes every cached result."""
+        for _, _, path in self._entries():
+            self._remove(path)
@@ -0,0 +1,298 @@
+import os
+import math
+import json
+import sqlite3
+import argparse
+from dataclasses import fields
+from datetime import datetime
+import pandas as pd
+from tabulate import tabulate
+from .strategy_params import StrategyParams
+from .result_cache import file_fingerprint, engine_fingerprint
+
+RESULTS_DB_PATH = os.path.join(os.path.dirname(__file__), "results", "results.db")
+
+# Scalar figures of generate_results() stored as columns of the runs table
+METRIC_COLUMNS = (
+    'total_trades', 'win_rate', 'total_pnl', 'profit_factor', 'max_drawdown', 'closed_trade_drawdown',
+    'total_return', 'final_equity', 'sharpe', 'sortino', 'exposure', 'avg_mae', 'avg_mfe', 'max_mae',
+    'max_mfe', 'low_water_mark',
+)
+# Metrics runs are usually ranked or filtered by
+INDEXED_METRICS = ('profit_factor', 'total_return', 'max_drawdown', 'win_rate', 'sharpe', 'total_pnl')
+# Parameters sweeps usually vary; other parameters can be indexed with ResultStore.create_index()
+INDEXED_PARAMS = (
+    'base_sl_points', 'trail_activation_points', 'trail_distance_points', 'tp1_points', 'tp2_points',
+    'tp3_points', 'fast_ema', 'slow_ema', 'atr_len', 'atr_mult', 'rsi_length',
+)
+RUN_COLUMNS = ('id', 'created_at', 'label', 'data_source', 'data_type', 'data_hash', 'params_key', 'engine')
+
+TRADE_COLUMNS = ('entry_time', 'exit_time', 'entry_price', 'exit_price', 'quantity', 'pnl', 'reason', 'mae', 'mfe')
+EQUITY_COLUMNS = ('timestamp', 'equity')
+
+
+def _param_columns():
+    """(name, SQL type) of every StrategyParams field."""
+    return [(field.name, 'TEXT' if field.type is str else 'NUMERIC') for field in fields(StrategyParams)]
+
+
+def _sql_values(df, columns):
+    """Rows of df for executemany: timestamps as ISO text, missing values as NULL."""
+    frame = pd.DataFrame({column: df[column] if column in df else None for column in columns})
+    for column in columns:
+        if pd.api.types.is_datetime64_any_dtype(frame[column]) or frame[column].dtype == object:
+            frame[column] = frame[column].map(
+                lambda value: None if pd.isna(value) else value.isoformat() if hasattr(value, 'isoformat') else value
+            )
+    frame = frame.astype(object).where(frame.notna(), None)
+    return frame.itertuples(index=False, name=None)
+
+
+def load_trades(source, db_path=RESULTS_DB_PATH):
+    """Trades of a run id in the results database, or of a trades CSV file."""
+    if str(source).isdigit():
+        with ResultStore(db_path) as store:
+            return store.trades(int(source))
+    return pd.read_csv(source, parse_dates=['entry_time', 'exit_time'])
+
+
+class ResultStore:
+    """
+    Backtest runs in one SQLite database instead of timestamped CSV files.
+    A run is a row of the runs table holding its metadata, every strategy parameter and
+    the scalar metrics as columns, so sweeps can be filtered and ranked in SQL, e.g.
+    top_runs('profit_factor', where="base_sl_points <= ?", args=(15,)). Trades and the
+    equity curve go to their own tables keyed by run id and are written with bulk
+    inserts in the run's transaction. The database runs in WAL mode, so runs can be
+    read while a sweep writes. Infinite metrics (profit_factor of a run without a losing
+    trade) are stored as NULL, so they rank after every finite value.
+    """
+    def __init__(self, path=RESULTS_DB_PATH):
+        """
+        Args:
+            path (str): Database file; created with its directory on first use.
+        """
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self._create_schema()
+
+    def _create_schema(self):
+        param_columns = _param_columns()
+        clash = {name for name, _ in param_columns} & set(METRIC_COLUMNS + RUN_COLUMNS)
+        if clash:
+            raise RuntimeError(f"Parameter names clash with result columns: {', '.join(sorted(clash))}")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, created_at TEXT NOT NULL, label TEXT, "
+                "data_source TEXT, data_type TEXT, data_hash TEXT, params_key TEXT, engine TEXT, params_json TEXT)"
+            )
+            # Parameters or metrics added since the database was created become new columns
+            existing = {row[1] for row in self.conn.execute("PRAGMA table_info(runs)")}
+            for name, sql_type in param_columns + [(name, 'REAL') for name in METRIC_COLUMNS]:
+                if name not in existing:
+                    self.conn.execute(f"ALTER TABLE runs ADD COLUMN {name} {sql_type}")
+            for name in INDEXED_METRICS + INDEXED_PARAMS + ('params_key', 'data_hash'):
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_runs_{name} ON runs ({name})")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS trades (run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE, "
+                "entry_time TEXT, exit_time TEXT, entry_price REAL, exit_price REAL, quantity REAL, pnl REAL, "
+                "reason TEXT, mae REAL, mfe REAL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_trades_run ON trades (run_id)")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS equity (run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE, "
+                "timestamp TEXT, equity REAL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_equity_run ON equity (run_id)")
+
+    def create_index(self, column):
+        """Indexes another column of the runs table (a parameter or metric)."""
+        if column not in self.columns():
+            raise ValueError(f"Unknown runs column: {column}")
+        with self.conn:
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_runs_{column} ON runs ({column})")
+
+    def columns(self):
+        return [row[1] for row in self.conn.execute("PRAGMA table_info(runs)")]
+
+    def save(self, results, params, data_source=None, data_type=None, label=None):
+        """
+        Stores one backtest run and returns its id.
+
+        Args:
+            results (dict): generate_results() output (without "error").
+            params (StrategyParams | dict): Parameters of the run.
+            data_source (str): Data file the run was made on; its content hash is stored too.
+            data_type (str): 'csv' or 'ticks'.
+            label (str): Free-form tag, e.g. the name of a sweep.
+        """
+        if "error" in results:
+            raise ValueError(f"Cannot store a failed run: {results['error']}")
+        params = StrategyParams.from_mapping(params)
+        data_hash = file_fingerprint(data_source) if data_source and os.path.exists(data_source) else None
+        row = {
+            'created_at': datetime.now().isoformat(timespec='seconds'), 'label': label,
+            'data_source': data_source, 'data_type': data_type, 'data_hash': data_hash,
+            'params_key': params.cache_key(), 'engine': engine_fingerprint(),
+            'params_json': json.dumps(params.to_dict(), sort_keys=True),
+        }
+        row.update(params.to_dict())
+        for name in METRIC_COLUMNS:
+            value = results.get(name)
+            row[name] = float(value) if value is not None and not pd.isna(value) and math.isfinite(value) else None
+        names = list(row)
+        with self.conn:
+            cursor = self.conn.execute(
+                f"INSERT INTO runs ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})",
+                [row[name] for name in names]
+            )
+            run_id = cursor.lastrowid
+            trades_df = results.get('trades_df')
+            if trades_df is not None and not trades_df.empty:
+                self.conn.executemany(
+                    f"INSERT INTO trades (run_id, {', '.join(TRADE_COLUMNS)}) VALUES (?{', ?' * len(TRADE_COLUMNS)})",
+                    ((run_id,) + values for values in _sql_values(trades_df, TRADE_COLUMNS))
+                )
+            equity_df = results.get('equity_df')
+            if equity_df is not None and not equity_df.empty:
+                self.conn.executemany(
+                    f"INSERT INTO equity (run_id, {', '.join(EQUITY_COLUMNS)}) VALUES (?{', ?' * len(EQUITY_COLUMNS)})",
+                    ((run_id,) + values for values in _sql_values(equity_df, EQUITY_COLUMNS))
+                )
+        return run_id
+
+    def find_run(self, params, data_source, data_type=None):
+        """
+        Id of the latest stored run with the same parameters, data content, data type and
+        engine code as the given run, or None if there is none.
+        """
+        if not data_source or not os.path.exists(data_source):
+            return None
+        row = self.conn.execute(
+            "SELECT id FROM runs WHERE params_key = ? AND data_hash = ? AND data_type IS ? AND engine = ? "
+            "ORDER BY id DESC LIMIT 1",
+            (StrategyParams.from_mapping(params).cache_key(), file_fingerprint(data_source), data_type,
+             engine_fingerprint())
+        ).fetchone()
+        return row[0] if row else None
+
+    def runs(self, where=None, args=(), order_by=None, descending=True, limit=None):
+        """
+        Runs as a DataFrame indexed by id.
+
+        Args:
+            where (str): SQL condition on the runs columns, with ? placeholders.
+            args (tuple): Values of the placeholders.
+            order_by (str): Column to sort by.
+            descending (bool): Sort direction.
+            limit (int): Maximum number of runs.
+        """
+        sql = "SELECT * FROM runs"
+        if where:
+            sql += f" WHERE {where}"
+        if order_by:
+            if order_by not in self.columns():
+                raise ValueError(f"Unknown runs column: {order_by}")
+            # NULLs sort last in descending order; keep them last ascending too
+            sql += f" ORDER BY {order_by} DESC" if descending else f" ORDER BY {order_by} IS NULL, {order_by}"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return pd.read_sql_query(sql, self.conn, params=tuple(args), index_col='id')
+
+    def top_runs(self, metric='profit_factor', limit=20, where=None, args=(), min_trades=None):
+        """
+        The best runs by metric, e.g. top_runs('profit_factor', 20, "base_sl_points <= ?", (15,)).
+        Ratios such as profit_factor are noise on a handful of trades; min_trades keeps only
+        runs with at least that many trades.
+        """
+        if min_trades is not None:
+            where = f"({where}) AND total_trades >= ?" if where else "total_trades >= ?"
+            args = tuple(args) + (min_trades,)
+        return self.runs(where, args, order_by=metric, limit=limit)
+
+    def params_of(self, run_id):
+        """StrategyParams of a stored run."""
+        row = self.conn.execute("SELECT params_json FROM runs WHERE id = ?", (run_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"No run {run_id}")
+        return StrategyParams.from_mapping(json.loads(row[0]))
+
+    def trades(self, run_id):
+        """Trades of a run, with parsed timestamps."""
+        df = pd.read_sql_query(f"SELECT {', '.join(TRADE_COLUMNS)} FROM trades WHERE run_id = ? ORDER BY rowid",
+                               self.conn, params=(run_id,))
+        for column in ('entry_time', 'exit_time'):
+            df[column] = pd.to_datetime(df[column])
+        return df
+
+    def equity(self, run_id):
+        """Equity curve of a run."""
+        df = pd.read_sql_query(f"SELECT {', '.join(EQUITY_COLUMNS)} FROM equity WHERE run_id = ? ORDER BY rowid",
+                               self.conn, params=(run_id,))
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        return df
+
+    def compare(self, run_ids):
+        """Runs side by side: the parameters that differ between them and every metric."""
+        runs = self.runs(f"id IN ({', '.join('?' * len(run_ids))})", tuple(run_ids))
+        param_names = [name for name, _ in _param_columns()]
+        varying = [name for name in param_names if runs[name].nunique(dropna=False) > 1]
+        return runs[['created_at', 'label', 'data_source'] + varying + list(METRIC_COLUMNS)].T
+
+    def delete(self, run_id):
+        """Removes a run with its trades and equity."""
+        with self.conn:
+            self.conn.execute("DELETE FROM runs WHERE id = ?", (run_id,))
+
+    def export_csv(self, run_id, output_dir):
+        """Writes a run's trades and equity to CSV files (for tools that read CSV); returns their paths."""
+        os.makedirs(output_dir, exist_ok=True)
+        paths = {}
+        for name, df in (('trades', self.trades(run_id)), ('equity', self.equity(run_id))):
+            paths[name] = os.path.join(output_dir, f"run_{run_id}_{name}.csv")
+            df.to_csv(paths[name], index=False)
+        return paths
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the backtest results database.")
+    parser.add_argument("--db", default=RESULTS_DB_PATH)
+    parser.add_argument("--metric", default='profit_factor', help="Column to rank runs by.")
+    parser.add_argument("--where", help='SQL condition, e.g. "base_sl_points <= 15 AND total_trades >= 20".')
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--min-trades", type=int, help="Only rank runs with at least this many trades.")
+    parser.add_argument("--compare", type=int, nargs='+', help="Run ids to show side by side.")
+    args = parser.parse_args()
+
+    with ResultStore(args.db) as store:
+        if args.compare:
+            print(tabulate(store.compare(args.compare), headers="keys", floatfmt=".2f", tablefmt="grid"))
+            return
+        runs = store.top_runs(args.metric, args.top, args.where, min_trades=args.min_trades)
+        shown = ['created_at', 'label'] + list(INDEXED_PARAMS[:4]) + ['total_trades', 'win_rate', 'total_return',
+                                                                       'max_drawdown', 'profit_factor']
+        if args.metric not in shown:
+            shown.append(args.metric)
+        print(tabulate(runs[shown], headers="keys", floatfmt=".2f", tablefmt="grid"))
+        print(f"{len(runs)} of {len(store)} runs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+from collections import namedtuple
+from datetime import date, datetime, time, timedelta
+from .log_utils import logger
+
+# Regular NSE equity/F&O session
+REGULAR_OPEN = time(9, 15)
+REGULAR_CLOSE = time(15, 30)
+
+# NSE trading holidays (from the exchange's yearly holiday circulars; extend each year)
+NSE_HOLIDAYS = frozenset([
+    # 2024
+    date(2024, 1, 22), date(2024, 1, 26), date(2024, 3, 8), date(2024, 3, 25), date(2024, 3, 29),
+    date(2024, 4, 11), date(2024, 4, 17), date(2024, 5, 1), date(2024, 5, 20), date(2024, 6, 17),
+    date(2024, 7, 17), date(2024, 8, 15), date(2024, 10, 2), date(2024, 11, 1), date(2024, 11, 15),
+    date(2024, 11, 20), date(2024, 12, 25),
+    # 2025
+    date(2025, 2, 26), date(2025, 3, 14), date(2025, 3, 31), date(2025, 4, 10), date(2025, 4, 14),
+    date(2025, 4, 18), date(2025, 5, 1), date(2025, 8, 15), date(2025, 8, 27), date(2025, 10, 2),
+    date(2025, 10, 21), date(2025, 10, 22), date(2025, 11, 5), date(2025, 12, 25),
+    # 2026
+    date(2026, 1, 26), date(2026, 3, 3), date(2026, 3, 26), date(2026, 3, 31), date(2026, 4, 3),
+    date(2026, 4, 14), date(2026, 5, 1), date(2026, 5, 28), date(2026, 6, 26), date(2026, 9, 14),
+    date(2026, 10, 2), date(2026, 10, 20), date(2026, 11, 10), date(2026, 11, 24), date(2026, 12, 25),
+])
+
+# Sessions outside the regular timetable (weekend sessions, Muhurat trading): date -> (open, close)
+SPECIAL_SESSIONS = {
+    date(2024, 1, 20): (REGULAR_OPEN, REGULAR_CLOSE),    # Saturday session for the 22 Jan holiday
+    date(2024, 11, 1): (time(18, 0), time(19, 0)),       # Diwali Muhurat trading
+    date(2025, 2, 1): (REGULAR_OPEN, REGULAR_CLOSE),     # Union Budget (Saturday)
+    date(2025, 10, 21): (time(13, 45), time(14, 45)),    # Diwali Muhurat trading
+    date(2026, 2, 1): (REGULAR_OPEN, REGULAR_CLOSE),     # Union Budget (Sunday)
+    date(2026, 11, 8): (time(18, 0), time(19, 0)),       # Diwali Muhurat trading
+}
+
+# Boundaries of one day as epoch seconds. On a day without a session for the strategy,
+# open/exit_start are +inf and close/entry_cutoff are -inf, so every check on that day is
+# simply False. exchange_close is None only when the exchange does not trade at all.
+SessionBounds = namedtuple('SessionBounds', [
+    'day', 'day_start', 'day_end', 'open', 'entry_cutoff', 'exit_start', 'close', 'exchange_close'
+])
+
+
+class SessionCalendar:
+    """
+    Per-day session boundaries of the intraday strategy, precomputed as epoch seconds.
+    The strategy's window (start to end time) is clipped to the exchange session of the
+    day, so holidays have no session and special sessions such as Muhurat trading get
+    their own entry cutoff and mandatory exit. Per tick, the session checks are plain
+    number comparisons against the cached bounds of the tick's day.
+    """
+    def __init__(self, tz, start=time(9, 15), end=time(15, 15), exit_before_close=20, entry_buffer=30,
+                 holidays=NSE_HOLIDAYS, special_sessions=None):
+        """
+        Args:
+            tz (tzinfo): Exchange timezone (pytz).
+            start (time): Start of the strategy's trading window.
+            end (time): End of the strategy's trading window.
+            exit_before_close (float): Minutes before the window end when positions must be closed.
+            entry_buffer (float): Further minutes before the mandatory exit after which no new entries are taken.
+            holidays (iterable): Dates without a session.
+            special_sessions (dict): date -> (open, close) sessions outside the regular timetable.
+        """
+        self.tz = tz
+        self.start = start
+        self.end = end
+        self.exit_before_close = exit_before_close
+        self.entry_buffer = entry_buffer
+        self.holidays = frozenset(holidays)
+        self.special_sessions = SPECIAL_SESSIONS if special_sessions is None else dict(special_sessions)
+        # Years the holiday and special session lists cover; other years are traded as if
+        # they had no holidays and no special sessions
+        self.holiday_years = frozenset(day.year for day in self.holidays)
+        self.special_session_years = frozenset(day.year for day in self.special_sessions)
+        self._warned_years = set()
+        self._bounds = {}
+        self._current = None
+
+    def exchange_session(self, day):
+        """(open, close) times of the exchange on day, or None if it does not trade."""
+        if day.year not in self._warned_years:
+            self._warn_missing_year(day.year)
+        if day in self.special_sessions:
+            return self.special_sessions[day]
+        if day.weekday() >= 5 or day in self.holidays:
+            return None
+        return REGULAR_OPEN, REGULAR_CLOSE
+
+    def _warn_missing_year(self, year):
+        """Logs once per year when the holiday or special session list has no entry for it."""
+        self._warned_years.add(year)
+        missing = []
+        if year not in self.holiday_years:
+            missing.append("holidays (every weekday is treated as a trading day) to NSE_HOLIDAYS")
+        if year not in self.special_session_years:
+            missing.append("special sessions (e.g. Muhurat trading) to SPECIAL_SESSIONS")
+        if missing:
+            logger.warning(f"No exchange calendar data for {year}. Add the year's {' and '.join(missing)} "
+                           f"in session_calendar.py.")
+
+    def _epoch(self, day, at):
+        return self.tz.localize(datetime.combine(day, at)).timestamp()
+
+    def bounds_for_day(self, day):
+        """SessionBounds of a date, computed once and cached."""
+        bounds = self._bounds.get(day)
+        if bounds is not None:
+            return bounds
+
+        day_start = self._epoch(day, time(0, 0))
+        day_end = self._epoch(day + timedelta(days=1), time(0, 0))
+        session = self.exchange_session(day)
+        close_epoch = self._epoch(day, session[1]) if session else None
+        # e.g. an evening Muhurat session lies outside a day-time strategy window
+        if session is None or max(self.start, session[0]) >= min(self.end, session[1]):
+            bounds = SessionBounds(day, day_start, day_end, float('inf'), float('-inf'),
+                                   float('inf'), float('-inf'), close_epoch)
+        else:
+            window_open = self._epoch(day, max(self.start, session[0]))
+            window_close = self._epoch(day, min(self.end, session[1]))
+            exit_start = window_close - self.exit_before_close * 60
+            bounds = SessionBounds(day, day_start, day_end, window_open,
+                                   exit_start - self.entry_buffer * 60, exit_start, window_close,
+                                   close_epoch)
+        self._bounds[day] = bounds
+        return bounds
+
+    def bounds_for_epoch(self, epoch):
+        """SessionBounds of the day containing epoch (seconds). Same-day lookups are two comparisons."""
+        bounds = self._current
+        if bounds is None or not (bounds.day_start <= epoch < bounds.day_end):
+            bounds = self.bounds_for_day(datetime.fromtimestamp(epoch, self.tz).date())
+            self._current = bounds
+        return bounds
+
+    def precompute(self, first_day, last_day):
+        """Computes the bounds of every day from first_day to last_day (inclusive)."""
+        day = first_day
+        while day <= last_day:
+            self.bounds_for_day(day)
+            day += timedelta(days=1)
+
+    def is_trading_day(self, day):
+        return self.exchange_session(day) is not None
+
+    def in_session(self, epoch):
+        """Within the strategy's window of the day (both ends included)."""
+        bounds = self.bounds_for_epoch(epoch)
+        return bounds.open <= epoch <= bounds.close
+
+    def in_exit_window(self, epoch):
+        """In the last exit_before_close minutes before the window end, when positions must be closed."""
+        bounds = self.bounds_for_epoch(epoch)
+        return bounds.exit_start <= epoch < bounds.close
+
+    def allows_entries(self, epoch):
+        """Before the entry cutoff of the day."""
+        return epoch < self.bounds_for_epoch(epoch).entry_cutoff
+
+    def exchange_hours(self, day):
+        """(open, close) of the exchange on day as aware datetimes, or None if it does not trade."""
+        session = self.exchange_session(day)
+        if session is None:
+            return None
+        return self.tz.localize(datetime.combine(day, session[0])), self.tz.localize(datetime.combine(day, session[1]))
+
+    def exchange_close(self, day):
+        """Exchange close of day as an aware datetime; the regular close on days without a session."""
+        close = self.bounds_for_day(day).exchange_close
+        if close is None:
+            return self.tz.localize(datetime.combine(day, REGULAR_CLOSE))
+        return datetime.fromtimestamp(close, self.tz)
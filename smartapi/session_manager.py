@@ -0,0 +1,226 @@
+import os
+import json
+import time
+import base64
+import threading
+from datetime import datetime, timedelta
+import pyotp
+import pytz
+from dotenv import load_dotenv
+from SmartApi import SmartConnect
+from logzero import logger
+
+
+class SessionManager:
+    """
+    Caches the SmartAPI session (jwt, feed and refresh tokens) with its expiry.
+    The session is kept in memory for reuse within a process and in a JSON file
+    for reuse across processes. Tokens close to expiry are renewed with the refresh
+    token; a full TOTP login only happens when there is no usable session.
+    """
+    # Renew the session this many seconds before the jwt expires
+    RENEW_BEFORE_EXPIRY = 15 * 60
+
+    def __init__(self, env_path, cache_path, auth_token_path=None):
+        """
+        Args:
+            env_path (str): Path of the .env file holding the API credentials.
+            cache_path (str): Path of the JSON file used to share the session across processes.
+            auth_token_path (str): Optional path of the legacy auth_token.json file kept up to date.
+        """
+        self.env_path = env_path
+        self.cache_path = cache_path
+        self.auth_token_path = auth_token_path
+        self.ist_tz = pytz.timezone('Asia/Kolkata')
+
+        self._lock = threading.Lock()
+        self._credentials = None
+        self._session = None
+        self._smart_api = None
+
+    def _load_credentials(self):
+        """Loads the credentials from the .env file once per process."""
+        if self._credentials is not None:
+            return self._credentials
+
+        if not load_dotenv(self.env_path):
+            logger.error(f"Failed to load {self.env_path}")
+            return None
+        print(f"✅ {os.path.basename(self.env_path)} loaded successfully!")
+
+        credentials = {
+            'api_key': os.getenv("API_KEY"),
+            'client_id': os.getenv("CLIENT_ID"),
+            'password': os.getenv("PASSWORD"),
+            'totp_secret': os.getenv("SMARTAPI_TOTP_SECRET"),
+        }
+        if not all(credentials.values()):
+            logger.error("Missing required environment variables!")
+            return None
+
+        self._credentials = credentials
+        return credentials
+
+    def get_session(self, force_refresh=False):
+        """
+        Returns (smart_api, auth_token, refresh_token), reusing the cached session when possible.
+        The auth_token is returned with its "Bearer " prefix, like generateSession does.
+        """
+        with self._lock:
+            credentials = self._load_credentials()
+            if not credentials:
+                return None, None, None
+
+            if not force_refresh:
+                session = self._session or self._read_cache_file(credentials)
+                if session:
+                    seconds_left = session['expires_at'] - time.time()
+                    if seconds_left > self.RENEW_BEFORE_EXPIRY:
+                        return self._use_session(session, credentials)
+                    if seconds_left > 0 and self._renew_session(session, credentials):
+                        return self._use_session(self._session, credentials)
+
+            if self._full_login(credentials):
+                return self._use_session(self._session, credentials)
+            return None, None, None
+
+    def invalidate(self):
+        """Drops the cached session, e.g. after the server rejected the token."""
+        with self._lock:
+            self._drop_session()
+        logger.warning("Cached SmartAPI session invalidated.")
+
+    def _drop_session(self):
+        self._session = None
+        self._smart_api = None
+        try:
+            os.remove(self.cache_path)
+        except OSError:
+            pass
+
+    def _use_session(self, session, credentials):
+        """Builds (or reuses) the SmartConnect client for the given session."""
+        if self._smart_api is None or self._smart_api.access_token != session['jwt_token']:
+            smart_api = SmartConnect(
+                api_key=credentials['api_key'],
+                access_token=session['jwt_token'],
+                refresh_token=session['refresh_token'],
+                feed_token=session['feed_token'],
+                userId=credentials['client_id']
+            )
+            smart_api.setSessionExpiryHook(self._on_session_expired)
+            self._smart_api = smart_api
+        self._session = session
+        return self._smart_api, f"Bearer {session['jwt_token']}", session['refresh_token']
+
+    def _on_session_expired(self):
+        # Called by SmartConnect from inside a request, so the lock may not be taken here
+        self._drop_session()
+        logger.warning("SmartAPI reported an expired session; next login() will authenticate again.")
+
+    def _full_login(self, credentials):
+        """Runs the TOTP login and caches the resulting session."""
+        try:
+            totp = pyotp.TOTP(credentials['totp_secret']).now()
+            smart_api = SmartConnect(api_key=credentials['api_key'])
+            response = smart_api.generateSession(credentials['client_id'], credentials['password'], totp)
+
+            if not response["status"]:
+                logger.error(f"❌ Login Failed: {response}")
+                return False
+
+            jwt_token = smart_api.access_token
+            session = self._make_session(jwt_token, smart_api.refresh_token, smart_api.getfeedToken(), credentials)
+            smart_api.setSessionExpiryHook(self._on_session_expired)
+            self._smart_api = smart_api
+            self._store_session(session, credentials)
+            logger.info("✅ Login Successful!")
+            return True
+
+        except Exception as e:
+            logger.exception(f"Login error: {e}")
+            return False
+
+    def _renew_session(self, session, credentials):
+        """Renews the jwt and feed token with the refresh token. Returns True on success."""
+        try:
+            smart_api = SmartConnect(
+                api_key=credentials['api_key'],
+                access_token=session['jwt_token'],
+                refresh_token=session['refresh_token'],
+                userId=credentials['client_id']
+            )
+            response = smart_api.generateToken(session['refresh_token'])
+            if not response or not response.get('status'):
+                logger.warning(f"Session renewal failed: {response}")
+                return False
+
+            data = response['data']
+            refresh_token = data.get('refreshToken', session['refresh_token'])
+            smart_api.setRefreshToken(refresh_token)
+            smart_api.setSessionExpiryHook(self._on_session_expired)
+            self._smart_api = smart_api
+            self._store_session(self._make_session(data['jwtToken'], refresh_token, data['feedToken'], credentials), credentials)
+            logger.info("✅ Session renewed with refresh token.")
+            return True
+
+        except Exception as e:
+            logger.warning(f"Session renewal error: {e}")
+            return False
+
+    def _make_session(self, jwt_token, refresh_token, feed_token, credentials):
+        jwt_token = jwt_token.replace("Bearer ", "")
+        return {
+            'api_key': credentials['api_key'],
+            'client_id': credentials['client_id'],
+            'jwt_token': jwt_token,
+            'refresh_token': refresh_token,
+            'feed_token': feed_token,
+            'expires_at': self._token_expiry(jwt_token),
+        }
+
+    def _token_expiry(self, jwt_token):
+        """Reads the expiry from the jwt payload; falls back to midnight IST."""
+        try:
+            payload = jwt_token.split('.')[1]
+            payload += '=' * (-len(payload) % 4)
+            claims = json.loads(base64.urlsafe_b64decode(payload))
+            if 'exp' in claims:
+                return float(claims['exp'])
+        except Exception:
+            pass
+        midnight = (datetime.now(self.ist_tz) + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        return midnight.timestamp()
+
+    def _read_cache_file(self, credentials):
+        """Loads a session written by this or another process, if it belongs to these credentials."""
+        try:
+            with open(self.cache_path, 'r') as f:
+                session = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if session.get('api_key') != credentials['api_key'] or session.get('client_id') != credentials['client_id']:
+            return None
+        if not all(session.get(key) for key in ('jwt_token', 'refresh_token', 'feed_token', 'expires_at')):
+            return None
+        return session
+
+    def _store_session(self, session, credentials):
+        """Keeps the session in memory and writes it atomically to the cache file."""
+        self._session = session
+        try:
+            tmp_path = self.cache_path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(session, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Could not write session cache {self.cache_path}: {e}")
+
+        if self.auth_token_path:
+            try:
+                with open(self.auth_token_path, "w") as file:
+                    json.dump({"data": {"auth_token": f"Bearer {session['jwt_token']}", "client_id": credentials['client_id']}}, file)
+                print(f"Auth token written to: {self.auth_token_path}")
+            except OSError as e:
+                logger.warning(f"Could not write {self.auth_token_path}: {e}")
@@ -0,0 +1,524 @@
+import os
+import json
+import time
+import argparse
+import multiprocessing as mp
+from datetime import datetime
+from multiprocessing import shared_memory
+import numpy as np
+import pytz
+from .log_utils import logger
+
+
+class TickRing:
+    """
+    Single-writer ring buffer of ticks in shared memory.
+    Layout: an int64 header [write_count, capacity] followed by int64 epoch-ms
+    timestamps, float64 prices and int64 volumes. The writer fills a slot and then
+    bumps write_count; readers keep their own read position and can tell from
+    write_count how many ticks they missed if they fell a full ring behind.
+    """
+    HEADER_SIZE = 2
+
+    def __init__(self, shm, owner=False):
+        self.shm = shm
+        self.owner = owner
+        self._header = np.ndarray((self.HEADER_SIZE,), dtype=np.int64, buffer=shm.buf)
+        self.capacity = int(self._header[1])
+
+        offset = self.HEADER_SIZE * 8
+        self._timestamps = np.ndarray((self.capacity,), dtype=np.int64, buffer=shm.buf, offset=offset)
+        offset += self.capacity * 8
+        self._prices = np.ndarray((self.capacity,), dtype=np.float64, buffer=shm.buf, offset=offset)
+        offset += self.capacity * 8
+        self._volumes = np.ndarray((self.capacity,), dtype=np.int64, buffer=shm.buf, offset=offset)
+
+    @classmethod
+    def create(cls, capacity):
+        """Allocates a new ring. The creating process is responsible for unlink()."""
+        size = (cls.HEADER_SIZE + 3 * capacity) * 8
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        header = np.ndarray((cls.HEADER_SIZE,), dtype=np.int64, buffer=shm.buf)
+        header[0] = 0
+        header[1] = capacity
+        del header
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """Attaches to a ring created by another process."""
+        return cls(shared_memory.SharedMemory(name=name))
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def write_count(self):
+        return int(self._header[0])
+
+    def write(self, epoch_ms, price, volume):
+        """Appends one tick. Only one process may write to a ring."""
+        count = int(self._header[0])
+        slot = count % self.capacity
+        self._timestamps[slot] = epoch_ms
+        self._prices[slot] = price
+        self._volumes[slot] = volume
+        self._header[0] = count + 1
+
+    def read(self, read_count):
+        """
+        Returns (new_read_count, timestamps, prices, volumes, lost) with the ticks
+        written since read_count. `lost` counts ticks overwritten before they were read.
+        """
+        write_count = int(self._header[0])
+        lost = 0
+        if write_count - read_count > self.capacity:
+            lost = write_count - self.capacity - read_count
+            read_count = write_count - self.capacity
+        if write_count == read_count:
+            return read_count, None, None, None, lost
+
+        slots = np.arange(read_count, write_count) % self.capacity
+        timestamps = self._timestamps[slots]
+        prices = self._prices[slots]
+        volumes = self._volumes[slots]
+
+        # Drop ticks the writer lapped while they were being copied
+        overwritten = int(self._header[0]) - self.capacity - read_count
+        if overwritten > 0:
+            lost += overwritten
+            timestamps, prices, volumes = timestamps[overwritten:], prices[overwritten:], volumes[overwritten:]
+        return write_count, timestamps, prices, volumes, lost
+
+    def close(self):
+        # The views must be released before the mapping can be closed
+        del self._header, self._timestamps, self._prices, self._volumes
+        self.shm.close()
+
+    def unlink(self):
+        if self.owner:
+            self.shm.unlink()
+
+
+def _make_ring_writer(ring):
+    def on_tick(timestamp, price, volume):
+        ring.write(int(timestamp.timestamp() * 1000), price, volume)
+    return on_tick
+
+
+def _run_feed(ring_specs, feed_mode, stop_event, integer_prices=False, cpu=None):
+    """
+    Feed process: owns the WebSocket connection and writes the ticks of every
+    token into its ring. ring_specs is a list of (token, exchange_type, ring_name).
+    With integer_prices the rings carry paise (exact in float64). With cpu, the
+    process is pinned to that core.
+    """
+    from .websocket_stream import WebSocketStreamer
+
+    if cpu is not None and hasattr(os, 'sched_setaffinity'):
+        try:
+            os.sched_setaffinity(0, {cpu})
+        except OSError as e:
+            logger.warning(f"Feed process: could not pin to CPU {cpu}: {e}")
+
+    rings = []
+    streamer = WebSocketStreamer(feed_mode=feed_mode, integer_prices=integer_prices)
+    for token, exchange_type, ring_name in ring_specs:
+        ring = TickRing.attach(ring_name)
+        rings.append(ring)
+        streamer.add_instrument(token, _make_ring_writer(ring), exchange_type=exchange_type)
+
+    logger.info(f"Feed process {os.getpid()} streaming {len(rings)} tokens into shared memory.")
+    streamer.connect()
+    try:
+        while not stop_event.is_set() and streamer.is_running:
+            stop_event.wait(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        streamer.stop()
+        for ring in rings:
+            ring.close()
+
+
+def _run_shard(shard_id, cpu, entries, ring_names, stop_event, status_interval, poll_interval,
+               integer_prices=False):
+    """
+    Shard worker process: attaches to the rings of its tokens and runs one
+    ModularIntradayStrategy per entry, restored from its checkpoint and warmed up
+    from historical candles. Only ticks written after the shard started are processed.
+    """
+    from .strategy import ModularIntradayStrategy
+    from .warmup import fetch_candles, load_candles_csv
+    from .login import login
+    from .checkpoint import StrategyCheckpointer, checkpoint_path_for, restore_strategy
+    from .exchange_clock import ExchangeClock
+
+    if cpu is not None and hasattr(os, 'sched_setaffinity'):
+        try:
+            os.sched_setaffinity(0, {cpu})
+        except OSError as e:
+            logger.warning(f"Shard {shard_id}: could not pin to CPU {cpu}: {e}")
+
+    ist_tz = pytz.timezone('Asia/Kolkata')
+    rings = {}
+    read_counts = {}
+    books = {}
+    warmup_bars = {}
+    for entry in entries:
+        token = entry['token']
+        if token not in rings:
+            rings[token] = TickRing.attach(ring_names[token])
+            read_counts[token] = rings[token].write_count
+            books[token] = []
+        strategy = ModularIntradayStrategy(params=entry['params'])
+        checkpointer = StrategyCheckpointer(checkpoint_path_for(entry['name']))
+        try:
+            saved_at = restore_strategy(strategy, checkpointer.path)
+            if saved_at:
+                logger.info(f"Shard {shard_id}: restored '{entry['name']}' from checkpoint of {saved_at.strftime('%H:%M:%S')}")
+        except Exception as e:
+            logger.error(f"Shard {shard_id}: checkpoint restore of '{entry['name']}' failed: {e}")
+            strategy = ModularIntradayStrategy(params=entry['params'])
+        if entry['warmup']:
+            source = entry['warmup_csv'] or token
+            try:
+                if source not in warmup_bars:
+                    if entry['warmup_csv']:
+                        warmup_bars[source] = load_candles_csv(entry['warmup_csv'], until=datetime.now(ist_tz))
+                    else:
+                        smart_api, _, _ = login()
+                        warmup_bars[source] = fetch_candles(smart_api, token, entry['exchange_type']) if smart_api else []
+                strategy.warm_up(warmup_bars[source])
+            except Exception as e:
+                logger.error(f"Shard {shard_id}: warm-up of '{entry['name']}' failed: {e}")
+        books[token].append({
+            'name': entry['name'],
+            'strategy': strategy,
+            'checkpointer': checkpointer,
+            'cpu_time_ns': 0,
+            'ticks': 0,
+        })
+
+    logger.info(f"Shard {shard_id} (pid {os.getpid()}, cpu {cpu}) running {[e['name'] for e in entries]}")
+    all_books = [book for token_books in books.values() for book in token_books]
+    exchange_clock = ExchangeClock(ist_tz)
+    next_status = time.time() + status_interval
+    next_clock = time.time() + _seconds_until_next_clock(exchange_clock, all_books)
+    try:
+        while not stop_event.is_set():
+            processed = 0
+            for token, ring in rings.items():
+                read_count, timestamps, prices, volumes, lost = ring.read(read_counts[token])
+                read_counts[token] = read_count
+                if lost:
+                    logger.warning(f"Shard {shard_id}: {lost} ticks of token {token} were overwritten before they were read.")
+                if timestamps is None:
+                    continue
+
+                processed += len(timestamps)
+                exchange_clock.observe(datetime.fromtimestamp(int(timestamps[-1]) / 1000, tz=ist_tz))
+                if integer_prices:
+                    prices = prices.astype(np.int64)
+                for epoch_ms, price, volume in zip(timestamps.tolist(), prices.tolist(), volumes.tolist()):
+                    timestamp = datetime.fromtimestamp(epoch_ms / 1000, tz=ist_tz)
+                    for book in books[token]:
+                        cpu_start = time.thread_time_ns()
+                        try:
+                            book['strategy'].on_tick(timestamp, price, volume)
+                        except Exception as e:
+                            logger.error(f"Shard {shard_id}: strategy '{book['name']}' failed on tick: {e}")
+                        book['cpu_time_ns'] += time.thread_time_ns() - cpu_start
+                        book['ticks'] += 1
+                for book in books[token]:
+                    book['checkpointer'].maybe_checkpoint(book['strategy'])
+
+            if time.time() >= next_clock:
+                now = exchange_clock.now()
+                for book in all_books:
+                    cpu_start = time.thread_time_ns()
+                    try:
+                        book['strategy'].on_clock(now)
+                    except Exception as e:
+                        logger.error(f"Shard {shard_id}: clock-driven bar close of '{book['name']}' failed: {e}")
+                    book['cpu_time_ns'] += time.thread_time_ns() - cpu_start
+                next_clock = time.time() + _seconds_until_next_clock(exchange_clock, all_books)
+            if time.time() >= next_status:
+                _log_shard_status(shard_id, books)
+                next_status = time.time() + status_interval
+            if not processed:
+                time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        _log_shard_results(shard_id, books)
+        for token_books in books.values():
+            for book in token_books:
+                book['checkpointer'].checkpoint(book['strategy'])
+                book['checkpointer'].close()
+        for ring in rings.values():
+            ring.close()
+
+
+def _seconds_until_next_clock(exchange_clock, books):
+    return min(exchange_clock.seconds_until_next_close(book['strategy'].params.bar_close_grace_seconds) for book in books)
+
+
+def _log_shard_status(shard_id, books):
+    for token_books in books.values():
+        for book in token_books:
+            strategy = book['strategy']
+            state = f"In Position, Size={strategy.position_size}" if strategy.position_size > 0 else "Flat"
+            logger.info(
+                f"SHARD {shard_id}: {book['name']} | {state}, Bars={len(strategy.indicator_manager.get_bar_history())}, "
+                f"Ticks={book['ticks']}, CPU={book['cpu_time_ns'] / 1e6:.1f}ms"
+            )
+
+
+def _log_shard_results(shard_id, books):
+    for token_books in books.values():
+        for book in token_books:
+            results = book['strategy'].generate_results()
+            if "error" in results:
+                logger.info(f"SHARD {shard_id}: {book['name']} final report: {results['error']}")
+            else:
+                logger.info(
+                    f"SHARD {shard_id}: {book['name']} final report | Trades={results['total_trades']}, "
+                    f"PnL=₹{results['total_pnl']:,.2f}, Win Rate={results['win_rate']:.2f}%"
+                )
+
+
+class ShardedRuntime:
+    """
+    Runs strategies across processes so their bar-close work is not bound by one GIL.
+    One feed process owns the WebSocketStreamer and writes ticks into a shared-memory
+    ring per token. Shard processes, each pinned to a core, read the rings of their
+    tokens and run their subset of strategies. A crashed shard (or feed) is restarted
+    on its own without touching the others; restarted strategies warm up again from
+    historical candles.
+
+    Uses the same JSON config as StrategyHost (including "integer_prices"); an optional
+    "weight" per strategy entry steers the assignment of strategies to shards.
+    """
+    def __init__(self, config, num_shards=None, ring_capacity=65536, max_restarts=5,
+                 status_interval=None, poll_interval=0.002):
+        """
+        Args:
+            config (dict): Parsed host configuration (see StrategyHost).
+            num_shards (int): Number of worker processes. Defaults to the usable cores minus
+                              the one reserved for the feed process.
+            ring_capacity (int): Ticks held per token ring before the oldest are overwritten.
+            max_restarts (int): Restarts allowed per shard (and for the feed) before giving up.
+            status_interval (float): Seconds between shard status logs.
+            poll_interval (float): Sleep of an idle shard between ring polls, in seconds.
+        """
+        strategies = config.get('strategies') or []
+        if not strategies:
+            raise ValueError("Runtime config must list at least one strategy.")
+
+        self.feed_mode = config.get('feed_mode', 2)
+        self.status_interval = status_interval or config.get('status_interval', 15)
+        self.ring_capacity = ring_capacity
+        self.max_restarts = max_restarts
+        self.poll_interval = poll_interval
+        self.integer_prices = bool(config.get('integer_prices', False))
+
+        from .strategy_params import StrategyParams
+        default_params = config.get('defaults', {})
+        self.entries = []
+        for index, entry in enumerate(strategies):
+            token = str(entry['token'])
+            params = dict(default_params)
+            params.update(entry.get('params', {}))
+            params['integer_prices'] = self.integer_prices
+            # Validated here, so a bad config fails before any shard starts
+            params = StrategyParams.from_mapping(params)
+            self.entries.append({
+                'name': entry.get('name') or f"{entry.get('symbol', token)}_{index}",
+                'token': token,
+                'exchange_type': entry.get('exchange_type', 1),
+                'weight': entry.get('weight', 1),
+                'warmup': entry.get('warmup', True),
+                'warmup_csv': entry.get('warmup_csv'),
+                'params': params,
+            })
+
+        self.cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else None
+        cpu_count = len(self.cpus) if self.cpus else (os.cpu_count() or 1)
+        self.num_shards = num_shards or max(1, cpu_count - 1)
+
+        # Spawned children behave the same on every platform and inherit no threads
+        self._ctx = mp.get_context("spawn")
+        self.rings = {}
+        self.assignments = []
+        self._shards = {}
+        self._feed = None
+        self._feed_restarts = 0
+        self._stopping = False
+
+    @classmethod
+    def from_config_file(cls, config_path, **kwargs):
+        """Builds a runtime from a JSON config file."""
+        with open(config_path, 'r') as f:
+            config = json.load(f)
+        return cls(config, **kwargs)
+
+    def _assign(self, num_shards):
+        """Greedy assignment of strategies to shards by weight, heaviest first."""
+        shards = [[] for _ in range(num_shards)]
+        loads = [0] * num_shards
+        for entry in sorted(self.entries, key=lambda e: e['weight'], reverse=True):
+            target = loads.index(min(loads))
+            shards[target].append(entry)
+            loads[target] += entry['weight']
+        return shards
+
+    def _cpu_for(self, slot):
+        """CPU for a process slot: slot 0 is the feed, shards take the following cores."""
+        if not self.cpus:
+            return None
+        return self.cpus[slot % len(self.cpus)]
+
+    def _start_feed(self):
+        ring_specs = []
+        for entry in self.entries:
+            if entry['token'] not in {spec[0] for spec in ring_specs}:
+                ring_specs.append((entry['token'], entry['exchange_type'], self.rings[entry['token']].name))
+        stop_event = self._ctx.Event()
+        process = self._ctx.Process(target=_run_feed,
+                                    args=(ring_specs, self.feed_mode, stop_event, self.integer_prices, self._cpu_for(0)),
+                                    name="feed", daemon=True)
+        process.start()
+        self._feed = (process, stop_event)
+
+    def _start_shard(self, shard_id, restarts=0):
+        entries = self.assignments[shard_id]
+        if not entries:
+            return
+        ring_names = {entry['token']: self.rings[entry['token']].name for entry in entries}
+        stop_event = self._ctx.Event()
+        process = self._ctx.Process(
+            target=_run_shard,
+            args=(shard_id, self._cpu_for(shard_id + 1), entries, ring_names, stop_event,
+                  self.status_interval, self.poll_interval, self.integer_prices),
+            name=f"shard-{shard_id}", daemon=True
+        )
+        process.start()
+        self._shards[shard_id] = {'process': process, 'stop_event': stop_event, 'entries': entries, 'restarts': restarts}
+
+    def _stop_shard(self, shard_id, timeout=10):
+        shard = self._shards.pop(shard_id, None)
+        if not shard:
+            return
+        shard['stop_event'].set()
+        shard['process'].join(timeout)
+        if shard['process'].is_alive():
+            logger.warning(f"Shard {shard_id} did not stop in time; terminating.")
+            shard['process'].terminate()
+            shard['process'].join()
+
+    def start(self):
+        """Creates the rings and starts the feed and shard processes."""
+        for entry in self.entries:
+            if entry['token'] not in self.rings:
+                self.rings[entry['token']] = TickRing.create(self.ring_capacity)
+
+        self.assignments = self._assign(self.num_shards)
+        logger.info(f"--- Sharded runtime: {len(self.entries)} strategies on {self.num_shards} shards, "
+                    f"{len(self.rings)} token rings ---")
+        self._start_feed()
+        for shard_id in range(self.num_shards):
+            self._start_shard(shard_id)
+
+    def supervise(self):
+        """Restarts any shard or feed process that died. Called periodically by run()."""
+        if self._stopping:
+            return
+
+        feed_process, _ = self._feed
+        if not feed_process.is_alive():
+            if self._feed_restarts >= self.max_restarts:
+                logger.error("Feed process exceeded its restart budget; stopping runtime.")
+                self._stopping = True
+                return
+            self._feed_restarts += 1
+            logger.warning(f"Feed process exited (code {feed_process.exitcode}); restart #{self._feed_restarts}.")
+            self._start_feed()
+
+        for shard_id, shard in list(self._shards.items()):
+            if shard['process'].is_alive():
+                continue
+            names = [entry['name'] for entry in shard['entries']]
+            if shard['restarts'] >= self.max_restarts:
+                logger.error(f"Shard {shard_id} {names} exceeded its restart budget; leaving it down.")
+                self._shards.pop(shard_id)
+                continue
+            logger.warning(f"Shard {shard_id} {names} exited (code {shard['process'].exitcode}); restarting.")
+            self._start_shard(shard_id, restarts=shard['restarts'] + 1)
+
+    def rebalance(self, num_shards=None):
+        """
+        Recomputes the strategy-to-shard assignment, optionally for a new shard count.
+        Only shards whose strategy set changed are restarted.
+        """
+        num_shards = num_shards or self.num_shards
+        new_assignments = self._assign(num_shards)
+        old_assignments = self.assignments
+
+        for shard_id in range(max(len(old_assignments), num_shards)):
+            old = [e['name'] for e in old_assignments[shard_id]] if shard_id < len(old_assignments) else []
+            new = [e['name'] for e in new_assignments[shard_id]] if shard_id < num_shards else []
+            if old != new:
+                self._stop_shard(shard_id)
+
+        self.assignments = new_assignments
+        self.num_shards = num_shards
+        for shard_id in range(num_shards):
+            if shard_id not in self._shards:
+                self._start_shard(shard_id)
+        logger.info(f"Rebalanced onto {num_shards} shards.")
+
+    def run(self):
+        """Starts everything and supervises the processes until interrupted."""
+        self.start()
+        print(f"\n*** Sharded runtime is live: {len(self.entries)} strategies on {self.num_shards} shards. ***\n")
+        try:
+            while not self._stopping:
+                self.supervise()
+                time.sleep(1)
+        except KeyboardInterrupt:
+            logger.info("\n--- Shutdown signal received (CTRL+C) ---")
+        finally:
+            self.stop()
+
+    def stop(self):
+        """Stops the shards first (they write their reports), then the feed, then frees the rings."""
+        self._stopping = True
+        for shard_id in list(self._shards):
+            self._stop_shard(shard_id)
+
+        if self._feed:
+            feed_process, stop_event = self._feed
+            stop_event.set()
+            feed_process.join(10)
+            if feed_process.is_alive():
+                feed_process.terminate()
+                feed_process.join()
+            self._feed = None
+
+        for ring in self.rings.values():
+            ring.close()
+            ring.unlink()
+        self.rings = {}
+        logger.info("--- Sharded runtime has been shut down. ---")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run live strategies sharded across processes.")
+    parser.add_argument("config", help="Path of the JSON host config.")
+    parser.add_argument("--shards", type=int, default=None, help="Number of shard processes.")
+    args = parser.parse_args()
+
+    runtime = ShardedRuntime.from_config_file(os.path.abspath(args.config), num_shards=args.shards)
+    runtime.run()
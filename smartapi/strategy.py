@@ -7,58 +7,36 @@ import warnings
 warnings.filterwarnings('ignore')
 from tabulate import tabulate
 from .indicator_manager import IndicatorManager
+from .session_calendar import SessionCalendar
+from .prices import PAISE_PER_RUPEE, to_rupees, bars_to_paise
+from .strategy_params import StrategyParams
+from .metrics import StreamingMetrics
+from .equity_tracker import EquityTracker
 
 class ModularIntradayStrategy:
+    # Runtime attributes saved by get_state(); everything else comes from the parameters
+    STATE_ATTRIBUTES = (
+        'position_size', 'position_entry_price', 'position_entry_time', 'position_high_price',
+        'base_stop_price', 'trail_stop_price', 'trailing_active', 'tp1_filled', 'tp2_filled',
+        'last_exit_price', 'last_entry_price', 'last_exit_reason', 'last_exit_bar_idx', 'last_time_exit_date',
+        'trades', 'equity_curve', 'current_equity', 'action_logs',
+    )
+
     def __init__(self, params=None):
-        # === STRATEGY PARAMETERS ===
-        self.start_date = "2025-01-01"
-        self.end_date = "2025-12-31"
-        self.initial_capital = 100000
-
-        # === INPUT TOGGLES ===
-        self.use_supertrend = True
-        self.use_vwap = True
-        self.use_ema_crossover = True
-        self.use_rsi_filter = True
-
-        # === TRADE SESSION OPTIONS ===
-        self.is_intraday = True
-        self.intraday_start_hour = 9
-        self.intraday_start_min = 15
-        self.intraday_end_hour = 15
-        self.intraday_end_min = 15
-
-        # === INTRADAY SPECIFIC PARAMETERS ===
-        self.rsi_length = 14
-        self.rsi_overbought = 70
-        self.rsi_oversold = 30
-
-        # === STRATEGY PARAMETERS ===
-        self.atr_len = 10
-        self.atr_mult = 3.0
-        self.fast_ema = 9
-        self.slow_ema = 21
-
-        # === DUAL STOP LOSS SYSTEM ===
-        self.base_sl_points = 15
+        """
+        Args:
+            params (StrategyParams | dict): Strategy parameters; a dict overrides the defaults
+                                            of StrategyParams and is validated the same way.
+        """
+        # === PARAMETERS ===
+        # config holds the parameters as given (rupees); params is what the strategy trades
+        # with, point distances in paise when integer_prices is on
+        self.config = StrategyParams.from_mapping(params)
+        self.params = self.config.in_paise() if self.config.integer_prices else self.config
+
+        # === DUAL STOP LOSS STATE ===
         self.base_stop_price = 0
-        
-        self.use_trail_stop = True
         self.trail_stop_price = 0
-        self.trail_activation_points = 25
-        self.trail_distance_points = 10
-        
-        # === TAKE PROFIT LEVELS ===
-        self.use_tiered_tp = True
-        self.tp1_points = 25
-        self.tp2_points = 45
-        self.tp3_points = 100
-        
-        # === SESSION END (Mandatory exit) ===
-        self.exit_before_close = 20  # minutes before session end
-        
-        # === RISK MANAGEMENT ===
-        self.risk_per_trade_percent = 1.0 # Risk 1% of current equity per trade
 
         # === POSITION TRACKING VARIABLES ===
         self.position_size = 0
@@ -76,79 +54,66 @@ class ModularIntradayStrategy:
         self.last_exit_bar_idx = -1
         self.last_time_exit_date = None
 
-        # === RE-ENTRY PARAMETERS ===
-        self.reentry_price_buffer = 5
-        self.reentry_momentum_lookback = 3
-        self.reentry_min_green_candles = 1
-
         # === TIMEZONE ===
         self.ist_tz = pytz.timezone('Asia/Kolkata')
 
         # === RESULTS TRACKING ===
         self.trades = []
         self.equity_curve = []
-        self.current_equity = self.initial_capital
-        self.equity_curve.append({'timestamp': None, 'equity': self.initial_capital})
-
-        # === OVERRIDE WITH PARAMS ===
-        if params:
-            for k, v in params.items():
-                setattr(self, k, v)
+        self.current_equity = self.params.initial_capital
+        self.equity_curve.append({'timestamp': None, 'equity': self.params.initial_capital})
+        # Running figures, read by live status and generate_results()
+        self.metrics = StreamingMetrics(self.params.initial_capital,
+                                        price_scale=1 / PAISE_PER_RUPEE if self.params.integer_prices else 1)
+        # Mark-to-market equity per tick, so drawdowns inside open trades count too
+        self.equity_tracker = EquityTracker(self.params.initial_capital)
         
         # === ACTION LOGGING ===
         self.action_logs = []
 
         # === INDICATOR MANAGER ===
-        strategy_params = {
-            'use_supertrend': self.use_supertrend,
-            'use_vwap': self.use_vwap,
-            'use_ema_crossover': self.use_ema_crossover,
-            'use_rsi_filter': self.use_rsi_filter,
-            'atr_len': self.atr_len,
-            'atr_mult': self.atr_mult,
-            'fast_ema': self.fast_ema,
-            'slow_ema': self.slow_ema,
-            'rsi_length': self.rsi_length
-        }
-        self.indicator_manager = IndicatorManager(strategy_params)
+        self.indicator_manager = IndicatorManager(self.params.to_dict())
+        
+        # === SESSION CALENDAR ===
+        # Session boundaries per day (holidays and special sessions included), precomputed
+        # for the configured date range so the tick path only compares epoch seconds
+        params = self.params
+        self.session_calendar = SessionCalendar(
+            self.ist_tz,
+            start=time(params.intraday_start_hour, params.intraday_start_min),
+            end=time(params.intraday_end_hour, params.intraday_end_min),
+            exit_before_close=params.exit_before_close
+        )
+        self.session_calendar.precompute(pd.Timestamp(params.start_date).date(), pd.Timestamp(params.end_date).date())
         
         # === MINIMUM BARS FOR SIGNALS ===
-        self.min_bars_for_signals = max(self.atr_len, self.rsi_length, self.slow_ema, 20, self.reentry_momentum_lookback)
+        self.min_bars_for_signals = max(params.atr_len, params.rsi_length, params.slow_ema, 20, params.reentry_momentum_lookback)
 
     def is_in_session(self, timestamp):
         """Check if timestamp is within trading session"""
-        if not self.is_intraday: return True
-        ist_time = timestamp.astimezone(self.ist_tz).time()
-        start_time = time(self.intraday_start_hour, self.intraday_start_min)
-        end_time = time(self.intraday_end_hour, self.intraday_end_min)
-        return start_time <= ist_time <= end_time
+        if not self.params.is_intraday: return True
+        return self.session_calendar.in_session(timestamp.timestamp())
     
     def is_near_session_end(self, timestamp):
         """Check if we're near session end"""
-        if not self.is_intraday: return False
-        t = timestamp.astimezone(self.ist_tz)
-        end_time = t.replace(hour=self.intraday_end_hour, minute=self.intraday_end_min, second=0, microsecond=0)
-        time_to_end = (end_time - t).total_seconds() / 60
-        return 0 < time_to_end <= self.exit_before_close
+        if not self.params.is_intraday: return False
+        return self.session_calendar.in_exit_window(timestamp.timestamp())
     
     def should_allow_new_entries(self, timestamp):
         """Check if new entries are allowed"""
-        if not self.is_intraday: return True
-        t = timestamp.astimezone(self.ist_tz)
-        end_time = t.replace(hour=self.intraday_end_hour, minute=self.intraday_end_min, second=0, microsecond=0)
-        time_to_end = (end_time - t).total_seconds() / 60
-        return time_to_end > (self.exit_before_close + 30)
+        if not self.params.is_intraday: return True
+        return self.session_calendar.allows_entries(timestamp.timestamp())
     
-    def _check_reentry_momentum(self, bar_history_df):
-        """Checks for momentum in the last few candles for re-entry."""
-        if len(bar_history_df) < self.reentry_momentum_lookback + 1:
+    def _check_reentry_momentum(self, bar_history):
+        """Checks for momentum in the last few candles (Bar records, oldest first) for re-entry."""
+        if len(bar_history) < self.params.reentry_momentum_lookback + 1:
             return False
 
-        lookback_df = bar_history_df.iloc[-self.reentry_momentum_lookback:]
-        price_increase_over_lookback = lookback_df.iloc[-1]['close'] > lookback_df.iloc[0]['close']
-        green_candles_count = (lookback_df['close'] > lookback_df['open']).sum()
+        lookback_bars = bar_history[-self.params.reentry_momentum_lookback:]
+        price_increase_over_lookback = lookback_bars[-1].close > lookback_bars[0].close
+        green_candles_count = sum(1 for bar in lookback_bars if bar.close > bar.open)
         
-        return price_increase_over_lookback and green_candles_count >= self.reentry_min_green_candles
+        return price_increase_over_lookback and green_candles_count >= self.params.reentry_min_green_candles
 
     def can_reenter(self, current_price, timestamp, current_bar_data):
         """Check if re-entry is allowed based on previous exit reason and new conditions."""
@@ -159,18 +124,18 @@ class ModularIntradayStrategy:
             return False
 
         if self.last_entry_price is not None:
-            if not (current_price > (self.last_entry_price + self.reentry_price_buffer)): return False
-            if self.use_ema_crossover and not current_bar_data.get('ema_bull', False): return False
+            if not (current_price > (self.last_entry_price + self.params.reentry_price_buffer)): return False
+            if self.params.use_ema_crossover and not current_bar_data.get('ema_bull', False): return False
 
             # Check VWAP and Supertrend conditions
             vwap_bull = current_bar_data.get('vwap_bull', False)
             supertrend_bull = current_bar_data.get('supertrend') == 1
             
-            indicator_bullish_check = (self.use_vwap and vwap_bull) or \
-                                      (self.use_supertrend and supertrend_bull)
+            indicator_bullish_check = (self.params.use_vwap and vwap_bull) or \
+                                      (self.params.use_supertrend and supertrend_bull)
             if not indicator_bullish_check: return False
 
-            if not self._check_reentry_momentum(self.indicator_manager.get_bar_history_df()): return False
+            if not self._check_reentry_momentum(self.indicator_manager.bar_history): return False
             
             return True
         return False
@@ -178,8 +143,8 @@ class ModularIntradayStrategy:
     def enter_position(self, price, timestamp, reason="Buy Signal"):
         """Enter a long position and set up dual stop loss system"""
         if self.position_size == 0:
-            capital_to_risk = self.current_equity * (self.risk_per_trade_percent / 100.0)
-            position_size = int(capital_to_risk / self.base_sl_points)
+            capital_to_risk = self.current_equity * (self.params.risk_per_trade_percent / 100.0)
+            position_size = int(capital_to_risk / self.price_in_rupees(self.params.base_sl_points))
             
             if position_size == 0:
                 position_size = 1
@@ -188,37 +153,41 @@ class ModularIntradayStrategy:
             self.position_entry_price = price
             self.position_entry_time = timestamp
             self.position_high_price = price
-            self.base_stop_price = price - self.base_sl_points
+            self.base_stop_price = price - self.params.base_sl_points
             self.trail_stop_price = 0
             self.trailing_active = False
             self.tp1_filled = 0.0
             self.tp2_filled = 0.0
+            self.metrics.on_entry(price)
             
-            log = ["ENTRY", timestamp, f"{price:.2f}", f"{self.position_size}", f"Base SL: {self.base_stop_price:.2f}", reason]
+            price_rs, base_stop_rs = self.price_in_rupees(price), self.price_in_rupees(self.base_stop_price)
+            log = ["ENTRY", timestamp, f"{price_rs:.2f}", f"{self.position_size}", f"Base SL: {base_stop_rs:.2f}", reason]
             self.action_logs.append(log)
-            print(f"ENTRY: {timestamp} - Price: {price:.2f} - Size: {self.position_size}")
-            print(f"  └─ BASE STOP (Fixed): {self.base_stop_price:.2f}")
-            print(f"  └─ TRAIL STOP: Inactive (activates at +{self.trail_activation_points} points)")
+            print(f"ENTRY: {timestamp} - Price: {price_rs:.2f} - Size: {self.position_size}")
+            print(f"  └─ BASE STOP (Fixed): {base_stop_rs:.2f}")
+            print(f"  └─ TRAIL STOP: Inactive (activates at +{self.price_in_rupees(self.params.trail_activation_points):g} points)")
     
     def update_trailing_stop(self, current_price, timestamp):
         """Update trailing stop loss based on current price"""
-        if not self.use_trail_stop or self.position_size <= 0: return
+        params = self.params
+        if not params.use_trail_stop or self.position_size <= 0: return
             
         if current_price > self.position_high_price:
             self.position_high_price = current_price
             
         profit_points = current_price - self.position_entry_price
         
-        if not self.trailing_active and profit_points >= self.trail_activation_points:
+        if not self.trailing_active and profit_points >= params.trail_activation_points:
             self.trailing_active = True
-            self.trail_stop_price = self.position_high_price - self.trail_distance_points
-            print(f"TRAIL ACTIVATED: {timestamp} - Trail Stop: {self.trail_stop_price:.2f}")
+            self.trail_stop_price = self.position_high_price - params.trail_distance_points
+            print(f"TRAIL ACTIVATED: {timestamp} - Trail Stop: {self.price_in_rupees(self.trail_stop_price):.2f}")
         elif self.trailing_active:
-            new_trail_stop = self.position_high_price - self.trail_distance_points
+            new_trail_stop = self.position_high_price - params.trail_distance_points
             if new_trail_stop > self.trail_stop_price:
                 old_trail = self.trail_stop_price
                 self.trail_stop_price = new_trail_stop
-                print(f"TRAIL UPDATED: {old_trail:.2f} -> {self.trail_stop_price:.2f} (High: {self.position_high_price:.2f})")
+                print(f"TRAIL UPDATED: {self.price_in_rupees(old_trail):.2f} -> {self.price_in_rupees(self.trail_stop_price):.2f} "
+                      f"(High: {self.price_in_rupees(self.position_high_price):.2f})")
     
     def get_effective_stop_price(self):
         """Get the higher of the base stop and the trail stop."""
@@ -251,18 +220,24 @@ class ModularIntradayStrategy:
             exit_qty = self.position_size * (qty_percent / 100)
             if exit_qty > self.position_size: exit_qty = self.position_size
             
-            pnl = (price - self.position_entry_price) * exit_qty
+            # Prices may be in paise; equity, PnL and the trade log are always in rupees
+            pnl = self.price_in_rupees(price - self.position_entry_price) * exit_qty
             self.current_equity += pnl
             self.position_size -= exit_qty
             
-            log = ["EXIT", timestamp, f"{price:.2f}", f"{qty_percent}%", f"{pnl:.2f}", reason]
+            price_rs = self.price_in_rupees(price)
+            log = ["EXIT", timestamp, f"{price_rs:.2f}", f"{qty_percent}%", f"{pnl:.2f}", reason]
             self.action_logs.append(log)
-            print(f"EXIT: {timestamp} - Price: {price:.2f} - Qty%: {qty_percent}% - PnL: {pnl:.2f} - Reason: {reason}")
+            print(f"EXIT: {timestamp} - Price: {price_rs:.2f} - Qty%: {qty_percent}% - PnL: {pnl:.2f} - Reason: {reason}")
             
-            trade = {'entry_time': self.position_entry_time, 'exit_time': timestamp, 'entry_price': self.position_entry_price, 'exit_price': price, 'quantity': exit_qty, 'pnl': pnl, 'reason': reason}
+            # Adverse / favorable excursion of the position up to this exit, rupees per unit
+            mae, mfe = self.metrics.excursion()
+            trade = {'entry_time': self.position_entry_time, 'exit_time': timestamp, 'entry_price': self.price_in_rupees(self.position_entry_price), 'exit_price': price_rs, 'quantity': exit_qty, 'pnl': pnl, 'reason': reason,
+                     'mae': mae, 'mfe': mfe}
             self.trades.append(trade)
             
             self.equity_curve.append({'timestamp': timestamp, 'equity': self.current_equity})
+            self.metrics.on_trade(pnl, position_closed=self.position_size <= 1e-9)
 
             if self.position_size <= 1e-9: # Effectively zero
                 self.last_exit_price = price
@@ -270,81 +245,50 @@ class ModularIntradayStrategy:
                 if exit_classification: self.last_exit_reason = exit_classification
                 self._reset_position_state()
 
+    def price_in_rupees(self, price):
+        """Rupee value of a price or price distance held by the strategy (paise with integer_prices)."""
+        return to_rupees(price) if self.params.integer_prices else price
+
     def on_tick(self, tick_timestamp, tick_price, tick_volume):
-        """Main entry point for processing a new tick from the WebSocket stream."""
+        """
+        Main entry point for processing a new tick from the WebSocket stream.
+        With integer_prices, tick_price is in integer paise.
+        """
         if tick_timestamp.tzinfo is None:
             tick_timestamp = self.ist_tz.localize(tick_timestamp)
+        params = self.params
 
         # --- Bar Aggregation Logic ---
-        current_minute = tick_timestamp.replace(second=0, microsecond=0)
-
-        # Initialize the minute tracker on the very first tick
-        if self.indicator_manager.last_processed_minute is None:
-            self.indicator_manager.last_processed_minute = current_minute
-
-        # If a new minute has started, the previous bar is now complete
-        if current_minute > self.indicator_manager.last_processed_minute:
-            # Close the completed bar and add it to history
-            self.indicator_manager.close_current_bar(self.indicator_manager.last_processed_minute)
-            
-            # Update the minute tracker to the new minute
-            self.indicator_manager.last_processed_minute = current_minute
-
-        # Always update the current (forming) bar with the latest tick data
-        self.indicator_manager.update_current_bar(tick_timestamp, tick_price, tick_volume)
+        if params.bar_type != 'time':
+            # Tick, volume and range bars close on the tick that fills them
+            self.indicator_manager.update_activity_bar(tick_timestamp, tick_price, tick_volume)
+        else:
+            current_minute = tick_timestamp.replace(second=0, microsecond=0)
+
+            # Initialize the minute tracker on the very first tick
+            if self.indicator_manager.last_processed_minute is None:
+                self.indicator_manager.last_processed_minute = current_minute
+
+            # If a new minute has started, the previous bar is now complete (unless on_clock closed it already)
+            if current_minute > self.indicator_manager.last_processed_minute:
+                self.indicator_manager.roll_to_minute(current_minute, params.empty_bar_policy, self.session_calendar)
+
+            # Always update the current (forming) bar with the latest tick data
+            self.indicator_manager.update_current_bar(tick_timestamp, tick_price, tick_volume)
         
+        now = tick_timestamp.timestamp()
+        self.metrics.on_tick(now, tick_price)
+        # Exits fill at the tick price, so this equals the equity after any exit on this tick
+        equity = self.current_equity
+        if self.position_size > 0:
+            equity += self.price_in_rupees(tick_price - self.position_entry_price) * self.position_size
+        self.equity_tracker.on_tick(now, equity)
+
         # --- Real-time Calculations & Position Management ---
         current_vwap = self.indicator_manager.update_tick_indicators(tick_timestamp, tick_price, tick_volume)
         current_vwap_bull = tick_price > current_vwap if not pd.isna(current_vwap) else False
 
-        # Get the latest bar data with all indicator values
-        current_bar_data = self.indicator_manager.get_latest_bar_data()
-        current_bar_data['vwap_bull'] = current_vwap_bull
-        
-        # Add VWAP bullish signal to current bar data
-        if 'vwap' in current_bar_data:
-            current_bar_data['vwap_bull'] = current_vwap_bull
-        
-        # Add EMA bullish signal
-        if 'ema_fast' in current_bar_data and 'ema_slow' in current_bar_data:
-            current_bar_data['ema_bull'] = current_bar_data['ema_fast'] > current_bar_data['ema_slow']
-        
-        # Add HTF bullish signal
-        if 'htf_trend' in current_bar_data:
-            current_bar_data['htf_bullish'] = current_bar_data['close'] > current_bar_data['htf_trend']
-
-        has_enough_history = self.indicator_manager.has_enough_history(self.min_bars_for_signals)
-
-        # --- ENTRY LOGIC ---
-        if self.position_size == 0 and self.should_allow_new_entries(tick_timestamp) and has_enough_history:
-            buy_signal = True
-            
-            # Check Supertrend
-            if self.use_supertrend and current_bar_data.get('supertrend') != 1: 
-                buy_signal = False
-            
-            # Check VWAP
-            if self.use_vwap and not current_vwap_bull: 
-                buy_signal = False
-            
-            # Check EMA crossover
-            if self.use_ema_crossover and not current_bar_data.get('ema_bull', False): 
-                buy_signal = False
-            
-            # Check RSI filter
-            if self.use_rsi_filter:
-                rsi_value = current_bar_data.get('rsi', 50)
-                if not (self.rsi_oversold < rsi_value < self.rsi_overbought): 
-                    buy_signal = False
-            
-            # Check HTF trend
-            if not current_bar_data.get('htf_bullish', False): 
-                buy_signal = False
-            
-            can_reenter_flag = self.can_reenter(tick_price, tick_timestamp, current_bar_data)
-            
-            if buy_signal and can_reenter_flag:
-                self.enter_position(tick_price, tick_timestamp)
+        self._evaluate_entry(tick_price, tick_timestamp, current_vwap_bull)
         
         # --- POSITION MANAGEMENT ---
         if self.position_size > 0:
@@ -360,22 +304,152 @@ class ModularIntradayStrategy:
                 self.exit_position(tick_price, tick_timestamp, 100, f"MANDATORY: {stop_reason}", stop_reason)
                 return
             
-            if self.use_tiered_tp:
+            if params.use_tiered_tp:
                 entry_price = self.position_entry_price
-                if self.tp1_filled == 0 and tick_price >= entry_price + self.tp1_points:
+                if self.tp1_filled == 0 and tick_price >= entry_price + params.tp1_points:
                     self.exit_position(tick_price, tick_timestamp, 50, "TP1-Quick")
                     self.tp1_filled = 1
                 
-                if self.tp2_filled == 0 and self.tp1_filled > 0 and self.position_size > 0 and tick_price >= entry_price + self.tp2_points:
+                if self.tp2_filled == 0 and self.tp1_filled > 0 and self.position_size > 0 and tick_price >= entry_price + params.tp2_points:
                     self.exit_position(tick_price, tick_timestamp, 60, "TP2-Medium")
                     self.tp2_filled = 1
                 
-                if self.tp2_filled > 0 and self.position_size > 0 and tick_price >= entry_price + self.tp3_points:
+                if self.tp2_filled > 0 and self.position_size > 0 and tick_price >= entry_price + params.tp3_points:
                     self.exit_position(tick_price, tick_timestamp, 100, "TP3-Runner", "profit")
                     return
 
+    def _evaluate_entry(self, tick_price, tick_timestamp, current_vwap_bull):
+        """Checks the entry conditions against the latest completed bar and enters if they all hold."""
+        manager = self.indicator_manager
+        params = self.params
+        if not (self.position_size == 0 and self.should_allow_new_entries(tick_timestamp)
+                and manager.has_enough_history(self.min_bars_for_signals)):
+            return
+
+        # Read the latest bar in place; it is only copied once all signals agree
+        latest_bar = manager.bar_history[-1]
+        ema_bull = None
+        if latest_bar.ema_fast is not None and latest_bar.ema_slow is not None:
+            ema_bull = latest_bar.ema_fast > latest_bar.ema_slow
+        htf_bullish = latest_bar.close > latest_bar.htf_trend if latest_bar.htf_trend is not None else None
+
+        # --- ENTRY LOGIC ---
+        buy_signal = True
+        
+        # Check Supertrend
+        if params.use_supertrend and latest_bar.supertrend != 1: 
+            buy_signal = False
+        
+        # Check VWAP
+        if params.use_vwap and not current_vwap_bull: 
+            buy_signal = False
+        
+        # Check EMA crossover
+        if params.use_ema_crossover and not ema_bull: 
+            buy_signal = False
+        
+        # Check RSI filter
+        if params.use_rsi_filter:
+            rsi_value = latest_bar.rsi if latest_bar.rsi is not None else 50
+            if not (params.rsi_oversold < rsi_value < params.rsi_overbought): 
+                buy_signal = False
+        
+        # Check HTF trend
+        if not htf_bullish: 
+            buy_signal = False
+
+        if not buy_signal:
+            return
+
+        # Latest bar data with the signal flags added, as seen by the re-entry rules
+        current_bar_data = latest_bar.copy()
+        current_bar_data.vwap_bull = current_vwap_bull
+        current_bar_data.ema_bull = ema_bull
+        current_bar_data.htf_bullish = htf_bullish
+        if self.can_reenter(tick_price, tick_timestamp, current_bar_data):
+            self.enter_position(tick_price, tick_timestamp)
+
+    def on_clock(self, now):
+        """
+        Closes bars on the exchange clock, bar_close_grace_seconds after each minute boundary,
+        so bar-based signals do not wait for the next minute's first tick. When bars were
+        closed, the entry conditions are re-checked at the last traded price.
+        Activity bars (bar_type other than 'time') are never closed by the clock.
+        Returns the number of bars closed.
+        """
+        if now.tzinfo is None:
+            now = self.ist_tz.localize(now)
+        manager = self.indicator_manager
+        if self.params.bar_type != 'time' or manager.last_processed_minute is None:
+            return 0
+
+        boundary = (now - timedelta(seconds=self.params.bar_close_grace_seconds)).replace(second=0, microsecond=0)
+        # The clock never closes bars past the exchange close
+        boundary = min(boundary, self.session_calendar.exchange_close(boundary.date()))
+        if boundary.date() != manager.last_processed_minute.date() or boundary <= manager.last_processed_minute:
+            return 0
+
+        closed = manager.roll_to_minute(boundary, self.params.empty_bar_policy, self.session_calendar)
+        if closed and self.position_size == 0 and manager.bar_history:
+            last_price = manager.bar_history[-1].close
+            current_vwap = manager.get_indicator_value('vwap')
+            current_vwap_bull = last_price > current_vwap if not pd.isna(current_vwap) else False
+            self._evaluate_entry(last_price, now, current_vwap_bull)
+        return closed
+
+    def warm_up(self, bars):
+        """Seed the bar history and indicator state from historical 1-minute bars before going live."""
+        if self.params.bar_type != 'time':
+            print(f"WARMUP: Skipped, {self.params.bar_type} bars cannot be rebuilt from 1-minute candles")
+            return 0
+        if self.params.integer_prices:
+            bars = bars_to_paise(bars)
+        seeded = self.indicator_manager.seed_history(bars)
+        if seeded:
+            ready = "ready" if self.indicator_manager.has_enough_history(self.min_bars_for_signals) else "not ready"
+            print(f"WARMUP: Seeded {seeded} bars into history, signals {ready}")
+        return seeded
+
+    def backfill_bars(self, bars):
+        """Fill bars missed during a feed outage into the bar history (no trading on them)."""
+        if self.params.integer_prices:
+            bars = bars_to_paise(bars)
+        inserted = self.indicator_manager.backfill_bars(bars)
+        if inserted:
+            print(f"BACKFILL: Inserted {inserted} missed bars into history")
+        return inserted
+
+    def get_state(self):
+        """Snapshot of the position, re-entry memory, results and indicator state (for checkpoints)."""
+        state = {}
+        for name in self.STATE_ATTRIBUTES:
+            value = getattr(self, name)
+            state[name] = list(value) if isinstance(value, list) else value
+        state['indicator_manager'] = self.indicator_manager.get_state()
+        state['metrics'] = self.metrics.get_state()
+        state['equity_tracker'] = self.equity_tracker.get_state()
+        state['integer_prices'] = self.params.integer_prices
+        return state
+
+    def set_state(self, state):
+        """Restore a snapshot taken with get_state()."""
+        if state.get('integer_prices', False) != self.params.integer_prices:
+            raise ValueError("Snapshot was taken with a different integer_prices setting")
+        for name in self.STATE_ATTRIBUTES:
+            if name in state:
+                value = state[name]
+                setattr(self, name, list(value) if isinstance(value, list) else value)
+        self.indicator_manager.set_state(state['indicator_manager'])
+        self.metrics.set_state(state['metrics'])
+        self.equity_tracker.set_state(state['equity_tracker'])
+
     def generate_results(self):
-        """Generate strategy results and statistics"""
+        """
+        Generate strategy results and statistics.
+        The figures come from the running metrics; only the trade and equity tables are built here.
+        max_drawdown is measured on the mark-to-market equity of every tick;
+        closed_trade_drawdown only on the equity after exits.
+        """
         if not self.trades:
             return {"error": "No trades executed"}
         
@@ -384,26 +458,9 @@ class ModularIntradayStrategy:
 
         equity_df = pd.DataFrame(self.equity_curve)
         
-        total_trades = len(trades_df)
-        winning_trades = len(trades_df[trades_df['pnl'] > 0])
-        win_rate = (winning_trades / total_trades) * 100 if total_trades > 0 else 0
-        
-        total_pnl = trades_df['pnl'].sum()
-        gross_profit = trades_df[trades_df['pnl'] > 0]['pnl'].sum()
-        gross_loss = abs(trades_df[trades_df['pnl'] < 0]['pnl'].sum())
-        
-        profit_factor = gross_profit / gross_loss if gross_loss > 0 else float('inf')
-        
-        high_water_mark = equity_df['equity'].cummax()
-        drawdown = (high_water_mark - equity_df['equity']) / high_water_mark
-        max_drawdown = drawdown.max() * 100
-        
-        final_equity = self.current_equity
-        total_return = ((final_equity - self.initial_capital) / self.initial_capital) * 100
-        
-        return {
-            'total_trades': total_trades, 'win_rate': win_rate, 'total_pnl': total_pnl,
-            'profit_factor': profit_factor, 'max_drawdown': max_drawdown, 
-            'total_return': total_return, 'final_equity': final_equity,
-            'trades_df': trades_df, 'equity_df': equity_df
-        }
+        results = self.metrics.summary()
+        results['closed_trade_drawdown'] = results['max_drawdown']
+        results.update(self.equity_tracker.summary())
+        results.update({'final_equity': self.current_equity, 'trades_df': trades_df, 'equity_df': equity_df,
+                        'mtm_equity_df': self.equity_tracker.to_frame(self.ist_tz)})
+        return results
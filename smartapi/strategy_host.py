@@ -0,0 +1,204 @@
+import os
+import json
+import argparse
+import threading
+from .log_utils import logger
+from .live_trader import LiveTradingBot
+from .websocket_stream import WebSocketStreamer
+from .checkpoint import checkpoint_path_for
+from .strategy_params import StrategyParams
+
+
+class StrategyHost:
+    """
+    Headless process that runs many LiveTradingBot instances side by side.
+    All bots share one WebSocketStreamer (one login, one socket), so each
+    instrument is subscribed once no matter how many parameter sets trade it.
+    Status reporting and clock-driven bar closes run from single scheduler threads
+    instead of one per bot, and the CPU time each strategy spends is reported.
+
+    Config file format (JSON):
+        {
+            "feed_mode": 2,
+            "status_interval": 15,
+            "integer_prices": false,
+            "defaults": {"initial_capital": 200000, "use_vwap": true},
+            "strategies": [
+                {"name": "nifty_fast", "symbol": "NIFTY", "token": "26000", "exchange_type": 1,
+                 "params": {"base_sl_points": 15}},
+                {"name": "nifty_slow", "symbol": "NIFTY", "token": "26000", "exchange_type": 1,
+                 "params": {"base_sl_points": 30}, "warmup_csv": "smartapi/data/NIFTY_ONE_MINUTE.csv"}
+            ]
+        }
+    Per-strategy "params" are applied on top of "defaults". Strategies warm up from
+    historical candles unless "warmup" is false; "warmup_csv" loads them from a local file.
+    Each strategy checkpoints its state under its name, so a restarted host resumes it.
+    With "integer_prices" the shared feed delivers integer paise and every strategy runs
+    in integer price mode.
+    """
+    def __init__(self, config, log_ticks=False):
+        """
+        Args:
+            config (dict): Parsed host configuration (see class docstring).
+            log_ticks (bool): If True, the shared streamer prints every tick to the console.
+        """
+        strategies = config.get('strategies') or []
+        if not strategies:
+            raise ValueError("Host config must list at least one strategy.")
+
+        self.feed_mode = config.get('feed_mode', 2)
+        self.status_interval = config.get('status_interval', 15)
+        self.default_params = config.get('defaults', {})
+        self.strategy_configs = strategies
+        self.integer_prices = bool(config.get('integer_prices', False))
+
+        self.streamer = WebSocketStreamer(feed_mode=self.feed_mode, log_ticks=log_ticks,
+                                          integer_prices=self.integer_prices)
+        self.bots = {}
+        self._stop_event = threading.Event()
+        self._clock_thread = None
+
+    @classmethod
+    def from_config_file(cls, config_path, log_ticks=False):
+        """Builds a host from a JSON config file."""
+        with open(config_path, 'r') as f:
+            config = json.load(f)
+        return cls(config, log_ticks=log_ticks)
+
+    def _create_bots(self):
+        """Instantiates one bot per configured strategy, all attached to the shared streamer."""
+        recorded_tokens = set()
+        for index, entry in enumerate(self.strategy_configs):
+            token = str(entry['token'])
+            symbol = entry.get('symbol', token)
+            name = entry.get('name') or f"{symbol}_{index}"
+            if name in self.bots:
+                raise ValueError(f"Duplicate strategy name in host config: {name}")
+
+            params = dict(self.default_params)
+            params.update(entry.get('params', {}))
+            params['integer_prices'] = self.integer_prices
+            params = StrategyParams.from_mapping(params)
+
+            # The raw ticks of an instrument are the same for every strategy trading it
+            self.bots[name] = LiveTradingBot(
+                instrument_token=token, strategy_params=params,
+                exchange_type=entry.get('exchange_type', 1), feed_mode=self.feed_mode,
+                symbol=symbol, streamer=self.streamer,
+                record_ticks=token not in recorded_tokens,
+                warmup=entry.get('warmup', True), warmup_csv=entry.get('warmup_csv'),
+                checkpoint_path=checkpoint_path_for(name)
+            )
+            recorded_tokens.add(token)
+
+    def start(self):
+        """Creates and starts all bots without blocking."""
+        logger.info(f"--- Strategy Host starting {len(self.strategy_configs)} strategies ---")
+        self._create_bots()
+        for name, bot in self.bots.items():
+            bot.start(run_clock=False)
+            logger.info(f"Strategy '{name}' attached | Symbol={bot.symbol}, Token={bot.instrument_token}")
+
+        self._clock_thread = threading.Thread(target=self._clock_loop, daemon=True)
+        self._clock_thread.start()
+
+    def _clock_loop(self):
+        """One clock for all bots: wakes at the earliest due bar close and lets every bot close its bars."""
+        while True:
+            wait_seconds = min(bot.seconds_until_next_clock() for bot in self.bots.values())
+            if self._stop_event.wait(wait_seconds):
+                return
+            for name, bot in self.bots.items():
+                try:
+                    bot.on_clock()
+                except Exception as e:
+                    logger.error(f"Clock-driven bar close failed for strategy '{name}': {e}")
+
+    def run(self):
+        """Starts all bots and runs the central status loop until stopped."""
+        self.start()
+        print(f"\n*** Strategy host is live with {len(self.bots)} strategies. ***\n")
+
+        try:
+            while not self._stop_event.is_set() and self.streamer.is_running:
+                self.report_status()
+                self._stop_event.wait(self.status_interval)
+
+            if not self.streamer.is_running:
+                logger.warning("WebSocket connection appears to have been lost.")
+
+        except KeyboardInterrupt:
+            logger.info("\n--- Shutdown signal received (CTRL+C) ---")
+        finally:
+            self.stop()
+
+    def report_status(self):
+        """Logs the shared feed statistics, each bot's status and the CPU usage per strategy."""
+        if self.streamer.reconnect_count > 0:
+            stats = self.streamer.get_connection_stats()
+            last_recovery = f"{stats['last_recovery_seconds']:.1f}s" if stats['last_recovery_seconds'] is not None else "pending"
+            logger.info(
+                f"FEED: Reconnects={stats['reconnect_count']}, Last recovery={last_recovery}, "
+                f"Backfilled bars={stats['backfilled_bars']}"
+            )
+
+        for name, bot in self.bots.items():
+            try:
+                bot.log_status()
+            except Exception as e:
+                logger.error(f"Status report failed for strategy '{name}': {e}")
+
+        for row in self.get_cpu_report():
+            logger.info(
+                f"CPU: {row['name']} | Ticks={row['ticks']}, CPU={row['cpu_ms']:.1f}ms, "
+                f"Per tick={row['us_per_tick']:.1f}us, Share={row['share_pct']:.1f}%"
+            )
+
+    def get_cpu_report(self):
+        """
+        Returns the CPU time spent in each strategy, most expensive first.
+        Each row holds name, symbol, ticks, cpu_ms, us_per_tick and share_pct.
+        """
+        total_ns = sum(bot.cpu_time_ns for bot in self.bots.values())
+        report = []
+        for name, bot in self.bots.items():
+            report.append({
+                'name': name,
+                'symbol': bot.symbol,
+                'ticks': bot.tick_count,
+                'cpu_ms': bot.cpu_time_ns / 1e6,
+                'us_per_tick': bot.cpu_time_ns / 1e3 / bot.tick_count if bot.tick_count else 0.0,
+                'share_pct': bot.cpu_time_ns * 100.0 / total_ns if total_ns else 0.0,
+            })
+        report.sort(key=lambda row: row['cpu_ms'], reverse=True)
+        return report
+
+    def stop(self):
+        """Stops every bot (each writes its own report) and then the shared streamer."""
+        if self._stop_event.is_set():
+            return
+        self._stop_event.set()
+
+        for name, bot in self.bots.items():
+            try:
+                bot.stop()
+            except Exception as e:
+                logger.error(f"Failed to stop strategy '{name}': {e}")
+
+        if self.streamer.is_running:
+            logger.info("Stopping shared data stream...")
+            self.streamer.stop()
+
+        for row in self.get_cpu_report():
+            logger.info(f"CPU total: {row['name']} | Ticks={row['ticks']}, CPU={row['cpu_ms']:.1f}ms, Share={row['share_pct']:.1f}%")
+        logger.info("--- Strategy Host has been shut down. ---")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run several live strategies on one shared feed.")
+    parser.add_argument("config", help="Path of the JSON host config.")
+    parser.add_argument("--log-ticks", action="store_true", help="Print every tick to the console.")
+    args = parser.parse_args()
+
+    host = StrategyHost.from_config_file(os.path.abspath(args.config), log_ticks=args.log_ticks)
+    host.run()
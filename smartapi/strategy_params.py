@@ -0,0 +1,211 @@
+import hashlib
+import json
+import numbers
+from dataclasses import dataclass, fields, asdict, replace
+from typing import Optional
+import pandas as pd
+from .bar_builders import validate_bar_type
+from .prices import to_paise
+from .timeframes import parse_timeframe
+
+EMPTY_BAR_POLICIES = ('skip', 'carry')
+
+
+@dataclass(frozen=True, slots=True)
+class StrategyParams:
+    """
+    Validated, immutable parameters of ModularIntradayStrategy.
+    Numbers are normalized to the field's type (an atr_mult of 3 and 3.0 are the same
+    parameters), so equal settings compare and hash equal and cache_key() is the same
+    in every process. Instances are cheap to pickle for worker processes, and fields
+    are read from slots.
+    """
+    # === STRATEGY PARAMETERS ===
+    start_date: str = "2025-01-01"
+    end_date: str = "2025-12-31"
+    initial_capital: float = 100000
+
+    # === INPUT TOGGLES ===
+    use_supertrend: bool = True
+    use_vwap: bool = True
+    use_ema_crossover: bool = True
+    use_rsi_filter: bool = True
+
+    # === TRADE SESSION OPTIONS ===
+    is_intraday: bool = True
+    intraday_start_hour: int = 9
+    intraday_start_min: int = 15
+    intraday_end_hour: int = 15
+    intraday_end_min: int = 15
+
+    # === INTRADAY SPECIFIC PARAMETERS ===
+    rsi_length: int = 14
+    rsi_overbought: float = 70
+    rsi_oversold: float = 30
+
+    # === INDICATOR PARAMETERS ===
+    atr_len: int = 10
+    atr_mult: float = 3.0
+    fast_ema: int = 9
+    slow_ema: int = 21
+
+    # === HIGHER TIMEFRAME FILTER ===
+    htf_timeframe: str = '1m'  # bar interval of the HTF trend EMA ('1m', '3m', '5m', '15m', ...)
+    htf_period: int = 20
+
+    # === PRICE REPRESENTATION ===
+    integer_prices: bool = False  # ticks arrive as integer paise; bars, stops and targets stay in paise
+
+    # === BAR CONSTRUCTION ===
+    bar_type: str = 'time'             # 'time' (1-minute bars), or bars closing on activity: 'tick', 'volume', 'range'
+    bar_size: Optional[float] = None   # ticks, traded volume or points of range per bar (activity bars only)
+
+    # === DUAL STOP LOSS SYSTEM ===
+    base_sl_points: float = 15
+    use_trail_stop: bool = True
+    trail_activation_points: float = 25
+    trail_distance_points: float = 10
+
+    # === TAKE PROFIT LEVELS ===
+    use_tiered_tp: bool = True
+    tp1_points: float = 25
+    tp2_points: float = 45
+    tp3_points: float = 100
+
+    # === SESSION END (Mandatory exit) ===
+    exit_before_close: float = 20  # minutes before session end
+
+    # === BAR CLOSE TIMING ===
+    bar_close_grace_seconds: float = 2  # wait this long for late ticks before the clock closes a bar
+    empty_bar_policy: str = 'skip'      # minutes without ticks: 'skip' (no bar) or 'carry' (flat bar)
+
+    # === RISK MANAGEMENT ===
+    risk_per_trade_percent: float = 1.0  # Risk 1% of current equity per trade
+
+    # === RE-ENTRY PARAMETERS ===
+    reentry_price_buffer: float = 5
+    reentry_momentum_lookback: int = 3
+    reentry_min_green_candles: int = 1
+
+    # Point distances given in rupees; converted to paise by in_paise()
+    POINT_PARAMETERS = (
+        'base_sl_points', 'trail_activation_points', 'trail_distance_points',
+        'tp1_points', 'tp2_points', 'tp3_points', 'reentry_price_buffer',
+    )
+
+    def __post_init__(self):
+        for field in fields(self):
+            value = _normalize(field.name, field.type, getattr(self, field.name))
+            object.__setattr__(self, field.name, value)
+        self._validate()
+
+    def _validate(self):
+        for name in ('atr_len', 'rsi_length', 'fast_ema', 'slow_ema', 'htf_period', 'reentry_momentum_lookback'):
+            if getattr(self, name) < 1:
+                raise ValueError(f"{name} must be at least 1, got {getattr(self, name)}")
+        for name in self.POINT_PARAMETERS + ('exit_before_close', 'bar_close_grace_seconds', 'reentry_min_green_candles'):
+            if getattr(self, name) < 0:
+                raise ValueError(f"{name} must not be negative, got {getattr(self, name)}")
+        if self.base_sl_points <= 0:
+            raise ValueError(f"base_sl_points must be positive, got {self.base_sl_points}")
+        if self.atr_mult <= 0 or self.initial_capital <= 0 or self.risk_per_trade_percent <= 0:
+            raise ValueError("atr_mult, initial_capital and risk_per_trade_percent must be positive")
+        if not 0 <= self.rsi_oversold < self.rsi_overbought <= 100:
+            raise ValueError(f"Need 0 <= rsi_oversold < rsi_overbought <= 100, got "
+                             f"{self.rsi_oversold} and {self.rsi_overbought}")
+        for name in ('intraday_start_hour', 'intraday_end_hour'):
+            if not 0 <= getattr(self, name) <= 23:
+                raise ValueError(f"{name} must be between 0 and 23, got {getattr(self, name)}")
+        for name in ('intraday_start_min', 'intraday_end_min'):
+            if not 0 <= getattr(self, name) <= 59:
+                raise ValueError(f"{name} must be between 0 and 59, got {getattr(self, name)}")
+        if pd.Timestamp(self.start_date) > pd.Timestamp(self.end_date):
+            raise ValueError(f"start_date {self.start_date} is after end_date {self.end_date}")
+        if self.empty_bar_policy not in EMPTY_BAR_POLICIES:
+            raise ValueError(f"empty_bar_policy must be one of {EMPTY_BAR_POLICIES}, got {self.empty_bar_policy!r}")
+        validate_bar_type(self.bar_type, self.bar_size)
+
+    @classmethod
+    def from_mapping(cls, params=None):
+        """
+        StrategyParams from a dict of overrides (missing fields keep their defaults).
+        An existing StrategyParams is returned unchanged.
+
+        Raises:
+            ValueError: For unknown parameter names or invalid values.
+        """
+        if isinstance(params, cls):
+            return params
+        params = dict(params or {})
+        unknown = sorted(set(params) - set(cls.field_names()))
+        if unknown:
+            raise ValueError(f"Unknown strategy parameters: {', '.join(unknown)}")
+        return cls(**params)
+
+    @classmethod
+    def from_variables(cls, owner, **overrides):
+        """
+        StrategyParams from the GUI variables of owner: every attribute named like a
+        parameter and holding a tkinter variable is read with .get().
+        """
+        params = {}
+        for name in cls.field_names():
+            variable = getattr(owner, name, None)
+            if variable is not None and hasattr(variable, 'get'):
+                params[name] = variable.get()
+        params.update(overrides)
+        return cls.from_mapping(params)
+
+    @classmethod
+    def field_names(cls):
+        return tuple(field.name for field in fields(cls))
+
+    def replace(self, **changes):
+        """Copy with some parameters changed (validated again)."""
+        return replace(self, **changes)
+
+    def to_dict(self):
+        return asdict(self)
+
+    def cache_key(self):
+        """Hex digest of the parameters that is stable across processes and runs (unlike hash())."""
+        payload = json.dumps(self.to_dict(), sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def in_paise(self):
+        """
+        The point distances (and the size of range bars) converted from rupees to integer
+        paise, as used by the strategy when integer_prices is on.
+        """
+        changes = {name: to_paise(getattr(self, name)) for name in self.POINT_PARAMETERS}
+        if self.bar_type == 'range':
+            changes['bar_size'] = to_paise(self.bar_size)
+        # Bypass __post_init__: the paise values are no longer normalized to float
+        params = object.__new__(StrategyParams)
+        for field in fields(self):
+            object.__setattr__(params, field.name, changes.get(field.name, getattr(self, field.name)))
+        return params
+
+
+def _normalize(name, field_type, value):
+    """Value converted to the field's type, so equal settings give equal (and equally hashed) params."""
+    if name in ('start_date', 'end_date'):
+        return pd.Timestamp(value).date().isoformat()
+    if name == 'htf_timeframe':
+        return f"{parse_timeframe(value)}m"
+    if value is None and field_type is Optional[float]:
+        return None
+    if field_type is bool:
+        if value in (0, 1):    # also matches True/False and NumPy booleans
+            return bool(value)
+    elif field_type is int:
+        if isinstance(value, numbers.Integral) and not isinstance(value, bool):
+            return int(value)
+        if isinstance(value, numbers.Real) and float(value).is_integer():
+            return int(value)
+    elif field_type in (float, Optional[float]):
+        if isinstance(value, numbers.Real) and not isinstance(value, bool):
+            return float(value)
+    elif isinstance(value, str):
+        return value
+    raise ValueError(f"Invalid value for {name}: {value!r}")
@@ -7,6 +7,7 @@ Demonstrates how to use the refactored backtest.py with both CSV and price_ticks
 import os
 import sys
 from backtest import BacktestEngine, run_backtest_from_file
+from strategy_params import StrategyParams
 
 def test_csv_backtest():
     """Test backtest with CSV file."""
@@ -30,23 +31,23 @@ def test_csv_backtest():
     print(f"Using CSV file: {csv_file}")
     
     # Strategy parameters
-    params = {
-        'use_supertrend': True,
-        'use_ema_crossover': True,
-        'use_rsi_filter': True,
-        'use_vwap': True,
-        'initial_capital': 100000,
-        'base_sl_points': 15,
-        'tp1_points': 25,
-        'tp2_points': 45,
-        'tp3_points': 100,
-        'use_trail_stop': True,
-        'trail_activation_points': 25,
-        'trail_distance_points': 10
-    }
+    params = StrategyParams(
+        use_supertrend=True,
+        use_ema_crossover=True,
+        use_rsi_filter=True,
+        use_vwap=True,
+        initial_capital=100000,
+        base_sl_points=15,
+        tp1_points=25,
+        tp2_points=45,
+        tp3_points=100,
+        use_trail_stop=True,
+        trail_activation_points=25,
+        trail_distance_points=10
+    )
     
     try:
-        results, saved_files = run_backtest_from_file(csv_file, params, 'csv')
+        results, run_id = run_backtest_from_file(csv_file, params, 'csv')
         print("CSV backtest completed successfully!")
         return results
     except Exception as e:
@@ -67,23 +68,23 @@ def test_ticks_backtest():
     print(f"Using ticks file: {ticks_file}")
     
     # Strategy parameters optimized for tick data
-    params = {
-        'use_supertrend': False,
-        'use_ema_crossover': True,
-        'use_rsi_filter': False,
-        'use_vwap': True,
-        'initial_capital': 100000,
-        'base_sl_points': 7,
-        'tp1_points': 25,
-        'tp2_points': 45,
-        'tp3_points': 100,
-        'use_trail_stop': True,
-        'trail_activation_points': 15,
-        'trail_distance_points': 5
-    }
+    params = StrategyParams(
+        use_supertrend=False,
+        use_ema_crossover=True,
+        use_rsi_filter=False,
+        use_vwap=True,
+        initial_capital=100000,
+        base_sl_points=7,
+        tp1_points=25,
+        tp2_points=45,
+        tp3_points=100,
+        use_trail_stop=True,
+        trail_activation_points=15,
+        trail_distance_points=5
+    )
     
     try:
-        results, saved_files = run_backtest_from_file(ticks_file, params, 'ticks')
+        results, run_id = run_backtest_from_file(ticks_file, params, 'ticks')
         print("Ticks backtest completed successfully!")
         return results
     except Exception as e:
@@ -97,17 +98,17 @@ def test_backtest_engine_direct():
     print("="*60)
     
     # Create engine instance
-    params = {
-        'use_supertrend': True,
-        'use_ema_crossover': True,
-        'use_rsi_filter': False,
-        'use_vwap': True,
-        'initial_capital': 50000,
-        'base_sl_points': 10,
-        'tp1_points': 20,
-        'tp2_points': 40,
-        'tp3_points': 80
-    }
+    params = StrategyParams(
+        use_supertrend=True,
+        use_ema_crossover=True,
+        use_rsi_filter=False,
+        use_vwap=True,
+        initial_capital=50000,
+        base_sl_points=10,
+        tp1_points=20,
+        tp2_points=40,
+        tp3_points=80
+    )
     
     engine = BacktestEngine(params)
     
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests of the equity tracker's bounded OHLC series.
+Run with pytest, or as a script from the repository root: python -m smartapi.test_equity_tracker
+"""
+
+import random
+
+from smartapi.equity_tracker import EquityTracker
+
+
+def _random_ticks(rng, n_ticks, start=1_700_000_000):
+    """(epoch seconds, equity) ticks with irregular spacing and occasional long gaps."""
+    now, equity, ticks = start, 100_000.0, []
+    for _ in range(n_ticks):
+        now += rng.uniform(600, 20_000) if rng.random() < 0.05 else rng.uniform(0, 90)
+        equity += rng.gauss(0, 50)
+        ticks.append((now, equity))
+    return ticks
+
+
+def _expected_rows(ticks, width):
+    """OHLC of the ticks grouped by time // width: the series the tracker must hold."""
+    rows = {}
+    for now, equity in ticks:
+        key = now // width
+        if key not in rows:
+            rows[key] = [key * width, equity, equity, equity, equity]
+        else:
+            row = rows[key]
+            row[2], row[3], row[4] = max(row[2], equity), min(row[3], equity), equity
+    return [tuple(row) for _, row in sorted(rows.items())]
+
+
+def _tracked_rows(tracker):
+    rows = [tuple(row) for row in tracker.series[:tracker.count].tolist()]
+    rows.append((tracker._bucket * tracker.bucket_seconds, tracker._open, tracker._high, tracker._low, tracker._close))
+    return rows
+
+
+def test_compacted_series_matches_a_groupby_of_the_ticks():
+    """After many compactions, across tick gaps, the series equals the raw ticks grouped at the final width."""
+    for seed in range(20):
+        rng = random.Random(seed)
+        ticks = _random_ticks(rng, rng.randint(500, 3000))
+        tracker = EquityTracker(100_000.0, bucket_seconds=60, max_points=rng.choice((2, 4, 8, 16)))
+        for now, equity in ticks:
+            tracker.on_tick(now, equity)
+
+        assert tracker.bucket_seconds > 60, "the test must exercise compaction"
+        assert tracker.count <= tracker.max_points
+        assert _tracked_rows(tracker) == _expected_rows(ticks, tracker.bucket_seconds), f"seed {seed}"
+
+
+def test_extremes_are_exact_after_compaction():
+    rng = random.Random(7)
+    ticks = _random_ticks(rng, 2000)
+    tracker = EquityTracker(100_000.0, max_points=4)
+    for now, equity in ticks:
+        tracker.on_tick(now, equity)
+    rows = _tracked_rows(tracker)
+    assert max(row[2] for row in rows) == max(equity for _, equity in ticks)
+    assert min(row[3] for row in rows) == min(equity for _, equity in ticks)
+
+
+def main():
+    for test in (test_compacted_series_matches_a_groupby_of_the_ticks, test_extremes_are_exact_after_compaction):
+        test()
+        print(f"{test.__name__}: ok")
+
+
+if __name__ == "__main__":
+    main()
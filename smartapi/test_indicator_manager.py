@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests of the indicator manager's time-bar handling.
+Run with pytest, or as a script from the repository root: python -m smartapi.test_indicator_manager
+"""
+
+from datetime import datetime
+import pytz
+
+from smartapi.indicator_manager import IndicatorManager
+from smartapi.session_calendar import SessionCalendar
+
+IST = pytz.timezone('Asia/Kolkata')
+
+
+def _at(year, month, day, hour, minute):
+    return IST.localize(datetime(year, month, day, hour, minute))
+
+
+def _feed(manager, calendar, timestamps, price=100.0):
+    """Feeds one tick per timestamp the way ModularIntradayStrategy.on_tick does, with 'carry' empty bars."""
+    for timestamp in timestamps:
+        minute = timestamp.replace(second=0, microsecond=0)
+        if manager.last_processed_minute is None:
+            manager.last_processed_minute = minute
+        if minute > manager.last_processed_minute:
+            manager.roll_to_minute(minute, 'carry', calendar)
+        manager.update_current_bar(timestamp, price, 10)
+
+
+def _history(manager):
+    return [(bar.timestamp, bar.volume) for bar in manager.bar_history]
+
+
+def test_carry_stays_inside_the_session_overnight():
+    """A gap from 15:29 to the next day's open carries no minutes across the night."""
+    manager = IndicatorManager({})
+    calendar = SessionCalendar(IST)
+    _feed(manager, calendar, [
+        _at(2025, 6, 2, 15, 26), _at(2025, 6, 2, 15, 29),
+        _at(2025, 6, 3, 9, 15), _at(2025, 6, 3, 9, 17),
+    ])
+    assert _history(manager) == [
+        (_at(2025, 6, 2, 15, 26), 10),
+        (_at(2025, 6, 2, 15, 27), 0),
+        (_at(2025, 6, 2, 15, 28), 0),
+        (_at(2025, 6, 2, 15, 29), 10),
+        (_at(2025, 6, 3, 9, 15), 10),
+        (_at(2025, 6, 3, 9, 16), 0),
+    ]
+
+
+def test_carry_stays_inside_the_session_over_a_weekend():
+    """A gap from Friday's close to Monday's open carries no minutes; Monday's own gaps still do."""
+    manager = IndicatorManager({})
+    calendar = SessionCalendar(IST)
+    _feed(manager, calendar, [
+        _at(2025, 6, 6, 15, 28), _at(2025, 6, 6, 15, 29),
+        _at(2025, 6, 9, 9, 16), _at(2025, 6, 9, 9, 18),
+    ])
+    assert _history(manager) == [
+        (_at(2025, 6, 6, 15, 28), 10),
+        (_at(2025, 6, 6, 15, 29), 10),
+        (_at(2025, 6, 9, 9, 16), 10),
+        (_at(2025, 6, 9, 9, 17), 0),
+    ]
+
+
+def test_carry_never_crosses_a_date_change_without_a_calendar():
+    manager = IndicatorManager({})
+    _feed(manager, None, [_at(2025, 6, 2, 15, 29), _at(2025, 6, 3, 9, 15), _at(2025, 6, 3, 9, 16)])
+    assert _history(manager) == [(_at(2025, 6, 2, 15, 29), 10), (_at(2025, 6, 3, 9, 15), 10)]
+
+
+def main():
+    for test in (test_carry_stays_inside_the_session_overnight,
+                 test_carry_stays_inside_the_session_over_a_weekend,
+                 test_carry_never_crosses_a_date_change_without_a_calendar):
+        test()
+        print(f"{test.__name__}: ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import os
+import glob
+import queue
+import threading
+import numpy as np
+import pandas as pd
+from .log_utils import logger
+from .prices import PAISE_PER_RUPEE
+
+
+class TickBuffer:
+    """
+    Chunked columnar buffer for raw live ticks.
+    Ticks are appended into preallocated NumPy arrays. Every full chunk is handed
+    to a background writer thread and spilled to disk, so memory stays flat for the
+    whole session and the spilled chunks survive a crash of the trading process.
+    Prices given in integer paise are stored as int32, a third less memory and disk
+    per tick than float64, and converted to rupees only when the ticks are exported.
+    """
+    def __init__(self, spill_dir, chunk_size=50000, tz='Asia/Kolkata', integer_prices=False):
+        """
+        Args:
+            spill_dir (str): Directory where full chunks are written as .npz files.
+            chunk_size (int): Number of ticks held in memory before a chunk is spilled.
+            tz (str): Timezone used when converting timestamps back for export.
+            integer_prices (bool): Prices are appended as integer paise.
+        """
+        self.spill_dir = spill_dir
+        self.chunk_size = chunk_size
+        self.tz = tz
+        self.integer_prices = integer_prices
+
+        self._timestamps, self._prices, self._volumes = self._allocate_chunk()
+        self._pos = 0
+        self._chunk_index = 0
+        self._spilled_count = 0
+        self._spill_files = []
+
+        self._queue = queue.Queue()
+        self._writer_thread = None
+        self._lock = threading.Lock()
+
+    def _allocate_chunk(self):
+        return (
+            np.empty(self.chunk_size, dtype=np.int64),    # epoch milliseconds
+            np.empty(self.chunk_size, dtype=np.int32 if self.integer_prices else np.float64),
+            np.empty(self.chunk_size, dtype=np.int64),
+        )
+
+    def __len__(self):
+        return self._spilled_count + self._pos
+
+    def append(self, timestamp, price, volume):
+        """Appends one tick. The timestamp must be timezone-aware."""
+        pos = self._pos
+        self._timestamps[pos] = int(timestamp.timestamp() * 1000)
+        self._prices[pos] = price
+        self._volumes[pos] = volume
+        self._pos = pos + 1
+
+        if self._pos == self.chunk_size:
+            self._spill_current_chunk()
+
+    def _spill_current_chunk(self):
+        """Hands the full chunk to the writer thread and starts a fresh one."""
+        chunk = (self._chunk_index, self._timestamps, self._prices, self._volumes)
+        self._chunk_index += 1
+        self._spilled_count += self._pos
+        self._timestamps, self._prices, self._volumes = self._allocate_chunk()
+        self._pos = 0
+
+        if self._writer_thread is None:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            self._writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+            self._writer_thread.start()
+        self._queue.put(chunk)
+
+    def _writer_loop(self):
+        """Background loop that writes queued chunks to disk."""
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                self._queue.task_done()
+                break
+            index, timestamps, prices, volumes = chunk
+            path = os.path.join(self.spill_dir, f"chunk_{index:05d}.npz")
+            tmp_path = path + ".tmp"
+            try:
+                with open(tmp_path, 'wb') as f:
+                    np.savez(f, timestamp=timestamps, price=prices, volume=volumes)
+                os.replace(tmp_path, path)
+                with self._lock:
+                    self._spill_files.append(path)
+            except Exception as e:
+                logger.error(f"Failed to spill tick chunk {index} to {path}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Blocks until all queued chunks have been written to disk."""
+        if self._writer_thread is not None:
+            self._queue.join()
+
+    def to_frame(self):
+        """Returns all buffered ticks (spilled and in-memory) as a DataFrame."""
+        self.flush()
+        with self._lock:
+            spill_files = sorted(self._spill_files)
+
+        timestamps, prices, volumes = [], [], []
+        for path in spill_files:
+            with np.load(path) as data:
+                timestamps.append(data['timestamp'])
+                prices.append(self._prices_in_rupees(data['price']))
+                volumes.append(data['volume'])
+        timestamps.append(self._timestamps[:self._pos])
+        prices.append(self._prices_in_rupees(self._prices[:self._pos]))
+        volumes.append(self._volumes[:self._pos])
+
+        return self._build_frame(np.concatenate(timestamps), np.concatenate(prices), np.concatenate(volumes))
+
+    @staticmethod
+    def _prices_in_rupees(prices):
+        # Chunks of an integer-price buffer hold paise; exports are always in rupees
+        return prices / PAISE_PER_RUPEE if prices.dtype.kind == 'i' else prices
+
+    def _build_frame(self, timestamps, prices, volumes):
+        return pd.DataFrame({
+            'timestamp': pd.to_datetime(timestamps, unit='ms', utc=True).tz_convert(self.tz),
+            'price': prices,
+            'volume': volumes,
+        })
+
+    def export_csv(self, csv_path):
+        """Writes all buffered ticks to a single CSV file (timestamp,price,volume)."""
+        df_ticks = self.to_frame()
+        df_ticks.to_csv(csv_path, index=False)
+        return len(df_ticks)
+
+    def close(self, cleanup=True):
+        """
+        Stops the writer thread. With cleanup=True the spilled chunk files are
+        removed, which should only be done after a successful export.
+        """
+        if self._writer_thread is not None:
+            self._queue.put(None)
+            self._writer_thread.join(timeout=10)
+            self._writer_thread = None
+
+        if cleanup:
+            with self._lock:
+                spill_files, self._spill_files = self._spill_files, []
+            for path in spill_files:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            try:
+                os.rmdir(self.spill_dir)
+            except OSError:
+                pass
+
+    @classmethod
+    def recover(cls, spill_dir, tz='Asia/Kolkata'):
+        """
+        Rebuilds a DataFrame from the chunk files left behind in spill_dir,
+        e.g. after the trading process crashed before it could export.
+        Chunks of integer-price buffers are recognised by their dtype.
+        """
+        buffer = cls(spill_dir, chunk_size=1, tz=tz)
+        buffer._spill_files = sorted(glob.glob(os.path.join(spill_dir, "chunk_*.npz")))
+        return buffer.to_frame()
@@ -0,0 +1,124 @@
+from datetime import time, timedelta
+import numpy as np
+import pandas as pd
+from .records import Bar
+
+# Intraday bars are aligned to the NSE session open, like the exchange's own candles
+SESSION_ANCHOR = time(9, 15)
+
+
+def parse_timeframe(timeframe):
+    """Returns the length in minutes of a timeframe given as minutes or a string like '5m' or '1h'."""
+    if isinstance(timeframe, (int, np.integer)):
+        minutes = int(timeframe)
+    else:
+        text = str(timeframe).strip().lower()
+        if text.endswith('h'):
+            minutes = int(text[:-1]) * 60
+        elif text.endswith('m'):
+            minutes = int(text[:-1])
+        else:
+            minutes = int(text)
+    if minutes < 1:
+        raise ValueError(f"Invalid timeframe: {timeframe!r}")
+    return minutes
+
+
+def bucket_start(timestamp, minutes, anchor=SESSION_ANCHOR):
+    """Start of the `minutes`-long bar containing timestamp, counted from the session anchor of its day."""
+    anchor_time = timestamp.replace(hour=anchor.hour, minute=anchor.minute, second=0, microsecond=0)
+    offset = int((timestamp - anchor_time).total_seconds() // 60)
+    return anchor_time + timedelta(minutes=(offset // minutes) * minutes)
+
+
+def bucket_starts(timestamps, minutes, anchor=SESSION_ANCHOR):
+    """Vectorized bucket_start for a Series of aware timestamps."""
+    anchors = timestamps.dt.normalize() + pd.Timedelta(hours=anchor.hour, minutes=anchor.minute)
+    offsets = (timestamps - anchors) // pd.Timedelta(minutes=1)
+    return anchors + pd.to_timedelta((offsets // minutes) * minutes, unit='min')
+
+
+class TimeframeAggregator:
+    """
+    Rolls completed 1-minute bars up into bars of a longer interval.
+    A bar is completed as soon as its last minute has closed, or when a 1-minute
+    bar of a later interval arrives (e.g. after minutes without ticks).
+    """
+    def __init__(self, minutes, max_history=100):
+        """
+        Args:
+            minutes (int): Length of the aggregated bars in minutes.
+            max_history (int): Number of completed bars kept.
+        """
+        self.minutes = minutes
+        self.max_history = max_history
+        self.bars = []
+        self.current = None
+
+    def add_bar(self, bar):
+        """Adds one completed 1-minute Bar. Returns the aggregated bars it completed (oldest first)."""
+        completed = []
+        start = bucket_start(bar.timestamp, self.minutes)
+        if self.current is not None and self.current.timestamp != start:
+            completed.append(self._close_current())
+
+        current = self.current
+        if current is None:
+            self.current = Bar(bar.open, bar.high, bar.low, bar.close, bar.volume, start)
+        else:
+            current.high = max(current.high, bar.high)
+            current.low = min(current.low, bar.low)
+            current.close = bar.close
+            current.volume += bar.volume
+
+        if bar.timestamp + timedelta(minutes=1) >= start + timedelta(minutes=self.minutes):
+            completed.append(self._close_current())
+        return completed
+
+    def _close_current(self):
+        bar, self.current = self.current, None
+        self.bars.append(bar)
+        if len(self.bars) > self.max_history:
+            self.bars.pop(0)
+        return bar
+
+    def seed(self, df):
+        """
+        Rebuilds the aggregated bars from 1-minute bars (DataFrame, oldest first) in one pass.
+        Returns (closed_df, completed_at): the completed bars and, for each of them, the
+        position in df of the 1-minute bar whose close completed it.
+        """
+        self.bars, self.current = [], None
+        if df.empty:
+            return df.iloc[0:0], np.array([], dtype=int)
+
+        starts = bucket_starts(df['timestamp'], self.minutes)
+        group = np.concatenate(([0], np.cumsum(starts.to_numpy()[1:] != starts.to_numpy()[:-1])))
+        grouped = df.groupby(group, sort=False)
+        agg = pd.DataFrame({
+            'timestamp': starts.groupby(group, sort=False).first(),
+            'open': grouped['open'].first(), 'high': grouped['high'].max(), 'low': grouped['low'].min(),
+            'close': grouped['close'].last(), 'volume': grouped['volume'].sum(),
+        }).reset_index(drop=True)
+
+        first_index = grouped.indices
+        last_rows = np.array([first_index[g][-1] for g in range(len(agg))])
+        first_rows = np.array([first_index[g][0] for g in range(len(agg))])
+        minute_ends = df['timestamp'].iloc[last_rows].reset_index(drop=True) + pd.Timedelta(minutes=1)
+        full = (minute_ends >= agg['timestamp'] + pd.Timedelta(minutes=self.minutes)).to_numpy()
+
+        # An unfinished interval is completed by the first bar of the next one
+        completed_at = np.where(full, last_rows, np.append(first_rows[1:], -1))
+        closed = completed_at >= 0
+        if not closed[-1]:
+            last = agg.iloc[-1]
+            self.current = Bar(last['open'].item(), last['high'].item(), last['low'].item(), last['close'].item(),
+                               last['volume'].item(), last['timestamp'].to_pydatetime())
+        return agg[closed].reset_index(drop=True), completed_at[closed]
+
+    def get_state(self):
+        return {'bars': list(self.bars), 'current': self.current.copy() if self.current else None}
+
+    def set_state(self, state):
+        self.bars = [bar.copy() for bar in state['bars'][-self.max_history:]]
+        self.current = state['current'].copy() if state['current'] else None
@@ -0,0 +1,238 @@
+import os
+import time
+import json
+import argparse
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from tabulate import tabulate
+from .log_utils import logger
+from .optimizer import (METRICS, SUMMARY_FIELDS, expand_grid, score_results, trading_day_starts,
+                        _init_worker, _evaluate, _backtest_slice)
+from .strategy_params import StrategyParams
+
+# Bar positions [train_start, train_end) and [test_start, test_end) of one walk-forward step
+WalkForwardWindow = namedtuple('WalkForwardWindow', ['index', 'train_start', 'train_end', 'test_start', 'test_end'])
+
+
+class WalkForwardEngine:
+    """
+    Rolling in-sample / out-of-sample evaluation.
+    The history is cut into windows of train_days followed by test_days trading days,
+    moved forward by step_days. On every train window each candidate is backtested and
+    the best by the metric is chosen; the chosen parameters are then backtested on the
+    test window that follows, which they have never seen. The test results are stitched
+    into one out-of-sample equity curve.
+    All train backtests of all windows run as one batch on a process pool, followed by
+    all test backtests. Every worker receives the bars once and keeps its own indicator
+    cache, and each backtest is seeded with warmup_bars bars before its window, so
+    indicators are ready from the window's first bar.
+    """
+    def __init__(self, bars, candidates, train_days=60, test_days=20, step_days=None, metric='profit_factor',
+                 min_trades=1, warmup_bars=200, max_workers=None):
+        """
+        Args:
+            bars (pd.DataFrame): 1-minute bars (BacktestEngine.load_bars), oldest first.
+            candidates (list): StrategyParams (or dicts) to choose from on every train window.
+            train_days (int): Trading days of each in-sample window.
+            test_days (int): Trading days of each out-of-sample window.
+            step_days (int): Trading days between window starts; defaults to test_days, so the
+                             test windows follow each other without overlap.
+            metric (str): Key of optimizer.METRICS the candidates are ranked by.
+            min_trades (int): Candidates with fewer trades in a train window score -inf there.
+            warmup_bars (int): Bars before a window used to seed the indicators.
+            max_workers (int): Worker processes; defaults to the CPU count.
+        """
+        if metric not in METRICS:
+            raise ValueError(f"metric must be one of {sorted(METRICS)}, got {metric!r}")
+        if train_days < 1 or test_days < 1:
+            raise ValueError("train_days and test_days must be at least 1")
+        self.bars = bars
+        self.candidates = list(dict.fromkeys(StrategyParams.from_mapping(c) for c in candidates))
+        if not self.candidates:
+            raise ValueError("No candidates to choose from")
+        for candidate in self.candidates:
+            if candidate.bar_type != 'time':
+                raise ValueError("The walk-forward replays 1-minute bars; activity-bar candidates need tick data")
+        self.train_days = train_days
+        self.test_days = test_days
+        self.step_days = step_days or test_days
+        self.metric = metric
+        self.min_trades = min_trades
+        self.warmup_bars = warmup_bars
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    @classmethod
+    def from_file(cls, data_file, candidates, data_type='csv', **kwargs):
+        """Walk-forward over the bars of a CSV or price_ticks.log file."""
+        from .backtest import BacktestEngine
+        return cls(BacktestEngine().load_bars(data_file, data_type), candidates, **kwargs)
+
+    def windows(self):
+        """The walk-forward windows; the last test window may be shorter than test_days."""
+        day_starts = trading_day_starts(self.bars)
+        n_days = len(day_starts) - 1
+        windows = []
+        first_day = 0
+        while first_day + self.train_days < n_days:
+            test_day = first_day + self.train_days
+            end_day = min(test_day + self.test_days, n_days)
+            windows.append(WalkForwardWindow(len(windows), int(day_starts[first_day]), int(day_starts[test_day]),
+                                             int(day_starts[test_day]), int(day_starts[end_day])))
+            first_day += self.step_days
+        if not windows:
+            raise ValueError(f"{n_days} trading days are not enough for a {self.train_days}-day train window "
+                             f"and a test window")
+        return windows
+
+    def run(self):
+        """
+        Runs the walk-forward. Returns a dict with:
+            windows: per window the chosen params, their train and test summaries and scores
+            equity_df: stitched out-of-sample equity (timestamp, equity, window)
+            trades_df: out-of-sample trades of all windows
+            summary: stability report (see stability_summary)
+        """
+        windows = self.windows()
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                 initargs=(self.bars,)) as pool:
+            jobs = [(window, params) for window in windows for params in self.candidates]
+            train_summaries = list(pool.map(
+                _evaluate, [params for _, params in jobs], [window.train_end for window, _ in jobs],
+                [window.train_start for window, _ in jobs], [self.warmup_bars] * len(jobs)
+            ))
+            logger.info(f"Walk-forward: {len(jobs)} train backtests over {len(windows)} windows "
+                        f"in {time.perf_counter() - started:.1f}s")
+
+            chosen = []
+            for window in windows:
+                scored = [(score_results(summary, self.metric, self.min_trades), position, summary)
+                          for position, ((job_window, _), summary) in enumerate(zip(jobs, train_summaries))
+                          if job_window is window]
+                score, position, summary = max(scored, key=lambda item: (item[0], -item[1]))
+                chosen.append((jobs[position][1], score, summary))
+
+            test_results = list(pool.map(
+                _backtest_slice, [params for params, _, _ in chosen], [window.test_start for window in windows],
+                [window.test_end for window in windows], [self.warmup_bars] * len(windows)
+            ))
+        logger.info(f"Walk-forward finished in {time.perf_counter() - started:.1f}s")
+
+        rows = []
+        for window, (params, train_score, train_summary), results in zip(windows, chosen, test_results):
+            test_summary = {"error": results["error"]} if "error" in results else \
+                {field: results[field] for field in SUMMARY_FIELDS}
+            rows.append({
+                'window': window.index,
+                'train_from': self.bars.index[window.train_start], 'test_from': self.bars.index[window.test_start],
+                'test_to': self.bars.index[window.test_end - 1],
+                'params': params, 'train_score': train_score,
+                'test_score': score_results(test_summary, self.metric, 1),
+                'train': train_summary, 'test': test_summary,
+            })
+        equity_df, trades_df = self._stitch(windows, chosen, test_results)
+        return {'windows': rows, 'equity_df': equity_df, 'trades_df': trades_df,
+                'summary': self.stability_summary(rows, equity_df)}
+
+    def _stitch(self, windows, chosen, test_results):
+        """
+        Joins the test equity curves: each window's curve is scaled to start at the equity
+        the previous window ended with, as if the capital had been carried over.
+        """
+        capital = chosen[0][0].initial_capital
+        equity_parts = [pd.DataFrame({'timestamp': [self.bars.index[windows[0].test_start]], 'equity': [capital],
+                                      'window': [windows[0].index]})]
+        trade_parts = []
+        for window, (params, _, _), results in zip(windows, chosen, test_results):
+            if "error" in results:
+                continue
+            scale = capital / params.initial_capital
+            equity = results['equity_df'].dropna(subset=['timestamp']).copy()
+            equity['equity'] = equity['equity'] * scale
+            equity['window'] = window.index
+            equity_parts.append(equity)
+            trades = results['trades_df'].copy()
+            trades['pnl'] = trades['pnl'] * scale
+            trades['window'] = window.index
+            trade_parts.append(trades)
+            if not equity.empty:
+                capital = equity['equity'].iloc[-1]
+        equity_df = pd.concat(equity_parts, ignore_index=True)
+        trades_df = pd.concat(trade_parts, ignore_index=True) if trade_parts else pd.DataFrame()
+        return equity_df, trades_df
+
+    def stability_summary(self, rows, equity_df):
+        """
+        Out-of-sample performance and how stable it is across windows:
+            oos_return / oos_max_drawdown: of the stitched equity curve (%)
+            profitable_windows: share of test windows with a positive return (%)
+            efficiency: mean daily test return / mean daily train return of the chosen params
+            distinct_params / param_changes: how often the train windows chose differently
+        """
+        equity = equity_df['equity'].to_numpy(dtype=float)
+        peak = np.maximum.accumulate(equity)
+        test_returns = [row['test'].get('total_return', 0.0) for row in rows]
+        train_returns = [row['train'].get('total_return', 0.0) for row in rows]
+        train_daily = np.mean(train_returns) / self.train_days
+        test_daily = np.mean(test_returns) / self.test_days
+        chosen = [row['params'] for row in rows]
+        return {
+            'windows': len(rows),
+            'oos_return': (equity[-1] / equity[0] - 1) * 100,
+            'oos_max_drawdown': float(np.max((peak - equity) / peak) * 100),
+            'oos_trades': sum(row['test'].get('total_trades', 0) for row in rows),
+            'profitable_windows': 100.0 * sum(r > 0 for r in test_returns) / len(rows),
+            'mean_train_score': float(np.mean([row['train_score'] for row in rows])),
+            'mean_test_score': float(np.mean([row['test_score'] for row in rows])),
+            'efficiency': test_daily / train_daily if train_daily else float('nan'),
+            'distinct_params': len(set(chosen)),
+            'param_changes': sum(a != b for a, b in zip(chosen, chosen[1:])),
+        }
+
+    def print_report(self, result):
+        """Prints the per-window table and the stability summary."""
+        varying = [name for name in StrategyParams.field_names()
+                   if len({getattr(candidate, name) for candidate in self.candidates}) > 1]
+        table = [[row['window'], row['test_from'].date(), row['test_to'].date()]
+                 + [getattr(row['params'], name) for name in varying]
+                 + [row['train_score'], row['test_score'], row['test'].get('total_return', 0.0),
+                    row['test'].get('total_trades', 0)]
+                 for row in result['windows']]
+        headers = ["Window", "Test from", "Test to"] + varying + [
+            f"Train {self.metric}", f"Test {self.metric}", "Test return (%)", "Test trades"]
+        print(tabulate(table, headers=headers, floatfmt=".2f", tablefmt="grid"))
+        print(tabulate([[key, value] for key, value in result['summary'].items()],
+                       headers=["Out-of-sample", "Value"], floatfmt=".2f", tablefmt="grid"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward optimization and out-of-sample validation.")
+    parser.add_argument("data_file", help="CSV (or price_ticks.log) file with the bars.")
+    parser.add_argument("grid", help='JSON file with the grid, e.g. {"fast_ema": [5, 9, 13], "slow_ema": [21, 34]}.')
+    parser.add_argument("--data-type", default='csv', choices=['csv', 'ticks'])
+    parser.add_argument("--metric", default='profit_factor', choices=sorted(METRICS))
+    parser.add_argument("--train-days", type=int, default=60)
+    parser.add_argument("--test-days", type=int, default=20)
+    parser.add_argument("--step-days", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--equity-csv", help="Write the stitched out-of-sample equity curve to this file.")
+    args = parser.parse_args()
+
+    with open(args.grid, 'r') as f:
+        grid = json.load(f)
+    base_params = grid.pop('base', None)
+    engine = WalkForwardEngine.from_file(
+        args.data_file, expand_grid(grid, base_params), data_type=args.data_type, train_days=args.train_days,
+        test_days=args.test_days, step_days=args.step_days, metric=args.metric, max_workers=args.workers
+    )
+    result = engine.run()
+    engine.print_report(result)
+    if args.equity_csv:
+        result['equity_df'].to_csv(args.equity_csv, index=False)
+        print(f"Out-of-sample equity saved to: {args.equity_csv}")
+
+
+if __name__ == "__main__":
+    main()
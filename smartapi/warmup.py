@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+import pandas as pd
+import pytz
+from .log_utils import logger
+from .websocket_stream import CANDLE_EXCHANGE_NAMES
+from .records import Bar
+
+
+def fetch_candles(smart_api, token, exchange_type=1, lookback_days=4, now=None):
+    """
+    Fetches recent 1-minute candles with SmartConnect.getCandleData.
+    The minute still forming at `now` is left out, it is built from live ticks.
+
+    Args:
+        smart_api (SmartConnect): Logged-in SmartAPI client.
+        token (str): Instrument token.
+        exchange_type (int): WebSocket exchange type of the token (1: NSE_CM, 2: NSE_FO, ...).
+        lookback_days (int): Calendar days to look back; 4 covers a weekend plus a holiday.
+        now (datetime): Reference time, defaults to the current IST time.
+
+    Returns:
+        list: Bar records, oldest first.
+    """
+    ist_tz = pytz.timezone('Asia/Kolkata')
+    exchange = CANDLE_EXCHANGE_NAMES.get(exchange_type)
+    if exchange is None:
+        logger.warning(f"No candle exchange mapping for exchange type {exchange_type}; cannot warm up {token}.")
+        return []
+
+    to_minute = (now or datetime.now(ist_tz)).replace(second=0, microsecond=0)
+    from_minute = (to_minute - timedelta(days=lookback_days)).replace(hour=9, minute=15)
+    params = {
+        "exchange": exchange,
+        "symboltoken": str(token),
+        "interval": "ONE_MINUTE",
+        "fromdate": from_minute.strftime("%Y-%m-%d %H:%M"),
+        "todate": to_minute.strftime("%Y-%m-%d %H:%M"),
+    }
+    try:
+        response = smart_api.getCandleData(params)
+    except Exception as e:
+        logger.error(f"Warm-up candle request for token {token} failed: {e}")
+        return []
+    if not response or not response.get('status') or not response.get('data'):
+        logger.warning(f"Warm-up candle request for token {token} returned no data: {response}")
+        return []
+
+    bars = []
+    for row in response['data']:
+        bar_time = datetime.fromisoformat(row[0]).astimezone(ist_tz)
+        if bar_time >= to_minute:
+            continue
+        bars.append(Bar(float(row[1]), float(row[2]), float(row[3]), float(row[4]), int(row[5]), bar_time))
+    return bars
+
+
+def load_candles_csv(csv_path, until=None, tz='Asia/Kolkata'):
+    """
+    Loads 1-minute candles from the local data store (timestamp,open,high,low,close,volume;
+    timestamps like '20250602 13:00' or ISO). Bars at or after `until` are dropped.
+
+    Returns:
+        list: Bar records, oldest first.
+    """
+    df = pd.read_csv(csv_path)
+    try:
+        timestamps = pd.to_datetime(df['timestamp'], format='%Y%m%d %H:%M')
+    except (ValueError, TypeError):
+        timestamps = pd.to_datetime(df['timestamp'])
+    if timestamps.dt.tz is None:
+        timestamps = timestamps.dt.tz_localize(tz)
+    else:
+        timestamps = timestamps.dt.tz_convert(tz)
+
+    df = df.assign(timestamp=timestamps).sort_values('timestamp')
+    if until is not None:
+        df = df[df['timestamp'] < pd.Timestamp(until).floor('min')]
+
+    return [
+        Bar(float(o), float(h), float(l), float(c), int(v), ts.to_pydatetime())
+        for ts, o, h, l, c, v in zip(df['timestamp'], df['open'], df['high'], df['low'], df['close'], df['volume'])
+    ]
@@ -3,31 +3,55 @@ import threading
 import time
 import json
 import os
+import random
 from datetime import datetime
 import pytz
 from SmartApi.smartWebSocketV2 import SmartWebSocketV2
 from .log_utils import logger, tick_logger # Import our new loggers
-from .login import login # The class now depends on the login function
+from .login import login, invalidate_session # The class now depends on the login function
+from .records import Bar
+
+# Exchange names expected by the historical candle API, keyed by WebSocket exchange type.
+CANDLE_EXCHANGE_NAMES = {1: "NSE", 2: "NFO", 3: "BSE", 4: "BFO", 5: "MCX", 7: "NCDEX", 13: "CDS"}
+
+# Handshake statuses and error texts with which the feed rejects the session itself
+AUTH_ERROR_STATUSES = (401, 403)
+AUTH_ERROR_MARKERS = ("unauthorized", "forbidden", "invalid token", "token expired", "session expired",
+                      "handshake status 401", "handshake status 403")
 
 class WebSocketStreamer:
     """
     Handles connection to the SmartAPI WebSocket feed.
     It now manages its own authentication, subscribes to instruments,
     and calls a callback function for each received tick.
+    One streamer can carry many instruments across exchange types on a single
+    connection; ticks are routed by token to the handlers registered for it.
+    A supervisor loop reconnects with jittered exponential backoff, reusing the
+    session tokens, and backfills the minutes missed while the feed was down.
+    A fresh login is only made when the feed rejects the session, never for
+    ordinary network failures.
     """
-    def __init__(self, instrument_keys, on_tick_callback, exchange_type=1, feed_mode=1, log_ticks=False):
+    def __init__(self, instrument_keys=None, on_tick_callback=None, exchange_type=1, feed_mode=1, log_ticks=False,
+                 on_backfill_callback=None, base_reconnect_delay=2, max_reconnect_delay=60,
+                 max_reconnect_attempts=20, integer_prices=False):
         """
         Args:
             instrument_keys (list): A list of instrument tokens (as strings) to subscribe to.
-            on_tick_callback (function): The function to call with tick data.
+                                    More can be added later with add_instrument().
+            on_tick_callback (function): The function to call with tick data of instrument_keys.
                                          Expected signature: on_tick(timestamp, price, volume)
-            exchange_type (int): The exchange type (1: NSE_CM, 2: NSE_FO, etc.).
+            exchange_type (int): The default exchange type (1: NSE_CM, 2: NSE_FO, etc.).
             feed_mode (int): The feed type (1: LTP, 2: Quote, 3: SnapQuote).
             log_ticks (bool): If True, prints every tick to the console for real-time monitoring.
+            on_backfill_callback (function): Called after a reconnect with the 1-minute bars
+                                             missed during the outage. Expected signature:
+                                             on_backfill(bars), bars being a list of Bar records.
+            base_reconnect_delay (float): Initial reconnect delay in seconds.
+            max_reconnect_delay (float): Upper bound for the reconnect delay in seconds.
+            max_reconnect_attempts (int): Consecutive failed attempts before giving up (None = never).
+            integer_prices (bool): If True, tick prices are passed on as the exchange's integer
+                                   paise instead of float rupees.
         """
-        self.instrument_keys = instrument_keys
-        self.on_tick_callback = on_tick_callback
-
         # Internal state for credentials and connection objects
         self.api_key = None
         self.client_id = None
@@ -42,15 +66,94 @@ class WebSocketStreamer:
         self.exchange_type = exchange_type
         self.feed_mode = feed_mode
         self.log_ticks = log_ticks
+        self.integer_prices = integer_prices
+
+        # Reconnect supervisor state
+        self.base_reconnect_delay = base_reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.max_reconnect_attempts = max_reconnect_attempts
+        self._stop_event = threading.Event()
+        self._opened = False
+        self._paused = False
+        self._connected = False
+        self._disconnected_at = None
+        self._auth_rejected = False
+
+        # Connection metrics
+        self.reconnect_count = 0
+        self.recovery_times = []
+        self.backfilled_bars = 0
+
+        # Per-token routing tables. Handler tuples are replaced rather than mutated,
+        # so the WebSocket thread can read them without taking the lock.
+        self._routes_lock = threading.Lock()
+        self._token_exchange = {}
+        self._tick_handlers = {}
+        self._backfill_handlers = {}
+        self._last_tick_times = {}
+
+        for token in instrument_keys or []:
+            self.add_instrument(token, on_tick_callback, on_backfill=on_backfill_callback)
+
+    @property
+    def instrument_keys(self):
+        """Tokens currently routed by this streamer."""
+        return list(self._token_exchange)
+
+    def add_instrument(self, token, on_tick, exchange_type=None, on_backfill=None):
+        """
+        Routes ticks of `token` to on_tick(timestamp, price, volume). Several handlers
+        may share a token. If the stream is live, the token is subscribed right away.
+        """
+        token = str(token)
+        with self._routes_lock:
+            is_new = token not in self._token_exchange
+            if is_new:
+                self._token_exchange[token] = exchange_type or self.exchange_type
+            if on_tick:
+                self._tick_handlers[token] = self._tick_handlers.get(token, ()) + (on_tick,)
+            if on_backfill:
+                self._backfill_handlers[token] = self._backfill_handlers.get(token, ()) + (on_backfill,)
+            exchange_types = {token: self._token_exchange[token]}
+
+        if is_new and self._connected and not self._paused:
+            self._send_subscription(exchange_types, subscribe=True)
+
+    def remove_instrument(self, token, on_tick=None, on_backfill=None):
+        """
+        Removes a handler for `token` (all handlers if on_tick is None). The token is
+        unsubscribed once no tick handler is left.
+        """
+        token = str(token)
+        with self._routes_lock:
+            if token not in self._token_exchange:
+                return
+            if on_tick is None:
+                self._tick_handlers.pop(token, None)
+                self._backfill_handlers.pop(token, None)
+            else:
+                self._tick_handlers[token] = tuple(h for h in self._tick_handlers.get(token, ()) if h != on_tick)
+                self._backfill_handlers[token] = tuple(h for h in self._backfill_handlers.get(token, ()) if h != on_backfill)
+
+            if self._tick_handlers.get(token):
+                return
+            exchange_types = {token: self._token_exchange.pop(token)}
+            self._tick_handlers.pop(token, None)
+            self._backfill_handlers.pop(token, None)
+            self._last_tick_times.pop(token, None)
+
+        if self._connected and not self._paused:
+            self._send_subscription(exchange_types, subscribe=False)
 
-    def _authenticate_and_get_tokens(self):
+    def _authenticate_and_get_tokens(self, force_refresh=False):
         """
         Handles the entire authentication process and sets instance attributes.
+        The cached session from login() is used unless force_refresh is True.
         Returns True on success, False on failure.
         """
-        logger.info("Performing login to get session tokens for WebSocket...")
+        logger.info("Getting session tokens for WebSocket...")
         try:
-            self.smart_api, self.auth_token, _ = login()
+            self.smart_api, self.auth_token, _ = login(force_refresh=force_refresh)
             if not self.smart_api or not self.auth_token:
                 logger.error("Authentication failed. Cannot proceed with WebSocket.")
                 return False
@@ -73,31 +176,111 @@ class WebSocketStreamer:
     def _on_open(self, wsapp):
         """Callback executed when the WebSocket connection is opened."""
         logger.info("WebSocket Connection Opened.")
-        self._subscribe()
+        self._opened = True
+        self._connected = True
+        # Taken before subscribing, as the first live tick clears the outage and moves each token's gap start
+        reconnected = self._disconnected_at is not None
+        last_tick_times = dict(self._last_tick_times)
+        if not self._paused:
+            self._subscribe()
+        if reconnected:
+            self.reconnect_count += 1
+            logger.info(f"WebSocket reconnected (reconnect #{self.reconnect_count}).")
+            # The candle requests block, so they run off the WebSocket thread while live ticks flow
+            threading.Thread(target=self._backfill_gap, args=(last_tick_times,), daemon=True).start()
 
-    def _subscribe(self):
-        """Subscribes to the list of instrument tokens."""
-        if not self.is_running or not self.sws:
-            logger.warning("Cannot subscribe, WebSocket is not running.")
+    def _backfill_gap(self, last_tick_times):
+        """
+        Fetches, per token, the 1-minute candles missed since its last tick before the
+        outage (last_tick_times: token -> timestamp) and hands them to the token's
+        backfill handlers. The minute currently forming is left to the live ticks.
+        Runs on a worker thread after a reconnect; the handlers serialise it with the
+        live ticks.
+        """
+        if not self.smart_api:
             return
 
-        logger.info(f"Subscribing to tokens: {self.instrument_keys} on exchange type {self.exchange_type} with mode {self.feed_mode}")
-        token_list = [{"exchangeType": self.exchange_type, "tokens": self.instrument_keys}]
-        self.sws.subscribe(correlation_id="strategy_sub", mode=self.feed_mode, token_list=token_list)
+        to_minute = datetime.now(self.ist_tz).replace(second=0, microsecond=0)
+        for token, handlers in list(self._backfill_handlers.items()):
+            last_tick_time = last_tick_times.get(token)
+            if not handlers or last_tick_time is None:
+                continue
+            from_minute = last_tick_time.replace(second=0, microsecond=0)
+            if to_minute <= from_minute:
+                continue
+
+            exchange_type = self._token_exchange.get(token, self.exchange_type)
+            exchange = CANDLE_EXCHANGE_NAMES.get(exchange_type)
+            if exchange is None:
+                logger.warning(f"No candle exchange mapping for exchange type {exchange_type}; skipping backfill of {token}.")
+                continue
+
+            params = {
+                "exchange": exchange,
+                "symboltoken": token,
+                "interval": "ONE_MINUTE",
+                "fromdate": from_minute.strftime("%Y-%m-%d %H:%M"),
+                "todate": to_minute.strftime("%Y-%m-%d %H:%M"),
+            }
+            try:
+                response = self.smart_api.getCandleData(params)
+                if not response or not response.get('status') or not response.get('data'):
+                    logger.warning(f"Backfill for token {token} returned no data: {response}")
+                    continue
+
+                bars = []
+                for row in response['data']:
+                    bar_time = datetime.fromisoformat(row[0]).astimezone(self.ist_tz)
+                    if bar_time >= to_minute:
+                        continue
+                    bars.append(Bar(float(row[1]), float(row[2]), float(row[3]), float(row[4]), int(row[5]), bar_time))
+
+                logger.info(f"Backfilling {len(bars)} bars for token {token} ({params['fromdate']} -> {params['todate']}).")
+                self.backfilled_bars += len(bars)
+                for handler in handlers:
+                    handler(bars)
+            except Exception as e:
+                logger.error(f"Backfill for token {token} failed: {e}")
+
+    def _subscribe(self):
+        """Subscribes to all routed instrument tokens."""
+        with self._routes_lock:
+            exchange_types = dict(self._token_exchange)
+        self._send_subscription(exchange_types, subscribe=True)
 
     def _unsubscribe(self):
-        """Unsubscribes from the list of instrument tokens."""
+        """Unsubscribes from all routed instrument tokens."""
+        with self._routes_lock:
+            exchange_types = dict(self._token_exchange)
+        self._send_subscription(exchange_types, subscribe=False)
+
+    def _send_subscription(self, exchange_types, subscribe):
+        """Sends one (un)subscribe request for {token: exchange_type}, grouped by exchange type."""
+        action = "subscribe" if subscribe else "unsubscribe"
         if not self.is_running or not self.sws:
-            logger.warning("Cannot unsubscribe, WebSocket is not running.")
+            logger.warning(f"Cannot {action}, WebSocket is not running.")
+            return
+        if not exchange_types:
             return
 
-        logger.info(f"Unsubscribing from tokens: {self.instrument_keys} on exchange type {self.exchange_type} with mode {self.feed_mode}")
-        token_list = [{"exchangeType": self.exchange_type, "tokens": self.instrument_keys}]
-        self.sws.unsubscribe(correlation_id="strategy_sub", mode=self.feed_mode, token_list=token_list)
+        grouped = {}
+        for token, exchange_type in exchange_types.items():
+            grouped.setdefault(exchange_type, []).append(token)
+        token_list = [{"exchangeType": exchange_type, "tokens": tokens} for exchange_type, tokens in grouped.items()]
+
+        logger.info(f"{action.capitalize()} tokens: {token_list} with mode {self.feed_mode}")
+        try:
+            if subscribe:
+                self.sws.subscribe(correlation_id="strategy_sub", mode=self.feed_mode, token_list=token_list)
+            else:
+                self.sws.unsubscribe(correlation_id="strategy_sub", mode=self.feed_mode, token_list=token_list)
+        except Exception as e:
+            logger.error(f"Failed to {action} {token_list}: {e}")
 
     def _on_data(self, wsapp, message):
         """
-        Callback for each message. Parses tick data and calls the strategy's on_tick method.
+        Callback for each message. Parses tick data and calls the on_tick handlers
+        registered for the message's token.
         This is now robust enough to handle index ticks that may not have volume data.
         """
         # The raw tick logging can be commented out now that we've found the issue.
@@ -106,62 +289,138 @@ class WebSocketStreamer:
         try:
             # FIX: The condition now correctly checks for 'exchange_timestamp'.
             if 'last_traded_price' in message and 'exchange_timestamp' in message:
-                price = float(message['last_traded_price']) / 100.0
+                token = message.get('token')
+                paise = int(message['last_traded_price'])
+                price = paise if self.integer_prices else paise / 100.0
                 epoch_ms = int(message['exchange_timestamp'])
                 timestamp = datetime.fromtimestamp(epoch_ms / 1000, tz=self.ist_tz)
                 
                 # Volume is correctly treated as optional.
                 volume = int(message.get('last_traded_quantity', 0))
+
+                self._last_tick_times[token] = timestamp
+                if self._disconnected_at is not None:
+                    # First tick after a reconnect: data is flowing again.
+                    self.recovery_times.append(time.time() - self._disconnected_at)
+                    self._disconnected_at = None
                 
                 # 1. Unconditionally log to the dedicated price_ticks.log file.
-                tick_logger.info(f"{timestamp.isoformat()},{price:.2f},{volume}")
+                tick_logger.info(f"{timestamp.isoformat()},{paise // 100}.{paise % 100:02d},{volume},{token}")
 
-                if self.on_tick_callback:
+                handlers = self._tick_handlers.get(token)
+                if handlers:
                     # 2. Conditionally print to the console for visibility.
                     if self.log_ticks:
-                        print(f"LIVE TICK: {timestamp.strftime('%Y-%m-%d %H:%M:%S')} | Price: {price:<8.2f} | Volume: {volume}")
-                    # 3. Always call the strategy callback.
-                    self.on_tick_callback(timestamp, price, volume)
+                        print(f"LIVE TICK: {timestamp.strftime('%Y-%m-%d %H:%M:%S')} | Token: {token} | Price: {paise / 100.0:<8.2f} | Volume: {volume}")
+                    # 3. Always call the handlers registered for this token.
+                    for handler in handlers:
+                        try:
+                            handler(timestamp, price, volume)
+                        except Exception as e:
+                            logger.error(f"Tick handler for token {token} failed: {e}")
         except Exception as e:
             logger.error(f"Error processing tick message: {e}\nMessage: {message}")
 
     def _on_error(self, wsapp, error):
         """Callback for WebSocket errors."""
         logger.error(f"WebSocket Error: {error}")
+        self._check_auth_error(error)
 
-    def _on_close(self, wsapp, code, reason):
+    def _on_close(self, wsapp, code=None, reason=None):
         """Callback for when the connection is closed."""
+        self._connected = False
         logger.warning(f"WebSocket Connection Closed. Code: {code}, Reason: {reason}")
+        if reason:
+            self._check_auth_error(reason)
+
+    def _check_auth_error(self, error):
+        """Flags a rejection of the session, so the next attempt logs in again instead of reusing it."""
+        text = str(error).lower()
+        if getattr(error, 'status_code', None) in AUTH_ERROR_STATUSES or any(marker in text for marker in AUTH_ERROR_MARKERS):
+            self._auth_rejected = True
 
     def _run_connection(self):
-        """Internal method to authenticate and then run the WebSocket connection loop."""
+        """
+        Supervisor loop: authenticates, runs the WebSocket connection and reconnects
+        with jittered exponential backoff until stop() is called.
+        """
         self.is_running = True
         logger.info("WebSocket thread started. Beginning authentication...")
-        
-        if not self._authenticate_and_get_tokens():
-            logger.error("Halting WebSocket thread due to authentication failure.")
-            self.is_running = False
-            return
+        failed_attempts = 0
+
+        while not self._stop_event.is_set():
+            # The session is reused across reconnects, including failed attempts. Only a
+            # rejection of the session drops it, so the next login() authenticates again.
+            if self.feed_token is None and not self._authenticate_and_get_tokens():
+                logger.error("Authentication failed.")
+            else:
+                self._opened = False
+                self._auth_rejected = False
+                # Retries are handled here, so the client's own reconnect logic is disabled.
+                self.sws = SmartWebSocketV2(self.auth_token, self.api_key, self.client_id, self.feed_token,
+                                            max_retry_attempt=0)
+
+                self.sws.on_open = self._on_open
+                self.sws.on_data = self._on_data
+                self.sws.on_error = self._on_error
+                self.sws.on_close = self._on_close
+
+                logger.info("Connecting to WebSocket feed...")
+                try:
+                    self.sws.connect()
+                except Exception as e:
+                    logger.error(f"WebSocket connection error: {e}")
+                    self._check_auth_error(e)
+                self._connected = False
+
+                if self._stop_event.is_set():
+                    break
+                if self._disconnected_at is None:
+                    self._disconnected_at = time.time()
+                if self._opened:
+                    failed_attempts = 0
+                if self._auth_rejected:
+                    logger.warning("WebSocket feed rejected the session; logging in again on the next attempt.")
+                    invalidate_session()
+                    self.feed_token = None
+
+            failed_attempts += 1
+            if self.max_reconnect_attempts is not None and failed_attempts > self.max_reconnect_attempts:
+                logger.error(f"Giving up after {self.max_reconnect_attempts} consecutive failed connection attempts.")
+                break
+
+            delay = self._reconnect_delay(failed_attempts)
+            logger.warning(f"WebSocket disconnected. Reconnecting in {delay:.1f}s (attempt {failed_attempts})...")
+            if self._stop_event.wait(delay):
+                break
 
-        self.sws = SmartWebSocketV2(self.auth_token, self.api_key, self.client_id, self.feed_token)
-        
-        self.sws.on_open = self._on_open
-        self.sws.on_data = self._on_data
-        self.sws.on_error = self._on_error
-        self.sws.on_close = self._on_close
-        
-        logger.info("Connecting to WebSocket feed...")
-        self.sws.connect()
-        
         self.is_running = False
         logger.info("WebSocket connection loop has ended.")
 
+    def _reconnect_delay(self, attempt):
+        """Exponential backoff with jitter, so many clients don't reconnect in lockstep."""
+        delay = min(self.max_reconnect_delay, self.base_reconnect_delay * (2 ** (attempt - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    def get_connection_stats(self):
+        """Returns reconnect counts and time-to-recover metrics (seconds)."""
+        return {
+            'reconnect_count': self.reconnect_count,
+            'last_recovery_seconds': self.recovery_times[-1] if self.recovery_times else None,
+            'avg_recovery_seconds': sum(self.recovery_times) / len(self.recovery_times) if self.recovery_times else None,
+            'max_recovery_seconds': max(self.recovery_times) if self.recovery_times else None,
+            'backfilled_bars': self.backfilled_bars,
+            'is_disconnected': self._disconnected_at is not None,
+        }
+
     def connect(self):
         """Establishes the WebSocket connection in a separate thread."""
         if self.is_running:
             logger.warning("Connection is already running.")
             return
-            
+
+        self._stop_event.clear()
+        self.is_running = True # Set before the thread starts so callers polling is_running don't exit early
         self.ws_thread = threading.Thread(target=self._run_connection, daemon=True)
         self.ws_thread.start()
 
@@ -171,6 +430,7 @@ class WebSocketStreamer:
             return
             
         logger.info("Stopping WebSocket connection...")
+        self._stop_event.set()
         self.is_running = False
         if self.sws:
             self.sws.close_connection()
@@ -185,9 +445,11 @@ class WebSocketStreamer:
     def pause_stream(self):
         """Pauses the data stream by unsubscribing from tokens."""
         logger.info("Pausing WebSocket data stream...")
+        self._paused = True
         self._unsubscribe()
 
     def resume_stream(self):
         """Resumes the data stream by re-subscribing to tokens."""
         logger.info("Resuming WebSocket data stream...")
+        self._paused = False
         self._subscribe()